@@ -1,3 +1,24 @@
+import numbers
+
+import numpy as np
+
+from app.Rules.columns import column_length, float_column
+from app.Rules.threshold_tables import threshold_table
+
+# ===============================
+# Threshold Tables (see threshold_tables.py)
+# ===============================
+
+TOTAL_CHOLESTEROL = threshold_table("cardio.total_cholesterol")
+HDL_BY_SEX = {1: threshold_table("cardio.hdl.male"), 0: threshold_table("cardio.hdl.female")}
+TRIGLYCERIDES = threshold_table("cardio.triglycerides")
+SYSTOLIC_BP = threshold_table("cardio.systolic_bp")
+DIASTOLIC_BP = threshold_table("cardio.diastolic_bp")
+HYPERTENSION_STAGE = threshold_table("cardio.hypertension_stage")
+AGE_POINTS = threshold_table("cardio.age")
+RISK_LEVEL = threshold_table("cardio.risk")
+
+
 def analyze_cardio(totChol=None,
                    hdl=None,
                    triglycerides=None,
@@ -15,77 +36,48 @@ def analyze_cardio(totChol=None,
     # ===============================
 
     if totChol is not None:
-        if totChol >= 240:
-            findings.append("High Total Cholesterol (≥240 mg/dL)")
-            severity += 2
-            guideline_refs.append("ACC/AHA Cholesterol Guideline")
-        elif totChol >= 200:
-            findings.append("Borderline High Cholesterol")
-            severity += 1
+        severity += _apply_band(TOTAL_CHOLESTEROL.band(totChol), findings, guideline_refs)
 
     # ===============================
-    # HDL
+    # HDL (sex-specific cut-off)
     # ===============================
 
     if hdl is not None and sex is not None:
-        # Handle both string and numeric sex values
-        sex_str = str(sex).lower() if isinstance(sex, (int, float)) else sex.lower()
-        
-        # Convert numeric: 1=male, 0=female
-        if sex_str in ["1", "1.0"]:
-            sex_str = "male"
-        elif sex_str in ["0", "0.0"]:
-            sex_str = "female"
-            
-        if (sex_str == "male" and hdl < 40) or \
-           (sex_str == "female" and hdl < 50):
-            findings.append("Low HDL")
-            severity += 1
-            guideline_refs.append("ACC/AHA Lipid Guideline")
+        # Handles both string and numeric sex values (1=male, 0=female)
+        hdl_table = HDL_BY_SEX.get(_sex_code(sex))
+
+        if hdl_table is not None:
+            severity += _apply_band(hdl_table.band(hdl), findings, guideline_refs)
 
     # ===============================
     # Triglycerides
     # ===============================
 
     if triglycerides is not None:
-        if triglycerides >= 200:
-            findings.append("High Triglycerides")
-            severity += 1
+        severity += _apply_band(TRIGLYCERIDES.band(triglycerides), findings, guideline_refs)
 
     # ===============================
     # Blood Pressure
     # ===============================
 
     if sysBP is not None and diaBP is not None:
-        if sysBP >= 160 or diaBP >= 100:
-            findings.append("Stage 2 Hypertension")
-            severity += 3
-            guideline_refs.append("AHA 2017 Hypertension Guideline")
-        elif sysBP >= 140 or diaBP >= 90:
-            findings.append("Stage 1 Hypertension")
-            severity += 2
-            guideline_refs.append("AHA 2017 Hypertension Guideline")
+        stage = max(_bp_stage(SYSTOLIC_BP, sysBP), _bp_stage(DIASTOLIC_BP, diaBP))
+        severity += _apply_band(HYPERTENSION_STAGE.band(stage), findings, guideline_refs)
 
     # ===============================
     # Age Risk Modifier
     # ===============================
 
     if age is not None:
-        if age >= 65:
-            severity += 2
-        elif age >= 55:
-            severity += 1
+        age_band = AGE_POINTS.band(age)
+        if age_band is not None:
+            severity += age_band["points"]
 
     # ===============================
     # Risk Classification
     # ===============================
 
-    if severity >= 6:
-        risk = "High"
-    elif severity >= 3:
-        risk = "Moderate"
-    else:
-        risk = "Low"
+    risk = RISK_LEVEL.label(severity)
 
     return {
         "risk_level": risk,
@@ -93,3 +85,141 @@ def analyze_cardio(totChol=None,
         "findings": findings,
         "guideline_references": list(set(guideline_refs))
     }
+
+
+def _apply_band(band, findings, guideline_refs):
+    """Records a band's finding and guideline; returns its severity points."""
+
+    if band is None:
+        return 0
+
+    if band.get("finding"):
+        findings.append(band["finding"])
+    if band.get("guideline"):
+        guideline_refs.append(band["guideline"])
+
+    return band["points"]
+
+
+def _bp_stage(table, value):
+    band = table.band(value)
+    return band["stage"] if band is not None else 0
+
+
+# ===============================
+# Array Version (bulk cohorts)
+# ===============================
+
+# Flag column -> finding text, in the order analyze_cardio lists them
+CARDIO_FINDING_FLAGS = {
+    "high_total_cholesterol": "High Total Cholesterol (≥240 mg/dL)",
+    "borderline_high_cholesterol": "Borderline High Cholesterol",
+    "low_hdl": "Low HDL",
+    "high_triglycerides": "High Triglycerides",
+    "stage2_hypertension": "Stage 2 Hypertension",
+    "stage1_hypertension": "Stage 1 Hypertension",
+}
+
+
+def analyze_cardio_arrays(totChol=None,
+                          hdl=None,
+                          triglycerides=None,
+                          sysBP=None,
+                          diaBP=None,
+                          age=None,
+                          sex=None):
+    """
+    analyze_cardio over whole columns (see app/Rules/columns.py).
+    Returns equal-length arrays: risk_level, severity_score and one
+    boolean column per CARDIO_FINDING_FLAGS entry.
+    """
+
+    n = column_length(totChol, hdl, triglycerides, sysBP, diaBP, age, sex)
+
+    totChol = float_column(totChol, n)
+    hdl = float_column(hdl, n)
+    triglycerides = float_column(triglycerides, n)
+    sysBP = float_column(sysBP, n)
+    diaBP = float_column(diaBP, n)
+    age = float_column(age, n)
+    sex = _sex_codes(sex, n)
+
+    # Band numbers per marker; -1 (unmeasured) scores 0 points, no finding
+    cholesterol = TOTAL_CHOLESTEROL.indices(totChol)
+    hdl_bands = {code: np.where(sex == code, table.indices(hdl), -1) for code, table in HDL_BY_SEX.items()}
+    triglyceride = TRIGLYCERIDES.indices(triglycerides)
+
+    bp_measured = ~np.isnan(sysBP) & ~np.isnan(diaBP)
+    stage = np.maximum(
+        SYSTOLIC_BP.field("stage", SYSTOLIC_BP.indices(sysBP), 0, np.int64),
+        DIASTOLIC_BP.field("stage", DIASTOLIC_BP.indices(diaBP), 0, np.int64)
+    )
+    hypertension = np.where(bp_measured, HYPERTENSION_STAGE.indices(stage), -1)
+
+    severity = (
+        TOTAL_CHOLESTEROL.field("points", cholesterol, 0, np.int64)
+        + sum(HDL_BY_SEX[code].field("points", bands, 0, np.int64) for code, bands in hdl_bands.items())
+        + TRIGLYCERIDES.field("points", triglyceride, 0, np.int64)
+        + HYPERTENSION_STAGE.field("points", hypertension, 0, np.int64)
+        + AGE_POINTS.field("points", AGE_POINTS.indices(age), 0, np.int64)
+    )
+
+    # A flag is raised by every band, in any table, carrying its finding
+    banded = [
+        (TOTAL_CHOLESTEROL, cholesterol),
+        *((HDL_BY_SEX[code], bands) for code, bands in hdl_bands.items()),
+        (TRIGLYCERIDES, triglyceride),
+        (HYPERTENSION_STAGE, hypertension),
+    ]
+
+    flags = {}
+    for flag, text in CARDIO_FINDING_FLAGS.items():
+        raised = np.zeros(n, dtype=bool)
+        for table, bands in banded:
+            for number in table.band_numbers("finding", text):
+                raised |= bands == number
+        flags[flag] = raised
+
+    risk = RISK_LEVEL.field("label", RISK_LEVEL.indices(severity))
+
+    return {"risk_level": risk, "severity_score": severity, **flags}
+
+
+def _sex_codes(sex, n):
+    """1 = male, 0 = female, -1 = unknown, read the way analyze_cardio reads `sex`."""
+
+    if sex is None:
+        return np.full(n, -1, dtype=np.int8)
+
+    values = np.asarray(sex)
+
+    if values.dtype.kind in "iuf":
+        values = values.astype(np.float64)
+        return np.where(values == 1, 1, np.where(values == 0, 0, -1)).astype(np.int8)
+
+    # Mixed labels ("male", "F", 1, "0", None ...): decode each distinct value once
+    decoded = {}
+    codes = np.empty(n, dtype=np.int8)
+
+    for i, value in enumerate(values.tolist()):
+        code = decoded.get(value)
+        if code is None:
+            code = decoded[value] = _sex_code(value)
+        codes[i] = code
+
+    return codes
+
+
+def _sex_code(value):
+    if isinstance(value, str):
+        label = value.lower()
+    elif isinstance(value, numbers.Number):
+        label = str(value).lower()
+    else:
+        return -1
+
+    if label in ["1", "1.0", "male"]:
+        return 1
+    if label in ["0", "0.0", "female"]:
+        return 0
+    return -1
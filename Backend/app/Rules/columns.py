@@ -0,0 +1,38 @@
+# ======================================================
+# Column Inputs for the Array Rule Engines
+# ======================================================
+#
+# The *_arrays rule functions take whole columns: NumPy arrays,
+# pandas Series or lists. NaN and None both mean "not measured",
+# exactly like leaving the keyword out of the scalar function.
+
+import numpy as np
+
+
+def column_length(*columns) -> int:
+    """Length shared by every given column (None = column absent)."""
+
+    lengths = {len(column) for column in columns if column is not None}
+
+    if len(lengths) > 1:
+        raise ValueError(f"Columns differ in length: {sorted(lengths)}")
+
+    if not lengths:
+        raise ValueError("At least one column is required")
+
+    return lengths.pop()
+
+
+def float_column(values, n: int) -> np.ndarray:
+    """Column as float64; None (absent or per row) becomes NaN."""
+
+    if values is None:
+        return np.full(n, np.nan)
+
+    # NumPy maps None to NaN in float columns
+    return np.asarray(values, dtype=np.float64)
+
+
+def label_column(n: int) -> np.ndarray:
+    """Object column of labels, None until assigned."""
+    return np.full(n, None, dtype=object)
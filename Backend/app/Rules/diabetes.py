@@ -1,6 +1,11 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+import numpy as np
+
+from app.Rules.columns import column_length, float_column
+from app.Rules.threshold_tables import threshold_table
+
 # ======================================================
 # Rule Metadata
 # ======================================================
@@ -9,19 +14,19 @@ RULE_VERSION = "1.1.0"
 GUIDELINE_SOURCE = "American Diabetes Association (ADA)"
 
 # ======================================================
-# Threshold Constants (mg/dL and %)
+# Threshold Tables (mg/dL and %, see threshold_tables.py)
 # ======================================================
 
-FBS_DIABETES = 126
-FBS_PREDIABETES_LOW = 100
-
-PPBS_DIABETES = 200
-PPBS_PREDIABETES_LOW = 140
-
-HBA1C_DIABETES = 6.5
-HBA1C_PREDIABETES_LOW = 5.7
+HBA1C_BANDS = threshold_table("diabetes.hba1c")
+FBS_BANDS = threshold_table("diabetes.fbs")
+PPBS_BANDS = threshold_table("diabetes.ppbs")
+SEVERE_HYPERGLYCEMIA_BANDS = threshold_table("diabetes.severe_hyperglycemia")  # emergency safety flag
 
-SEVERE_HYPERGLYCEMIA = 300  # emergency safety flag
+# Cut-offs as plain numbers, read from the tables
+FBS_PREDIABETES_LOW, FBS_DIABETES = FBS_BANDS.edges
+PPBS_PREDIABETES_LOW, PPBS_DIABETES = PPBS_BANDS.edges
+HBA1C_PREDIABETES_LOW, HBA1C_DIABETES = HBA1C_BANDS.edges
+(SEVERE_HYPERGLYCEMIA,) = SEVERE_HYPERGLYCEMIA_BANDS.edges
 
 # ======================================================
 # Severity Labels
@@ -53,43 +58,26 @@ def validate_numeric(value: Optional[float], name: str):
 # Marker-Level Classification
 # ======================================================
 
+# None (or NaN) means not measured: no classification
+
 def classify_hba1c(value: Optional[float]):
     validate_numeric(value, "HbA1c")
-
-    if value is None:
-        return None
-    if value >= HBA1C_DIABETES:
-        return SEVERITY_DIABETES
-    elif value >= HBA1C_PREDIABETES_LOW:
-        return SEVERITY_PREDIABETES
-    else:
-        return SEVERITY_NORMAL
+    return HBA1C_BANDS.label(value)
 
 
 def classify_fbs(value: Optional[float]):
     validate_numeric(value, "FBS")
-
-    if value is None:
-        return None
-    if value >= FBS_DIABETES:
-        return SEVERITY_DIABETES
-    elif value >= FBS_PREDIABETES_LOW:
-        return SEVERITY_PREDIABETES
-    else:
-        return SEVERITY_NORMAL
+    return FBS_BANDS.label(value)
 
 
 def classify_ppbs(value: Optional[float]):
     validate_numeric(value, "PPBS")
+    return PPBS_BANDS.label(value)
 
-    if value is None:
-        return None
-    if value >= PPBS_DIABETES:
-        return SEVERITY_DIABETES
-    elif value >= PPBS_PREDIABETES_LOW:
-        return SEVERITY_PREDIABETES
-    else:
-        return SEVERITY_NORMAL
+
+def is_severe_hyperglycemia(value: Optional[float]) -> bool:
+    band = SEVERE_HYPERGLYCEMIA_BANDS.band(value)
+    return band is not None and band["abnormal"]
 
 # ======================================================
 # Aggregation + Structured Output
@@ -132,10 +120,7 @@ def analyze_diabetes(
         if SEVERITY_RANK[classification] > SEVERITY_RANK[final_risk]:
             final_risk = classification
 
-    abnormal_flag = False
-    if (fbs is not None and fbs >= SEVERE_HYPERGLYCEMIA) or \
-       (ppbs is not None and ppbs >= SEVERE_HYPERGLYCEMIA):
-        abnormal_flag = True
+    abnormal_flag = is_severe_hyperglycemia(fbs) or is_severe_hyperglycemia(ppbs)
 
     return {
         "panel": "Diabetes",
@@ -148,3 +133,62 @@ def analyze_diabetes(
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "disclaimer": "Rule-based clinical support using ADA thresholds. This is not a medical diagnosis."
     }
+
+# ======================================================
+# Array Version (bulk cohorts)
+# ======================================================
+
+RANKED_SEVERITIES = np.array([SEVERITY_NORMAL, SEVERITY_PREDIABETES, SEVERITY_DIABETES], dtype=object)
+
+
+def classify_arrays(values: np.ndarray, bands):
+    """(labels, ranks) for one marker column; unmeasured rows get None and rank 0."""
+
+    indices = bands.indices(values)
+
+    return bands.field("label", indices), bands.field("rank", indices, 0, np.int64)
+
+
+def analyze_diabetes_arrays(hba1c=None, fbs=None, ppbs=None) -> Dict[str, np.ndarray]:
+    """
+    analyze_diabetes over whole columns (see app/Rules/columns.py).
+    Returns equal-length arrays: risk_level, severity_rank (0-2),
+    abnormal_flag, the per-marker classifications and `valid`.
+    A row with a negative value is not valid (analyze_diabetes raises
+    for it); its labels are None and its flags False.
+    """
+
+    n = column_length(hba1c, fbs, ppbs)
+
+    hba1c = float_column(hba1c, n)
+    fbs = float_column(fbs, n)
+    ppbs = float_column(ppbs, n)
+
+    valid = ~((hba1c < 0) | (fbs < 0) | (ppbs < 0))
+
+    hba1c_class, hba1c_rank = classify_arrays(hba1c, HBA1C_BANDS)
+    fbs_class, fbs_rank = classify_arrays(fbs, FBS_BANDS)
+    ppbs_class, ppbs_rank = classify_arrays(ppbs, PPBS_BANDS)
+
+    severity_rank = np.maximum(np.maximum(hba1c_rank, fbs_rank), ppbs_rank)
+    risk_level = RANKED_SEVERITIES[severity_rank]
+
+    severe = SEVERE_HYPERGLYCEMIA_BANDS
+    abnormal_flag = valid & (
+        severe.field("abnormal", severe.indices(fbs), False, bool)
+        | severe.field("abnormal", severe.indices(ppbs), False, bool)
+    )
+
+    for labels in (risk_level, hba1c_class, fbs_class, ppbs_class):
+        labels[~valid] = None
+    severity_rank[~valid] = 0
+
+    return {
+        "risk_level": risk_level,
+        "severity_rank": severity_rank,
+        "abnormal_flag": abnormal_flag,
+        "hba1c_class": hba1c_class,
+        "fbs_class": fbs_class,
+        "ppbs_class": ppbs_class,
+        "valid": valid
+    }
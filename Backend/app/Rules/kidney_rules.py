@@ -1,5 +1,14 @@
 from typing import Dict
 
+import numpy as np
+
+from app.Rules.columns import column_length, float_column
+from app.Rules.threshold_tables import threshold_table
+
+# eGFR stage bands and the albuminuria override (see threshold_tables.py)
+EGFR_STAGES = threshold_table("kidney.egfr")
+SEVERE_ALBUMINURIA = threshold_table("kidney.albumin_creatinine_ratio")
+
 
 class KidneyRuleEngine:
 
@@ -16,30 +25,54 @@ class KidneyRuleEngine:
             "reason": None
         }
 
-        if egfr is None:
+        # Not measured (None or NaN): no staging
+        stage = EGFR_STAGES.band(egfr)
+
+        if stage is None:
             return result
 
-        if egfr >= 90:
-            result["ckd_stage"] = "Stage 1"
-        elif 60 <= egfr < 90:
-            result["ckd_stage"] = "Stage 2"
-        elif 30 <= egfr < 60:
-            result["ckd_stage"] = "Stage 3"
-            result["risk_level"] = "Moderate"
-        elif 15 <= egfr < 30:
-            result["ckd_stage"] = "Stage 4"
-            result["risk_level"] = "High"
-            result["override_required"] = True
-            result["reason"] = "Severe CKD (Stage 4)"
-        else:
-            result["ckd_stage"] = "Stage 5"
-            result["risk_level"] = "Critical"
-            result["override_required"] = True
-            result["reason"] = "Kidney Failure"
+        result["ckd_stage"] = stage["label"]
+        result["risk_level"] = stage["risk_level"]
+        result["override_required"] = stage["override_required"]
+        result["reason"] = stage["reason"]
 
-        if acr is not None and acr > 300:
-            result["risk_level"] = "High"
+        albuminuria = SEVERE_ALBUMINURIA.band(acr)
+
+        if albuminuria is not None and albuminuria["override_required"]:
+            result["risk_level"] = albuminuria["risk_level"]
             result["override_required"] = True
-            result["reason"] = "Severe albuminuria"
+            result["reason"] = albuminuria["reason"]
 
         return result
+
+    @staticmethod
+    def evaluate_arrays(egfr=None, acr=None) -> Dict[str, np.ndarray]:
+        """
+        evaluate() over whole columns (see app/Rules/columns.py): `egfr`
+        and `acr` (albumin_creatinine_ratio). Returns equal-length arrays
+        ckd_stage, risk_level, override_required and reason.
+        """
+
+        n = column_length(egfr, acr)
+
+        stage = EGFR_STAGES.indices(float_column(egfr, n))
+
+        ckd_stage = EGFR_STAGES.field("label", stage)
+        risk_level = EGFR_STAGES.field("risk_level", stage, "Low")
+        override_required = EGFR_STAGES.field("override_required", stage, False, bool)
+        reason = EGFR_STAGES.field("reason", stage)
+
+        # Only considered when eGFR is known, as in evaluate()
+        acr_band = SEVERE_ALBUMINURIA.indices(float_column(acr, n))
+        albuminuria = (stage >= 0) & SEVERE_ALBUMINURIA.field("override_required", acr_band, False, bool)
+
+        risk_level[albuminuria] = SEVERE_ALBUMINURIA.field("risk_level", acr_band)[albuminuria]
+        override_required |= albuminuria
+        reason[albuminuria] = SEVERE_ALBUMINURIA.field("reason", acr_band)[albuminuria]
+
+        return {
+            "ckd_stage": ckd_stage,
+            "risk_level": risk_level,
+            "override_required": override_required,
+            "reason": reason
+        }
@@ -0,0 +1,253 @@
+# ======================================================
+# Guideline Threshold Tables
+# Marker cut-offs as data, compiled into band
+# classifiers shared by the scalar and array engines
+# ======================================================
+#
+# A table splits one marker into ascending bands. Every band but the
+# first starts at "from"; the first holds everything below. A band has
+# a label plus whatever fields its rule engine reads (points, finding,
+# override ...). With "inclusive": True a value equal to "from" falls
+# in that band (value >= from); with False it stays below (value > from).
+#
+# Adding a marker = adding a table here and reading it in the engine.
+# Bump THRESHOLD_TABLES_VERSION (and the table's "version") on any change.
+
+import bisect
+
+import numpy as np
+
+THRESHOLD_TABLES_VERSION = "1.0.0"
+
+# Column kernel: up to this many cut-offs, one vectorized comparison per
+# cut-off (branch-free, faster than a binary search on short tables);
+# longer tables use np.searchsorted
+COMPARE_KERNEL_MAX_EDGES = 8
+
+THRESHOLD_TABLES = {
+
+    # ---------------- Diabetes (ADA) ----------------
+
+    "diabetes.hba1c": {
+        "version": "1.0", "unit": "%", "source": "American Diabetes Association (ADA)", "inclusive": True,
+        "bands": [
+            {"label": "Normal", "rank": 0},
+            {"from": 5.7, "label": "Prediabetes", "rank": 1},
+            {"from": 6.5, "label": "Diabetes", "rank": 2},
+        ],
+    },
+    "diabetes.fbs": {
+        "version": "1.0", "unit": "mg/dL", "source": "American Diabetes Association (ADA)", "inclusive": True,
+        "bands": [
+            {"label": "Normal", "rank": 0},
+            {"from": 100, "label": "Prediabetes", "rank": 1},
+            {"from": 126, "label": "Diabetes", "rank": 2},
+        ],
+    },
+    "diabetes.ppbs": {
+        "version": "1.0", "unit": "mg/dL", "source": "American Diabetes Association (ADA)", "inclusive": True,
+        "bands": [
+            {"label": "Normal", "rank": 0},
+            {"from": 140, "label": "Prediabetes", "rank": 1},
+            {"from": 200, "label": "Diabetes", "rank": 2},
+        ],
+    },
+    # Emergency safety flag, applied to FBS and PPBS
+    "diabetes.severe_hyperglycemia": {
+        "version": "1.0", "unit": "mg/dL", "source": "Safety flag", "inclusive": True,
+        "bands": [
+            {"label": "Not severe", "abnormal": False},
+            {"from": 300, "label": "Severe hyperglycemia", "abnormal": True},
+        ],
+    },
+
+    # ---------------- Cardiovascular (ACC/AHA) ----------------
+
+    "cardio.total_cholesterol": {
+        "version": "1.0", "unit": "mg/dL", "source": "ACC/AHA Cholesterol Guideline", "inclusive": True,
+        "bands": [
+            {"label": "Desirable", "points": 0, "finding": None, "guideline": None},
+            {"from": 200, "label": "Borderline High", "points": 1, "finding": "Borderline High Cholesterol", "guideline": None},
+            {"from": 240, "label": "High", "points": 2, "finding": "High Total Cholesterol (≥240 mg/dL)", "guideline": "ACC/AHA Cholesterol Guideline"},
+        ],
+    },
+    "cardio.hdl.male": {
+        "version": "1.0", "unit": "mg/dL", "source": "ACC/AHA Lipid Guideline", "inclusive": True,
+        "bands": [
+            {"label": "Low", "points": 1, "finding": "Low HDL", "guideline": "ACC/AHA Lipid Guideline"},
+            {"from": 40, "label": "Normal", "points": 0, "finding": None, "guideline": None},
+        ],
+    },
+    "cardio.hdl.female": {
+        "version": "1.0", "unit": "mg/dL", "source": "ACC/AHA Lipid Guideline", "inclusive": True,
+        "bands": [
+            {"label": "Low", "points": 1, "finding": "Low HDL", "guideline": "ACC/AHA Lipid Guideline"},
+            {"from": 50, "label": "Normal", "points": 0, "finding": None, "guideline": None},
+        ],
+    },
+    "cardio.triglycerides": {
+        "version": "1.0", "unit": "mg/dL", "source": "ACC/AHA Cholesterol Guideline", "inclusive": True,
+        "bands": [
+            {"label": "Normal", "points": 0, "finding": None, "guideline": None},
+            {"from": 200, "label": "High", "points": 1, "finding": "High Triglycerides", "guideline": None},
+        ],
+    },
+    # Blood pressure stage is the higher of the systolic and diastolic stages
+    "cardio.systolic_bp": {
+        "version": "1.0", "unit": "mmHg", "source": "AHA 2017 Hypertension Guideline", "inclusive": True,
+        "bands": [
+            {"label": "Below Stage 1", "stage": 0},
+            {"from": 140, "label": "Stage 1", "stage": 1},
+            {"from": 160, "label": "Stage 2", "stage": 2},
+        ],
+    },
+    "cardio.diastolic_bp": {
+        "version": "1.0", "unit": "mmHg", "source": "AHA 2017 Hypertension Guideline", "inclusive": True,
+        "bands": [
+            {"label": "Below Stage 1", "stage": 0},
+            {"from": 90, "label": "Stage 1", "stage": 1},
+            {"from": 100, "label": "Stage 2", "stage": 2},
+        ],
+    },
+    "cardio.hypertension_stage": {
+        "version": "1.0", "unit": "stage", "source": "AHA 2017 Hypertension Guideline", "inclusive": True,
+        "bands": [
+            {"label": "Below Stage 1", "points": 0, "finding": None, "guideline": None},
+            {"from": 1, "label": "Stage 1", "points": 2, "finding": "Stage 1 Hypertension", "guideline": "AHA 2017 Hypertension Guideline"},
+            {"from": 2, "label": "Stage 2", "points": 3, "finding": "Stage 2 Hypertension", "guideline": "AHA 2017 Hypertension Guideline"},
+        ],
+    },
+    "cardio.age": {
+        "version": "1.0", "unit": "years", "source": "Age risk modifier", "inclusive": True,
+        "bands": [
+            {"label": "Under 55", "points": 0},
+            {"from": 55, "label": "55-64", "points": 1},
+            {"from": 65, "label": "65+", "points": 2},
+        ],
+    },
+    "cardio.risk": {
+        "version": "1.0", "unit": "severity points", "source": "CDSS severity scale", "inclusive": True,
+        "bands": [
+            {"label": "Low"},
+            {"from": 3, "label": "Moderate"},
+            {"from": 6, "label": "High"},
+        ],
+    },
+
+    # ---------------- Kidney (KDIGO eGFR stages) ----------------
+
+    "kidney.egfr": {
+        "version": "1.0", "unit": "mL/min/1.73m²", "source": "KDIGO CKD staging", "inclusive": True,
+        "bands": [
+            {"label": "Stage 5", "risk_level": "Critical", "override_required": True, "reason": "Kidney Failure"},
+            {"from": 15, "label": "Stage 4", "risk_level": "High", "override_required": True, "reason": "Severe CKD (Stage 4)"},
+            {"from": 30, "label": "Stage 3", "risk_level": "Moderate", "override_required": False, "reason": None},
+            {"from": 60, "label": "Stage 2", "risk_level": "Low", "override_required": False, "reason": None},
+            {"from": 90, "label": "Stage 1", "risk_level": "Low", "override_required": False, "reason": None},
+        ],
+    },
+    "kidney.albumin_creatinine_ratio": {
+        "version": "1.0", "unit": "mg/g", "source": "KDIGO albuminuria", "inclusive": False,
+        "bands": [
+            {"label": "Not severe", "override_required": False},
+            {"from": 300, "label": "Severe albuminuria", "risk_level": "High", "override_required": True, "reason": "Severe albuminuria"},
+        ],
+    },
+}
+
+
+class BandClassifier:
+    """
+    One compiled threshold table. index()/band() classify a single
+    value with bisect; indices()/field() classify whole columns
+    (see COMPARE_KERNEL_MAX_EDGES). Missing values (None, NaN) have no band.
+    """
+
+    def __init__(self, name, table):
+        bands = table["bands"]
+        edges = [band["from"] for band in bands[1:]]
+
+        if "from" in bands[0]:
+            raise ValueError(f"Threshold table {name}: the first band must not have a 'from'")
+        if any(low >= high for low, high in zip(edges, edges[1:])):
+            raise ValueError(f"Threshold table {name}: bands must be in ascending order")
+
+        self.name = name
+        self.version = table["version"]
+        self.inclusive = table["inclusive"]
+        self.bands = tuple(bands)
+        self.labels = tuple(band["label"] for band in bands)
+        self.edges = tuple(float(edge) for edge in edges)
+
+        self._edges = np.array(self.edges, dtype=np.float64)
+        self._bisect = bisect.bisect_right if self.inclusive else bisect.bisect_left
+        self._side = "right" if self.inclusive else "left"
+        self._compare = np.greater_equal if self.inclusive else np.greater
+        self._fields = {}
+
+    # ---------- single values ----------
+
+    def index(self, value):
+        """Band number of one value, or None when it is missing."""
+        # value != value: NaN
+        if value is None or value != value:
+            return None
+        return self._bisect(self.edges, value)
+
+    def band(self, value):
+        if value is None or value != value:
+            return None
+        return self.bands[self._bisect(self.edges, value)]
+
+    def label(self, value):
+        if value is None or value != value:
+            return None
+        return self.labels[self._bisect(self.edges, value)]
+
+    def band_numbers(self, field, value):
+        """Band numbers whose `field` equals `value` (e.g. the bands raising a finding)."""
+        return [i for i, band in enumerate(self.bands) if band.get(field) == value]
+
+    # ---------- columns ----------
+
+    def indices(self, values):
+        """Band number per value (int64 array); -1 where the value is NaN."""
+        values = np.asarray(values, dtype=np.float64)
+
+        if len(self.edges) <= COMPARE_KERNEL_MAX_EDGES:
+            # Band number = count of cut-offs reached (NaN reaches none)
+            indices = np.zeros(values.shape, dtype=np.intp)
+            reached = np.empty(values.shape, dtype=bool)
+            for edge in self.edges:
+                indices += self._compare(values, edge, out=reached)
+        else:
+            indices = np.searchsorted(self._edges, values, side=self._side)
+
+        indices[np.isnan(values)] = -1
+        return indices
+
+    def field(self, name, indices, missing=None, dtype=object):
+        """bands[i][name] for each band number; `missing` where it is -1."""
+        key = (name, missing, dtype)
+        lookup = self._fields.get(key)
+
+        if lookup is None:
+            # Last slot answers index -1
+            lookup = np.array([band.get(name, missing) for band in self.bands] + [missing], dtype=dtype)
+            self._fields[key] = lookup
+
+        return lookup[indices]
+
+
+def compile_tables(tables):
+    return {name: BandClassifier(name, table) for name, table in tables.items()}
+
+
+# Compiled once at import; the rule engines read from here
+CLASSIFIERS = compile_tables(THRESHOLD_TABLES)
+
+
+def threshold_table(name) -> BandClassifier:
+    if name not in CLASSIFIERS:
+        raise ValueError(f"Unknown threshold table: {name}")
+    return CLASSIFIERS[name]
@@ -0,0 +1,130 @@
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from app.stage_timing import stage_timer
+
+# defer: when the rule engine makes an authoritative override, ML and SHAP
+# are not run (the result marks them "deferred"; evaluate again with
+# defer_overrides=False to get them). full: always run ML and SHAP.
+OVERRIDE_POLICY = os.getenv("CDSS_OVERRIDE_POLICY", "defer")
+
+DEFERRED_STATUS = "deferred"
+DEFERRED_REASON = "Authoritative rule override; ML and SHAP were not run. Re-evaluate with defer_overrides=False to compute them."
+EXPLANATION_DEFERRED_REASON = "Explanation not computed at evaluation time; it is computed on first request."
+
+
+def execution_failed(error: Exception) -> Dict[str, Any]:
+    return {
+        "error": str(error),
+        "status": "execution_failed"
+    }
+
+
+def should_defer(rule_result: Dict[str, Any], is_override: Optional[Callable], defer_overrides: Optional[bool] = None) -> bool:
+    """True when ML + SHAP can be skipped for this rule result (None = CDSS_OVERRIDE_POLICY)."""
+
+    if defer_overrides is None:
+        defer_overrides = OVERRIDE_POLICY == "defer"
+
+    return bool(defer_overrides and is_override is not None and is_override(rule_result))
+
+
+def deferred_outputs():
+    """(ml_result, shap_result) placeholders for a short-circuited evaluation."""
+
+    return (
+        {"status": DEFERRED_STATUS, "reason": DEFERRED_REASON},
+        deferred_explanation(DEFERRED_REASON)
+    )
+
+
+def deferred_explanation(reason: str = EXPLANATION_DEFERRED_REASON) -> Dict[str, Any]:
+    return {"top_feature_contributions": [], "status": DEFERRED_STATUS, "reason": reason}
+
+
+def is_deferred(output: Any) -> bool:
+    return isinstance(output, dict) and output.get("status") == DEFERRED_STATUS
+
+
+def evaluate_records(
+    records: List[Dict[str, Any]],
+    rule_pass: Callable,
+    predict_batch: Callable,
+    explain_batch: Callable,
+    assemble: Callable,
+    encode: Optional[Callable] = None,
+    is_override: Optional[Callable] = None,
+    defer_overrides: Optional[bool] = None,
+    explain: bool = True,
+    panel: str = ""
+) -> List[Dict[str, Any]]:
+    """
+    Runs one panel over many records.
+    Rules run per record, ML and SHAP run once on the stacked matrix
+    (encoded once by `encode`, when given, and shared by both).
+    Records whose rule result `is_override` skip ML and SHAP (see should_defer);
+    with explain=False no record runs SHAP (explanations are deferred).
+    Results keep input order; a failing record never fails its neighbours.
+    Each stage is timed once per batch (rules_batch, ml_batch, ...) for `panel`.
+    """
+
+    if not explain:
+        explain_batch = lambda batch: [deferred_explanation() for _ in range(len(batch))]
+
+    results = [None] * len(records)
+    staged = []
+
+    # ===============================
+    # Rule pass (per record isolation)
+    # ===============================
+
+    with stage_timer("rules_batch", panel):
+        for index, record in enumerate(records):
+            try:
+                rule_result = rule_pass(record)
+
+                if should_defer(rule_result, is_override, defer_overrides):
+                    results[index] = assemble(rule_result, *deferred_outputs())
+                else:
+                    staged.append((index, record, rule_result))
+
+            except Exception as e:
+                results[index] = execution_failed(e)
+
+    if not staged:
+        return results
+
+    batch = [record for _, record, _ in staged]
+
+    # ===============================
+    # Matrix inference
+    # ===============================
+
+    try:
+        if encode is not None:
+            with stage_timer("encode_batch", panel):
+                batch = encode(batch)
+
+        with stage_timer("ml_batch", panel):
+            ml_outputs = predict_batch(batch)
+
+        with stage_timer("shap_batch", panel):
+            shap_outputs = explain_batch(batch)
+
+        for (index, _, rule_result), ml_output, shap_result in zip(staged, ml_outputs, shap_outputs):
+            results[index] = assemble(rule_result, ml_output, shap_result)
+
+    except Exception:
+        # One malformed row fails the whole matrix call.
+        # Re-run row by row so only the offending records are marked failed.
+        for index, record, rule_result in staged:
+            try:
+                results[index] = assemble(
+                    rule_result,
+                    predict_batch([record])[0],
+                    explain_batch([record])[0]
+                )
+            except Exception as e:
+                results[index] = execution_failed(e)
+
+    return results
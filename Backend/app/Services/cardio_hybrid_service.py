@@ -1,8 +1,11 @@
 from datetime import datetime
 
 from app.Rules.cardio_rules import analyze_cardio
+from app.ml.cardio_model_loader import CardioModelLoader
 from app.ml.cardio_predictor import CardioPredictor
 from app.ml.cardio_shap_explainer import CardioSHAPExplainer
+from app.stage_timing import stage_timer
+from app.Services.batch_runner import deferred_explanation, DEFERRED_STATUS, deferred_outputs, evaluate_records, should_defer
 
 
 class CardioHybridService:
@@ -27,13 +30,82 @@ class CardioHybridService:
         return label
 
     @staticmethod
-    def evaluate(patient_data: dict):
+    def evaluate(patient_data: dict, defer_overrides: bool = None, explain: bool = True):
 
-        # ===============================
-        # Rule Engine
-        # ===============================
+        with stage_timer("rules", "cardio"):
+            rule_result = CardioHybridService._apply_rules(patient_data)
+
+        # Rule-first: an authoritative override does not need ML or SHAP
+        if should_defer(rule_result, CardioHybridService._is_override, defer_overrides):
+            return CardioHybridService._assemble(rule_result, *deferred_outputs())
+
+        # Encoded once; the predictor and explainer share the feature rows
+        with stage_timer("encode", "cardio"):
+            features = CardioHybridService._encode([patient_data])
+
+        with stage_timer("ml", "cardio"):
+            ml_output = CardioPredictor.predict(features)
+
+        # explain=False: SHAP is computed later, on demand (see explain())
+        if explain:
+            with stage_timer("shap", "cardio"):
+                shap_result = CardioSHAPExplainer.explain(features)
+        else:
+            shap_result = deferred_explanation()
+
+        return CardioHybridService._assemble(rule_result, ml_output, shap_result)
 
-        rule_result = analyze_cardio(
+    @staticmethod
+    def warm_up():
+        """
+        Loads model + explainer artifacts and runs one dummy inference,
+        so the first real request does not pay for it. Raises on failure.
+        """
+        CardioPredictor.predict_batch([{}])
+        CardioSHAPExplainer._initialize()
+        CardioSHAPExplainer.explain_batch([{}])
+
+    @staticmethod
+    def current_model_version():
+        """Version tag results get from the model loaded now (see the model metadata)."""
+        return CardioModelLoader.load_metadata().get("model_version")
+
+    @staticmethod
+    def explain(patient_data: dict):
+        """SHAP explanation alone, for an evaluation stored without one."""
+        with stage_timer("shap", "cardio"):
+            return CardioSHAPExplainer.explain(CardioHybridService._encode([patient_data]))
+
+    @staticmethod
+    def evaluate_batch(records: list, defer_overrides: bool = None, explain: bool = True):
+        return evaluate_records(
+            records,
+            rule_pass=CardioHybridService._apply_rules,
+            predict_batch=CardioPredictor.predict_batch,
+            explain_batch=CardioSHAPExplainer.explain_batch,
+            assemble=CardioHybridService._assemble,
+            encode=CardioHybridService._encode,
+            is_override=CardioHybridService._is_override,
+            defer_overrides=defer_overrides,
+            explain=explain,
+            panel="cardio"
+        )
+
+    @staticmethod
+    def _is_override(rule_result: dict):
+        return CardioHybridService._normalize_rule_label(rule_result.get("risk_level")) == "High"
+
+    @staticmethod
+    def _encode(records: list):
+        return CardioModelLoader.load_feature_encoder().encode(records)
+
+    # ===============================
+    # Rule Engine
+    # ===============================
+
+    @staticmethod
+    def _apply_rules(patient_data: dict):
+        return analyze_cardio(
             totChol=patient_data.get("totChol"),
             hdl=patient_data.get("hdl"),
             triglycerides=patient_data.get("triglycerides"),
@@ -43,6 +115,9 @@ class CardioHybridService:
             sex=patient_data.get("sex")
         )
 
+    @staticmethod
+    def _assemble(rule_result: dict, ml_output: dict, shap_result: dict):
+
         rule_decision = rule_result.get("risk_level")
         rule_decision = CardioHybridService._normalize_rule_label(rule_decision)
 
@@ -50,19 +125,21 @@ class CardioHybridService:
         # ML
         # ===============================
 
-        ml_output = CardioPredictor.predict(patient_data)
         ml_probability = ml_output.get("probability")
 
-        ml_risk_level = CardioHybridService.stratify_risk(ml_probability)
-
-        shap_result = CardioSHAPExplainer.explain(patient_data)
-
-        ml_result = {
-            "ml_probability": ml_probability,
-            "ml_threshold": 0.20,
-            "ml_risk_flag": ml_risk_level,
-            "model_version": "cardio_xgb_v1"
-        }
+        if ml_output.get("status") == DEFERRED_STATUS:
+            # Short-circuited by a High rule decision; no ML risk level
+            ml_risk_level = None
+            ml_result = dict(ml_output, model_version=CardioHybridService.current_model_version())
+        else:
+            ml_risk_level = CardioHybridService.stratify_risk(ml_probability)
+
+            ml_result = {
+                "ml_probability": ml_probability,
+                "ml_threshold": 0.20,
+                "ml_risk_flag": ml_risk_level,
+                "model_version": CardioHybridService.current_model_version()
+            }
 
         # ===============================
         # Override Logic
@@ -1,24 +1,100 @@
 from datetime import datetime
 
 from app.Rules.diabetes import analyze_diabetes
+from app.ml.diabetes_model_loader import DiabetesModelLoader
 from app.ml.diabetes_predictor import DiabetesPredictor
 from app.ml.diabetes_shap_explainer import DiabetesSHAPExplainer
+from app.stage_timing import stage_timer
+from app.Services.batch_runner import deferred_explanation, deferred_outputs, evaluate_records, is_deferred, should_defer
 
 
 class DiabetesHybridService:
 
     @staticmethod
-    def evaluate(patient_data: dict) -> dict:
+    def evaluate(patient_data: dict, defer_overrides: bool = None, explain: bool = True) -> dict:
 
-        rule_result = analyze_diabetes(
+        with stage_timer("rules", "diabetes"):
+            rule_result = DiabetesHybridService._apply_rules(patient_data)
+
+        # Rule-first: a diagnostic threshold breach does not need ML or SHAP
+        if should_defer(rule_result, DiabetesHybridService._is_override, defer_overrides):
+            return DiabetesHybridService._assemble(rule_result, *deferred_outputs())
+
+        # Encoded once; the predictor and explainer share the feature rows
+        with stage_timer("encode", "diabetes"):
+            features = DiabetesHybridService._encode([patient_data])
+
+        with stage_timer("ml", "diabetes"):
+            ml_result = DiabetesPredictor.predict(features)
+
+        # explain=False: SHAP is computed later, on demand (see explain())
+        if explain:
+            with stage_timer("shap", "diabetes"):
+                shap_result = DiabetesSHAPExplainer.explain(features)
+        else:
+            shap_result = deferred_explanation()
+
+        return DiabetesHybridService._assemble(rule_result, ml_result, shap_result)
+
+    @staticmethod
+    def warm_up():
+        """
+        Loads model + explainer artifacts and runs one dummy inference,
+        so the first real request does not pay for it. Raises on failure.
+        """
+        DiabetesPredictor.predict_batch([{}])
+        DiabetesSHAPExplainer._initialize()
+        DiabetesSHAPExplainer.explain_batch([{}])
+
+    @staticmethod
+    def current_model_version() -> str:
+        """Version tag results get from the model loaded now (see the model metadata)."""
+        return DiabetesModelLoader.load_metadata().get("model_version")
+
+    @staticmethod
+    def explain(patient_data: dict) -> dict:
+        """SHAP explanation alone, for an evaluation stored without one."""
+        with stage_timer("shap", "diabetes"):
+            return DiabetesSHAPExplainer.explain(DiabetesHybridService._encode([patient_data]))
+
+    @staticmethod
+    def evaluate_batch(records: list, defer_overrides: bool = None, explain: bool = True) -> list:
+        return evaluate_records(
+            records,
+            rule_pass=DiabetesHybridService._apply_rules,
+            predict_batch=DiabetesPredictor.predict_batch,
+            explain_batch=DiabetesSHAPExplainer.explain_batch,
+            assemble=DiabetesHybridService._assemble,
+            encode=DiabetesHybridService._encode,
+            is_override=DiabetesHybridService._is_override,
+            defer_overrides=defer_overrides,
+            explain=explain,
+            panel="diabetes"
+        )
+
+    @staticmethod
+    def _is_override(rule_result: dict) -> bool:
+        return rule_result.get("risk_level") == "Diabetes"
+
+    @staticmethod
+    def _encode(records: list):
+        return DiabetesModelLoader.load_feature_encoder().encode(records)
+
+    @staticmethod
+    def _apply_rules(patient_data: dict) -> dict:
+        return analyze_diabetes(
             fbs=patient_data.get("fasting_glucose_level"),
             hba1c=patient_data.get("HbA1c_level")
         )
 
-        rule_decision = rule_result.get("risk_level")
+    @staticmethod
+    def _assemble(rule_result: dict, ml_result: dict, shap_result: dict) -> dict:
+
+        if is_deferred(ml_result):
+            # Stored with the model that would have scored it, so the rescorer can tell it is current
+            ml_result = dict(ml_result, model_version=DiabetesHybridService.current_model_version())
 
-        ml_result = DiabetesPredictor.predict(patient_data)
-        shap_result = DiabetesSHAPExplainer.explain(patient_data)
+        rule_decision = rule_result.get("risk_level")
 
         # Override case
         if rule_decision == "Diabetes":
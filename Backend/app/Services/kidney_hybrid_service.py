@@ -2,8 +2,11 @@ from datetime import datetime
 import logging
 
 from app.Rules.kidney_rules import KidneyRuleEngine
+from app.ml.kidney_model_loader import KidneyModelLoader
 from app.ml.kidney_predictor import KidneyPredictor
 from app.ml.kidney_shap_explainer import KidneyShapExplainer
+from app.stage_timing import stage_timer
+from app.Services.batch_runner import deferred_explanation, deferred_outputs, evaluate_records, is_deferred, should_defer
 
 logger = logging.getLogger(__name__)
 
@@ -11,32 +14,125 @@ logger = logging.getLogger(__name__)
 class KidneyHybridService:
 
     @staticmethod
-    def evaluate(data: dict):
+    def evaluate(data: dict, defer_overrides: bool = None, explain: bool = True):
+
+        with stage_timer("rules", "kidney"):
+            rule_result = KidneyRuleEngine.evaluate(data)
+
+        # Rule-first: an authoritative override does not need ML or SHAP
+        if should_defer(rule_result, KidneyHybridService._is_override, defer_overrides):
+            return KidneyHybridService._assemble(rule_result, *deferred_outputs())
+
+        # Encoded once; the predictor and explainer share the feature rows
+        try:
+            with stage_timer("encode", "kidney"):
+                features = KidneyHybridService._encode([data])
+        except Exception:
+            # Metadata unavailable: let both report it in their usual fallback shape
+            features = [data]
+
+        with stage_timer("ml", "kidney"):
+            ml_result = KidneyHybridService._predict_batch(features)[0]
+
+        # explain=False: SHAP is computed later, on demand (see explain())
+        if explain:
+            with stage_timer("shap", "kidney"):
+                shap_result = KidneyHybridService._explain_batch(features)[0]
+        else:
+            shap_result = deferred_explanation()
+
+        return KidneyHybridService._assemble(rule_result, ml_result, shap_result)
+
+    @staticmethod
+    def warm_up():
+        """
+        Loads model + explainer artifacts and runs one dummy inference,
+        so the first real request does not pay for it. Raises on failure.
+        """
+        KidneyPredictor.predict_batch([{}])
+        KidneyShapExplainer._initialize()
+        KidneyShapExplainer.explain_batch([{}])
+
+    @staticmethod
+    def current_model_version():
+        """Version tag results get from the model loaded now (see the model metadata)."""
+        return KidneyModelLoader.load_metadata().get("model_version")
+
+    @staticmethod
+    def explain(data: dict):
+        """SHAP explanation alone, for an evaluation stored without one."""
+        with stage_timer("shap", "kidney"):
+            return KidneyHybridService._explain_batch(KidneyHybridService._encode([data]))[0]
+
+    @staticmethod
+    def evaluate_batch(records: list, defer_overrides: bool = None, explain: bool = True):
+        return evaluate_records(
+            records,
+            rule_pass=KidneyRuleEngine.evaluate,
+            predict_batch=KidneyHybridService._predict_batch,
+            explain_batch=KidneyHybridService._explain_batch,
+            assemble=KidneyHybridService._assemble,
+            encode=KidneyHybridService._encode,
+            is_override=KidneyHybridService._is_override,
+            defer_overrides=defer_overrides,
+            explain=explain,
+            panel="kidney"
+        )
+
+    @staticmethod
+    def _is_override(rule_result: dict):
+        return bool(rule_result.get("override_required"))
+
+    @staticmethod
+    def _encode(records: list):
+        return KidneyModelLoader.load_feature_encoder().encode(records)
+
+    @staticmethod
+    def _predict_batch(records: list):
 
-        rule_result = KidneyRuleEngine.evaluate(data)
-        
         # Try ML prediction with error handling
         try:
-            ml_result = KidneyPredictor.predict(data)
+            return KidneyPredictor.predict_batch(records)
         except Exception as e:
+            if len(records) > 1:
+                # Isolate the offending rows instead of failing the whole batch
+                return [KidneyHybridService._predict_batch([r])[0] for r in records]
             logger.error(f"Kidney ML prediction failed: {str(e)}")
-            ml_result = {
-                "ml_probability": None,
-                "ml_threshold": 0.5,
-                "ml_risk_flag": "ML Unavailable",
-                "model_version": "Error",
-                "error": str(e)
-            }
-        
+            return [
+                {
+                    "ml_probability": None,
+                    "ml_threshold": 0.5,
+                    "ml_risk_flag": "ML Unavailable",
+                    "model_version": "Error",
+                    "error": str(e)
+                }
+                for _ in records
+            ]
+
+    @staticmethod
+    def _explain_batch(records: list):
+
         # Try SHAP explanation with error handling
         try:
-            shap_result = KidneyShapExplainer.explain(data)
+            return KidneyShapExplainer.explain_batch(records)
         except Exception as e:
+            if len(records) > 1:
+                return [KidneyHybridService._explain_batch([r])[0] for r in records]
             logger.error(f"Kidney SHAP explanation failed: {str(e)}")
-            shap_result = {
-                "top_feature_contributions": [],
-                "error": str(e)
-            }
+            return [
+                {
+                    "top_feature_contributions": [],
+                    "error": str(e)
+                }
+                for _ in records
+            ]
+
+    @staticmethod
+    def _assemble(rule_result: dict, ml_result: dict, shap_result: dict):
+
+        if is_deferred(ml_result):
+            # Stored with the model that would have scored it, so the rescorer can tell it is current
+            ml_result = dict(ml_result, model_version=KidneyHybridService.current_model_version())
 
         if rule_result.get("override_required"):
             final_decision = rule_result.get("risk_level")
@@ -0,0 +1,425 @@
+# ============================================
+# Command-Line Tools
+# Bulk scoring and re-scoring without the HTTP API
+# ============================================
+#
+# Usage (from the Backend folder):
+#   python -m app.cli score Data_set/Cardiovascular_Dataset.csv \
+#       --panels Cardiovascular --rename male=sex --output scores.csv
+#
+# The input CSV is read in --chunk-size row chunks. Each chunk runs the
+# same hybrid pipeline as /evaluate-batch (rules + calibrated model, SHAP
+# with --explain) in a pool of worker processes, and results are written
+# in input order as chunks finish. At most --workers x CHUNKS_IN_FLIGHT
+# chunks are in memory at once, so file size does not matter.
+# Output is CSV, or Parquet for a .parquet path (needs pyarrow).
+#
+#   python -m app.cli rescore [--panels Cardiovascular] [--status]
+#
+# Re-scores stored evaluations after a model change (see app/rescoring.py).
+
+import argparse
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+logger = logging.getLogger("cdss.cli")
+
+SCORE_CHUNK_ROWS = 1000
+
+# Chunks queued or running per worker process
+CHUNKS_IN_FLIGHT = 2
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2.0
+
+# Per-panel output columns: (field, kind); the column is <panel>_<field>.
+# json fields hold the nested dict serialized.
+PANEL_FIELDS = [
+    ("status", "str"),
+    ("final_decision", "str"),
+    ("decision_source", "str"),
+    ("confidence", "float"),
+    ("severity", "str"),
+    ("override_reason", "str"),
+    ("ml_probability", "float"),
+    ("ml_risk_flag", "str"),
+    ("model_version", "str"),
+    ("rule_result", "json"),
+    ("error", "str"),
+]
+
+EXPLANATION_FIELD = ("explanation", "json")
+
+
+# ===============================
+# Result flattening
+# ===============================
+
+def output_fields(panels, explain, id_column=None):
+    """[(column, kind)] of the output file, in order."""
+
+    fields = [("row", "int")]
+
+    if id_column:
+        fields.append((id_column, "str"))
+
+    panel_fields = PANEL_FIELDS + ([EXPLANATION_FIELD] if explain else [])
+
+    for panel in panels:
+        fields.extend((f"{panel.lower()}_{field}", kind) for field, kind in panel_fields)
+
+    return fields
+
+
+def flatten_result(panel, result, explain):
+    """One panel result as flat output columns."""
+
+    ml_result = result.get("ml_result") or {}
+    explanation = result.get("ml_explainability") or {}
+
+    # Panel failure, else the ML step's own status (e.g. deferred), else ok
+    status = result.get("status") or ml_result.get("status") or "ok"
+    error = result.get("error") or ml_result.get("error") or explanation.get("error")
+
+    prefix = panel.lower()
+    row = {
+        f"{prefix}_status": status,
+        f"{prefix}_final_decision": result.get("final_decision"),
+        f"{prefix}_decision_source": result.get("decision_source"),
+        f"{prefix}_confidence": result.get("confidence"),
+        f"{prefix}_severity": result.get("severity"),
+        f"{prefix}_override_reason": result.get("override_reason"),
+        f"{prefix}_ml_probability": ml_result.get("ml_probability"),
+        f"{prefix}_ml_risk_flag": ml_result.get("ml_risk_flag"),
+        f"{prefix}_model_version": result.get("model_version"),
+        f"{prefix}_rule_result": _to_json(result.get("rule_result")),
+        f"{prefix}_error": error,
+    }
+
+    if explain:
+        row[f"{prefix}_explanation"] = _to_json(result.get("ml_explainability"))
+
+    return row
+
+
+def _to_json(value):
+    return json.dumps(value, default=str) if value is not None else None
+
+
+def chunk_records(chunk):
+    """Patient dicts for a chunk; empty cells are left out, like fields absent from a request."""
+    return [
+        {key: value for key, value in record.items() if value == value and value is not None}
+        for record in chunk.to_dict("records")
+    ]
+
+
+# ===============================
+# Worker
+# ===============================
+
+def score_chunk(chunk, start, panels, explain, defer_overrides, id_column, fields):
+    """Runs the hybrid pipeline over one input chunk. Returns the output frame."""
+
+    from app.master_service import CDSSMasterRouter
+
+    results = CDSSMasterRouter.route_batch(panels, chunk_records(chunk), defer_overrides, explain)
+
+    ids = chunk[id_column].tolist() if id_column else None
+    rows = []
+
+    for offset, record_result in enumerate(results):
+        row = {"row": start + offset}
+        if ids is not None:
+            row[id_column] = ids[offset]
+        for panel in panels:
+            row.update(flatten_result(panel, record_result[panel], explain))
+        rows.append(row)
+
+    frame = pd.DataFrame(rows, columns=[name for name, _ in fields])
+
+    for name, kind in fields:
+        if kind == "float":
+            frame[name] = pd.to_numeric(frame[name], errors="coerce")
+        elif kind == "str":
+            frame[name] = frame[name].map(lambda value: None if value is None or value != value else str(value))
+
+    return frame
+
+
+def _warm_worker(panels):
+    # Spawned workers (no fork) load their own models once
+    from app.master_service import CDSSMasterRouter
+
+    for panel in panels:
+        try:
+            CDSSMasterRouter.PANEL_MAP[panel].warm_up()
+        except Exception as e:
+            logger.warning(f"{panel} warm-up failed: {str(e)}")
+
+
+# ===============================
+# Writers
+# ===============================
+
+class CsvResultWriter:
+
+    def __init__(self, path, fields):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._header = True
+
+    def write(self, frame):
+        frame.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """One row group per chunk, with a fixed schema so empty columns keep their type."""
+
+    def __init__(self, path, fields):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow); use a .csv output instead")
+
+        types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "json": pa.string()}
+
+        self._pa = pa
+        self._schema = pa.schema([(name, types[kind]) for name, kind in fields])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, frame):
+        self._writer.write_table(self._pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_writer(path, output_format, fields):
+    if output_format is None:
+        output_format = "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+
+    if output_format == "parquet":
+        return ParquetResultWriter(path, fields)
+
+    return CsvResultWriter(path, fields)
+
+
+# ===============================
+# score command
+# ===============================
+
+def score(args):
+    from app.master_service import CDSSMasterRouter
+
+    panels = [panel.strip() for panel in args.panels.split(",") if panel.strip()]
+    unknown = [panel for panel in panels if panel not in CDSSMasterRouter.PANEL_MAP]
+
+    if not panels or unknown:
+        raise SystemExit(f"Unsupported panel(s): {', '.join(unknown) or '(none given)'}; "
+                         f"choose from {', '.join(CDSSMasterRouter.PANEL_MAP)}")
+
+    renames = dict(pair.split("=", 1) for pair in args.rename)
+    fields = output_fields(panels, args.explain, args.id_column)
+    workers = args.workers if args.workers is not None else os.cpu_count() or 1
+
+    # Before loading models, so a bad output path or format fails fast
+    writer = open_writer(args.output, args.format, fields)
+
+    # Fork shares the loaded models copy-on-write (as app.serve does);
+    # without fork every worker loads its own
+    fork = workers > 0 and "fork" in multiprocessing.get_all_start_methods()
+
+    if workers == 0 or fork:
+        from app.ml.inference_server import scoring_in_process
+
+        with scoring_in_process():
+            _warm_worker(panels)
+        gc.collect()
+        gc.freeze()
+
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork" if fork else "spawn"),
+            initializer=None if fork else _warm_worker,
+            initargs=() if fork else (panels,)
+        )
+
+    reader = pd.read_csv(args.input, chunksize=args.chunk_size)
+
+    status_counts = {panel: Counter() for panel in panels}
+    rows_written = 0
+    started = time.perf_counter()
+    last_report = started
+
+    def write(frame):
+        nonlocal rows_written, last_report
+        writer.write(frame)
+        rows_written += len(frame)
+        for panel in panels:
+            status_counts[panel].update(frame[f"{panel.lower()}_status"].tolist())
+
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL:
+            print(f"  {rows_written} rows, {rows_written / (now - started):.0f} rows/s", file=sys.stderr)
+            last_report = now
+
+    pending = deque()
+    start = 0
+
+    try:
+        for chunk in reader:
+            if renames:
+                chunk = chunk.rename(columns=renames)
+
+            task = (chunk, start, panels, args.explain, args.defer_overrides, args.id_column, fields)
+            start += len(chunk)
+
+            if executor is None:
+                write(score_chunk(*task))
+                continue
+
+            pending.append(executor.submit(score_chunk, *task))
+
+            # Bounded: wait for the oldest chunk before reading further
+            while len(pending) >= workers * CHUNKS_IN_FLIGHT:
+                write(pending.popleft().result())
+
+        while pending:
+            write(pending.popleft().result())
+
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+
+    print(f"Scored {rows_written} rows x {len(panels)} panel(s) in {elapsed:.2f}s "
+          f"({rows_written / elapsed if elapsed else 0:.0f} rows/s, {max(workers, 1)} process(es)) -> {args.output}")
+
+    for panel, counts in status_counts.items():
+        print(f"  {panel}: " + ", ".join(f"{status} {count}" for status, count in counts.most_common()))
+
+
+# ===============================
+# rescore command
+# ===============================
+
+def rescore(args):
+    from app.rescoring import EvaluationRescorer
+
+    if args.status:
+        for job in EvaluationRescorer.jobs():
+            print(f"Job {job['id']} [{job['status']}] {job['target_versions']}: "
+                  f"{job['scanned']} scanned, {job['rescored']} written, {job['failed']} failed, "
+                  f"cursor {job['last_evaluation_id']}, updated {job['updated_at']}"
+                  + (f", error: {job['error']}" if job["error"] else ""))
+        return
+
+    # Progress lines come from the cdss.rescore logger
+    logging.getLogger("cdss.rescore").setLevel(logging.INFO)
+
+    if args.nice and hasattr(os, "nice"):
+        os.nice(args.nice)
+
+    panels = [panel.strip() for panel in args.panels.split(",") if panel.strip()] if args.panels else None
+
+    try:
+        job = EvaluationRescorer.run(
+            panels=panels,
+            batch_size=args.batch_size,
+            duty_cycle=args.duty_cycle,
+            limit=args.limit,
+            restart=args.restart,
+            explain=args.explain,
+            defer_overrides=args.defer_overrides
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    except KeyboardInterrupt:
+        # The last committed batch is kept; the next run continues after it
+        raise SystemExit("Interrupted; run the same command again to resume")
+
+    print(f"Job {job['id']} [{job['status']}]: {job['scanned']} evaluations scanned, "
+          f"{job['rescored']} results written, {job['failed']} failed (cursor {job['last_evaluation_id']})")
+
+
+# ===============================
+# Entry point
+# ===============================
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="CDSS command-line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    score_parser = commands.add_parser("score", help="Score a CSV of patients through the hybrid pipeline")
+    score_parser.add_argument("input", help="Input CSV, one patient per row, columns named like API fields")
+    score_parser.add_argument("--panels", required=True, help="Comma-separated panels, e.g. Cardiovascular,Kidney")
+    score_parser.add_argument("--output", "-o", required=True, help="Output .csv or .parquet path")
+    score_parser.add_argument("--format", choices=["csv", "parquet"], help="Output format (default: from the extension)")
+    score_parser.add_argument("--chunk-size", type=int, default=SCORE_CHUNK_ROWS, help="Rows per chunk")
+    score_parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count; 0 scores in this process)")
+    score_parser.add_argument("--explain", action="store_true", help="Also compute SHAP explanations")
+    score_parser.add_argument("--defer-overrides", action=argparse.BooleanOptionalAction, default=None,
+                              help="Skip ML + SHAP on rule overrides (default: CDSS_OVERRIDE_POLICY)")
+    score_parser.add_argument("--rename", action="append", default=[], metavar="COLUMN=FIELD",
+                              help="Rename an input column to an API field, e.g. male=sex (repeatable)")
+    score_parser.add_argument("--id-column", help="Input column copied to the output to identify rows")
+    score_parser.set_defaults(handler=score)
+
+    from app.rescoring import RESCORE_BATCH_SIZE, RESCORE_DUTY_CYCLE, RESCORE_NICE
+
+    rescore_parser = commands.add_parser(
+        "rescore",
+        help="Re-score stored evaluations whose model version is not the one loaded now (resumable)"
+    )
+    rescore_parser.add_argument("--panels", help="Comma-separated panels (default: all)")
+    rescore_parser.add_argument("--batch-size", type=int, default=RESCORE_BATCH_SIZE, help="Evaluations per batch")
+    rescore_parser.add_argument("--duty-cycle", type=float, default=RESCORE_DUTY_CYCLE,
+                                help="Share of wall time spent scoring, 0-1 (1 = no pauses)")
+    rescore_parser.add_argument("--nice", type=int, default=RESCORE_NICE, help="Nice increment for this process")
+    rescore_parser.add_argument("--limit", type=int, help="Stop after this many evaluations (resume later)")
+    rescore_parser.add_argument("--restart", action="store_true", help="Start a new pass instead of resuming")
+    rescore_parser.add_argument("--explain", action=argparse.BooleanOptionalAction, default=True,
+                                help="Compute SHAP explanations for the new results")
+    rescore_parser.add_argument("--defer-overrides", action=argparse.BooleanOptionalAction, default=None,
+                                help="Skip ML + SHAP on rule overrides (default: CDSS_OVERRIDE_POLICY)")
+    rescore_parser.add_argument("--status", action="store_true", help="Print the latest jobs and exit")
+    rescore_parser.set_defaults(handler=rescore)
+
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    args = build_parser().parse_args(argv)
+
+    if getattr(args, "chunk_size", 1) <= 0 or getattr(args, "batch_size", 1) <= 0:
+        raise SystemExit("--chunk-size and --batch-size must be positive")
+
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
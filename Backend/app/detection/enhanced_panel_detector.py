@@ -1,5 +1,7 @@
 from typing import Dict, List, Any
 
+from app.stage_timing import stage_timer
+
 
 class EnhancedPanelDetector:
     """
@@ -28,6 +30,7 @@ class EnhancedPanelDetector:
     }
 
     @staticmethod
+    @stage_timer("panel_detection")
     def detect_available_panels(extracted_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Detect which panels can be analyzed based on extracted data.
@@ -66,9 +69,7 @@ class EnhancedPanelDetector:
                 }
         
         # Identify tests that don't belong to any supported panel
-        all_supported_markers = set()
-        for requirements in EnhancedPanelDetector.PANEL_REQUIREMENTS.values():
-            all_supported_markers.update(requirements.get("model_inputs", []))
+        all_supported_markers = EnhancedPanelDetector.supported_markers()
         
         for key in data_keys:
             if key not in all_supported_markers:
@@ -82,6 +83,14 @@ class EnhancedPanelDetector:
             "extracted_data": extracted_data
         }
 
+    @staticmethod
+    def supported_markers() -> set:
+        """Every biomarker some panel's model takes as input."""
+        markers = set()
+        for requirements in EnhancedPanelDetector.PANEL_REQUIREMENTS.values():
+            markers.update(requirements.get("model_inputs", []))
+        return markers
+
     @staticmethod
     def get_panel_status_message(panel_name: str, panel_details: Dict) -> str:
         """
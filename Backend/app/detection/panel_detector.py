@@ -1,5 +1,7 @@
 from typing import Dict, List, Any
 
+from app.stage_timing import stage_timer
+
 
 # ---- PANEL REQUIREMENT MAP ---- #
 
@@ -38,6 +40,7 @@ def _has_any(data_keys: set, required_keys: List[str]) -> bool:
     return any(key in data_keys for key in required_keys)
 
 
+@stage_timer("panel_detection")
 def detect_panels(extracted_data: Dict[str, Any]) -> Dict[str, List[str]]:
     """
     Detect supported panels based purely on presence of required biomarkers.
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 import json
 import logging
 
+from app.stage_timing import stage_timer
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -44,16 +46,17 @@ User Question:
     """
 
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": context}
-            ],
-            temperature=0.3,
-            max_tokens=700,
-            timeout=30  # 30 second timeout
-        )
+        with stage_timer("llm"):
+            completion = client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": context}
+                ],
+                temperature=0.3,
+                max_tokens=700,
+                timeout=30  # 30 second timeout
+            )
 
         return completion.choices[0].message.content
     
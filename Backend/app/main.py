@@ -1,9 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from app.detection.panel_detector import detect_panels
 from app.master_service import CDSSMasterRouter
+from app.ml.explanation_batcher import batching_metrics
+from app.ml.inference_server import InferenceClient, INFERENCE_SERVER_ENABLED, inference_metrics
+from app.ml.prediction_cache import cache_metrics
+from app.pdf.extraction_cache import pdf_cache_metrics
+from app.pdf.parse_pool import PdfParsePool, PDF_POOL_ENABLED, pdf_pool_metrics
+from app.stage_timing import STAGE_TIMING_ENABLED, StageMetrics, begin_request, end_request, server_timing
+from app.warmup import PanelWarmup, EAGER_WARMUP
 
 from app.database.base import Base
 from app.database.engine import engine
@@ -12,6 +22,8 @@ import app.models.profile
 import app.models.evaluation
 import app.models.chat_session
 import app.models.chat_message
+import app.models.rescore_job
+import app.models.evaluation_rescore
 from app.auth.routes import router as auth_router
 from app.auth.security import verify_token
 from app.routes.profile_routes import router as profile_router
@@ -21,7 +33,24 @@ from app.routes.pdf_routes import router as pdf_router
 from fastapi.middleware.cors import CORSMiddleware
 
 Base.metadata.create_all(bind=engine)
-app = FastAPI(title="Hybrid Multi-Panel CDSS")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load every panel's model + explainer in parallel before traffic arrives.
+    # Workers forked by app.serve inherit panels the master already warmed.
+    if EAGER_WARMUP and not PanelWarmup.finished():
+        PanelWarmup.start_background()
+    # Scoring processes load their own models while the API starts up
+    if INFERENCE_SERVER_ENABLED:
+        InferenceClient.start()
+    # PDF workers start ahead of the first upload
+    if PDF_POOL_ENABLED:
+        PdfParsePool.start()
+    yield
+
+
+app = FastAPI(title="Hybrid Multi-Panel CDSS", lifespan=lifespan)
 
 # CORS configuration - supports both development and production
 import os
@@ -34,6 +63,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+
+# ======================================
+# STAGE TIMING (Server-Timing + /metrics)
+# ======================================
+
+@app.middleware("http")
+async def stage_timing_middleware(request: Request, call_next):
+    if not STAGE_TIMING_ENABLED:
+        return await call_next(request)
+
+    token = begin_request()
+    started = time.perf_counter()
+
+    try:
+        response = await call_next(request)
+    finally:
+        timings = end_request(token)
+
+    elapsed = time.perf_counter() - started
+
+    # Route template, not the raw path, so ids do not explode the label set
+    route = request.scope.get("route")
+    StageMetrics.record_request(request.method, getattr(route, "path", "unmatched"), response.status_code, elapsed)
+
+    response.headers["Server-Timing"] = server_timing(timings, elapsed)
+    return response
+
+
 app.include_router(auth_router)
 app.include_router(profile_router)
 app.include_router(evaluation_router)
@@ -65,6 +123,70 @@ def health():
     return {"status": "CDSS Operational"}
 
 
+# ======================================
+# READINESS (MODEL WARM-UP)
+# ======================================
+
+@app.get("/ready")
+def ready():
+    status = PanelWarmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+# ======================================
+# PROMETHEUS METRICS (STAGE LATENCY)
+# ======================================
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(StageMetrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+# ======================================
+# SHAP BATCHING METRICS
+# ======================================
+
+@app.get("/metrics/explanations")
+def explanation_metrics():
+    return batching_metrics()
+
+
+# ======================================
+# PREDICTION CACHE METRICS
+# ======================================
+
+@app.get("/metrics/prediction-cache")
+def prediction_cache_metrics():
+    return cache_metrics()
+
+
+# ======================================
+# INFERENCE SERVER METRICS
+# ======================================
+
+@app.get("/metrics/inference")
+def inference_server_metrics():
+    return inference_metrics()
+
+
+# ======================================
+# PDF WORKER POOL METRICS
+# ======================================
+
+@app.get("/metrics/pdf-pool")
+def pdf_worker_pool_metrics():
+    return pdf_pool_metrics()
+
+
+# ======================================
+# PDF EXTRACTION CACHE METRICS
+# ======================================
+
+@app.get("/metrics/pdf-cache")
+def pdf_extraction_cache_metrics():
+    return pdf_cache_metrics()
+
+
 # ======================================
 # PANEL DETECTION
 # ======================================
@@ -79,9 +201,10 @@ def detect(data: Dict[str, Any], user=Depends(verify_token)):
 # ======================================
 
 @app.post("/evaluate")
-def evaluate(panel: str, data: Dict[str, Any], user=Depends(verify_token)):
+def evaluate(panel: str, data: Dict[str, Any], defer_overrides: Optional[bool] = None, user=Depends(verify_token)):
+    # defer_overrides=false computes the ML + SHAP a rule override would skip
     try:
-        return CDSSMasterRouter.route_single(panel, data)
+        return CDSSMasterRouter.route_single(panel, data, defer_overrides)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -91,5 +214,14 @@ def evaluate(panel: str, data: Dict[str, Any], user=Depends(verify_token)):
 # ======================================
 
 @app.post("/evaluate-multiple")
-def evaluate_multiple(panels: List[str], data: Dict[str, Any], user=Depends(verify_token)):
-    return CDSSMasterRouter.route_multiple(panels, data)
+def evaluate_multiple(panels: List[str], data: Dict[str, Any], defer_overrides: Optional[bool] = None, user=Depends(verify_token)):
+    return CDSSMasterRouter.route_multiple(panels, data, defer_overrides)
+
+
+# ======================================
+# BATCH MULTI-PATIENT EVALUATION
+# ======================================
+
+@app.post("/evaluate-batch")
+def evaluate_batch(panels: List[str], records: List[Dict[str, Any]], defer_overrides: Optional[bool] = None, user=Depends(verify_token)):
+    return CDSSMasterRouter.route_batch(panels, records, defer_overrides)
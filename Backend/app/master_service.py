@@ -1,9 +1,17 @@
-from typing import Dict, List, Any
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
 
 from app.Services.diabetes_hybrid_service import DiabetesHybridService
 from app.Services.cardio_hybrid_service import CardioHybridService
 from app.Services.kidney_hybrid_service import KidneyHybridService
 
+# Threads shared by all requests for running panels side by side.
+# 0 runs the panels of a request one after another on the calling thread.
+PANEL_WORKERS = int(os.getenv("CDSS_PANEL_WORKERS", "8"))
+
 
 class CDSSMasterRouter:
 
@@ -14,10 +22,12 @@ class CDSSMasterRouter:
     }
 
     @staticmethod
-    def route_single(panel_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    def route_single(panel_name: str, data: Dict[str, Any], defer_overrides: Optional[bool] = None, explain: bool = True) -> Dict[str, Any]:
         """
         Executes a single panel safely.
         Returns { panel_name: result }
+        defer_overrides: skip ML + SHAP on rule overrides (None = CDSS_OVERRIDE_POLICY).
+        explain=False leaves ml_explainability deferred (see explain()).
         """
 
         if panel_name not in CDSSMasterRouter.PANEL_MAP:
@@ -26,7 +36,7 @@ class CDSSMasterRouter:
         service = CDSSMasterRouter.PANEL_MAP[panel_name]
 
         try:
-            result = service.evaluate(data)
+            result = service.evaluate(data, defer_overrides, explain)
             return {panel_name: result}
 
         except Exception as e:
@@ -39,12 +49,72 @@ class CDSSMasterRouter:
             }
 
     @staticmethod
-    def route_multiple(panels: List[str], data: Dict[str, Any]) -> Dict[str, Any]:
+    def explain(panel_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        SHAP explanation for one panel, computed on demand
+        (e.g. for a stored evaluation run with explain=False).
+        """
+
+        if panel_name not in CDSSMasterRouter.PANEL_MAP:
+            raise ValueError(f"Unsupported panel: {panel_name}")
+
+        return CDSSMasterRouter.PANEL_MAP[panel_name].explain(data)
+
+    _executor = None
+    _executor_pid = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls):
+        # Pool threads do not survive fork(); a forked worker builds its own pool
+        if cls._executor_pid != os.getpid():
+            with cls._executor_lock:
+                if cls._executor_pid != os.getpid():
+                    cls._executor = ThreadPoolExecutor(max_workers=PANEL_WORKERS, thread_name_prefix="panel")
+                    cls._executor_pid = os.getpid()
+        return cls._executor
+
+    @staticmethod
+    def _run_panels(panels: List[str], call) -> Dict[str, Any]:
+        """
+        Runs call(service) once per supported panel, concurrently.
+        Returns { panel_name: (result, error) }; a failing panel never
+        affects the others. The calling thread runs the first panel itself.
+        """
+
+        supported = [p for p in dict.fromkeys(panels) if p in CDSSMasterRouter.PANEL_MAP]
+
+        def run(panel_name):
+            try:
+                return call(CDSSMasterRouter.PANEL_MAP[panel_name]), None
+            except Exception as e:
+                return None, e
+
+        if PANEL_WORKERS <= 0 or len(supported) < 2:
+            return {panel_name: run(panel_name) for panel_name in supported}
+
+        executor = CDSSMasterRouter._get_executor()
+        # Copied context: pool threads report stage timings to this request
+        futures = {
+            panel_name: executor.submit(contextvars.copy_context().run, run, panel_name)
+            for panel_name in supported[1:]
+        }
+
+        outcomes = {supported[0]: run(supported[0])}
+        for panel_name, future in futures.items():
+            outcomes[panel_name] = future.result()
+
+        return outcomes
+
+    @staticmethod
+    def route_multiple(panels: List[str], data: Dict[str, Any], defer_overrides: Optional[bool] = None, explain: bool = True) -> Dict[str, Any]:
         """
         Executes multiple panels safely.
-        Each panel isolated.
+        Each panel isolated; panels run in parallel, results keep request order.
         """
 
+        outcomes = CDSSMasterRouter._run_panels(panels, lambda service: service.evaluate(data, defer_overrides, explain))
+
         results = {}
 
         for panel_name in panels:
@@ -56,15 +126,52 @@ class CDSSMasterRouter:
                 }
                 continue
 
-            service = CDSSMasterRouter.PANEL_MAP[panel_name]
-
-            try:
-                results[panel_name] = service.evaluate(data)
+            result, error = outcomes[panel_name]
 
-            except Exception as e:
+            if error is None:
+                results[panel_name] = result
+            else:
                 results[panel_name] = {
-                    "error": str(e),
+                    "error": str(error),
                     "status": "execution_failed"
                 }
 
         return results
+
+    @staticmethod
+    def route_batch(panels: List[str], records: List[Dict[str, Any]], defer_overrides: Optional[bool] = None, explain: bool = True) -> List[Dict[str, Any]]:
+        """
+        Executes multiple panels for many patients.
+        Each panel scores all records in one matrix call; panels run in parallel.
+        Returns one { panel_name: result } dict per record, in input order.
+        """
+
+        results = [{} for _ in records]
+
+        outcomes = CDSSMasterRouter._run_panels(panels, lambda service: service.evaluate_batch(records, defer_overrides, explain))
+
+        for panel_name in panels:
+
+            if panel_name not in CDSSMasterRouter.PANEL_MAP:
+                for record_result in results:
+                    record_result[panel_name] = {
+                        "error": "Unsupported panel",
+                        "status": "invalid_panel"
+                    }
+                continue
+
+            panel_results, error = outcomes[panel_name]
+
+            if error is not None:
+                panel_results = [
+                    {
+                        "error": str(error),
+                        "status": "execution_failed"
+                    }
+                    for _ in records
+                ]
+
+            for record_result, panel_result in zip(results, panel_results):
+                record_result[panel_name] = panel_result
+
+        return results
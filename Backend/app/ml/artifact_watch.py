@@ -0,0 +1,77 @@
+# ============================================
+# Model Artifact Watch
+# Notices retrained or re-exported artifacts on
+# disk, so a running process reloads them
+# without a restart
+# ============================================
+
+import os
+import threading
+import time
+
+# How often (seconds) a loader re-stats its artifact files; 0 disables,
+# and then only a restart picks up new artifacts
+MODEL_RELOAD_CHECK_SECONDS = float(os.getenv("CDSS_MODEL_RELOAD_CHECK_SECONDS", "30"))
+
+
+class ArtifactWatch:
+    """
+    Size and mtime of a panel's artifact files. changed() re-stats them
+    at most every MODEL_RELOAD_CHECK_SECONDS and reports a change only
+    once it has held for a whole interval, so a file still being written
+    by a training script is not loaded half-way.
+    """
+
+    def __init__(self, paths):
+        self.paths = tuple(paths)
+        self._snapshot = None
+        self._pending = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        snapshot = []
+
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                snapshot.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                snapshot.append(None)
+
+        return tuple(snapshot)
+
+    def changed(self):
+
+        if MODEL_RELOAD_CHECK_SECONDS <= 0:
+            return False
+
+        now = time.monotonic()
+
+        # Lock-free fast path: one float comparison per call
+        if now < self._next_check:
+            return False
+
+        with self._lock:
+            if now < self._next_check:
+                return False
+
+            self._next_check = now + MODEL_RELOAD_CHECK_SECONDS
+            current = self._stat()
+
+            if self._snapshot is None:
+                # First check: the files as they were loaded
+                self._snapshot = current
+                return False
+
+            if current == self._snapshot:
+                self._pending = None
+                return False
+
+            if current != self._pending:
+                # Still changing, or first seen now: wait one more interval
+                self._pending = current
+                return False
+
+            self._snapshot, self._pending = current, None
+            return True
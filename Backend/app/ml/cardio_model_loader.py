@@ -1,26 +1,135 @@
+import logging
 import os
+import threading
+
 import joblib
 
+from app.ml.artifact_watch import ArtifactWatch
+from app.ml.compiled_trees import compile_model
+from app.ml.feature_encoder import FeatureEncoder
+from app.ml.native_artifacts import MANIFEST_FILE, open_bundle
+
+logger = logging.getLogger(__name__)
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 MODEL_DIR = os.path.join(BASE_DIR, "models")
 
 MODEL_FILE = os.path.join(MODEL_DIR, "cardio_model_v3_calibrated.pkl")
 METADATA_FILE = os.path.join(MODEL_DIR, "cardio_model_metadata_v3.pkl")
 
+# UBJ boosters + JSON sidecar written by ml_train/export_native_models.py
+NATIVE_BUNDLE_DIR = os.path.join(MODEL_DIR, "native", "cardio_model_v3")
+
+# Single-booster conversion (ml_train/collapse_calibrated_ensemble.py),
+# served instead with CDSS_MODEL_VARIANT=collapsed
+COLLAPSED_BUNDLE_DIR = os.path.join(MODEL_DIR, "native", "cardio_model_v3_collapsed")
+
 
 class CardioModelLoader:
 
     _model = None
     _metadata = None
+    _compiled_model = None
+    _bundle = None
+    _encoder = None
+
+    # Single-flight: concurrent first requests wait for one load instead of racing
+    _lock = threading.RLock()
+
+    # Bumped on every reload so caches built on the old artifact are dropped
+    generation = 0
+
+    # Retrained or re-exported artifacts are reloaded without a restart
+    _watch = ArtifactWatch([
+        MODEL_FILE,
+        METADATA_FILE,
+        os.path.join(NATIVE_BUNDLE_DIR, MANIFEST_FILE),
+        os.path.join(COLLAPSED_BUNDLE_DIR, MANIFEST_FILE)
+    ])
+
+    @classmethod
+    def _reload_if_changed(cls):
+        if cls._watch.changed():
+            logger.info("Cardiovascular model artifacts changed on disk; reloading")
+            cls.reload()
+
+    @classmethod
+    def _native_bundle(cls):
+        if cls._bundle is None:
+            with cls._lock:
+                if cls._bundle is None:
+                    cls._bundle = open_bundle(NATIVE_BUNDLE_DIR, COLLAPSED_BUNDLE_DIR, MODEL_DIR)
+        return cls._bundle
 
     @classmethod
     def load_model(cls):
+        cls._reload_if_changed()
         if cls._model is None:
-            cls._model = joblib.load(MODEL_FILE)
+            with cls._lock:
+                if cls._model is None:
+                    bundle = cls._native_bundle()
+                    if bundle is not None and bundle.has_model:
+                        cls._model = bundle.load_model()
+                    else:
+                        cls._model = joblib.load(MODEL_FILE)
         return cls._model
 
+    @classmethod
+    def load_compiled_model(cls):
+        if cls._compiled_model is None:
+            with cls._lock:
+                if cls._compiled_model is None:
+                    cls._compiled_model = compile_model(cls.load_model())
+        return cls._compiled_model
+
+    @classmethod
+    def load_explainer_model(cls):
+        """(scaler or None, tree model) that the SHAP explainer runs on."""
+        bundle = cls._native_bundle()
+        if bundle is not None and bundle.has_explainer:
+            return bundle.load_explainer_model()
+
+        calibrated_model = cls.load_model()
+
+        # Get first fitted base estimator from calibration
+        if not hasattr(calibrated_model, "calibrated_classifiers_"):
+            raise RuntimeError("Calibrated model not properly fitted.")
+
+        return None, calibrated_model.calibrated_classifiers_[0].estimator
+
     @classmethod
     def load_metadata(cls):
+        cls._reload_if_changed()
         if cls._metadata is None:
-            cls._metadata = joblib.load(METADATA_FILE)
+            with cls._lock:
+                if cls._metadata is None:
+                    bundle = cls._native_bundle()
+                    if bundle is not None:
+                        cls._metadata = bundle.metadata
+                    else:
+                        cls._metadata = joblib.load(METADATA_FILE)
         return cls._metadata
+
+    @classmethod
+    def load_feature_encoder(cls):
+        """Encodes patient dicts once per request for the predictor and explainer."""
+        if cls._encoder is None:
+            with cls._lock:
+                if cls._encoder is None:
+                    cls._encoder = FeatureEncoder(cls.load_metadata()["features"])
+        return cls._encoder
+
+    @classmethod
+    def reload(cls):
+        """Drops the loaded artifacts; the next call reads them from disk again."""
+        with cls._lock:
+            cls._model = None
+            cls._metadata = None
+            cls._compiled_model = None
+            cls._bundle = None
+            cls._encoder = None
+            cls.generation += 1
+
+    @classmethod
+    def version_tag(cls):
+        return (cls.load_metadata().get("model_version"), cls.generation)
@@ -1,43 +1,77 @@
 import numpy as np
 from app.ml.cardio_model_loader import CardioModelLoader
+from app.ml.inference_server import run_inference
+from app.ml.prediction_cache import PredictionCache
 
 
 class CardioPredictor:
 
+    _cache = PredictionCache("Cardiovascular.prediction")
+
     @staticmethod
     def predict(patient_features: dict):
+        return CardioPredictor.predict_batch([patient_features])[0]
+
+    @staticmethod
+    def predict_batch(records: list):
+        """
+        Scores many patients with a single predict_proba call.
+        Returns one result dict per record, in input order.
+        Rows seen before under the same model version are served from cache.
+        """
+
+        # Patient dicts, or features already encoded for this request
+        features = CardioModelLoader.load_feature_encoder().ensure(records)
+
+        return CardioPredictor._cache.fetch(
+            CardioModelLoader.version_tag(),
+            features.keys,
+            lambda missing: CardioPredictor._score(features.values[missing])
+        )
+
+    @staticmethod
+    def _score(rows):
 
-        model = CardioModelLoader.load_model()
         metadata = CardioModelLoader.load_metadata()
 
-        feature_order = metadata["features"]
         threshold = metadata["threshold"]
 
-        # Safe feature extraction (no crash if missing)
-        feature_vector = [
-            patient_features.get(f, 0)
-            for f in feature_order
+        # Out-of-process micro-batched scoring when the inference server is enabled
+        probabilities = run_inference("Cardiovascular", rows, CardioPredictor._predict_proba)
+
+        return [
+            {
+                "probability": round(float(probability), 4),
+                "threshold": round(threshold, 4),
+                "above_threshold": float(probability) >= threshold,
+                "model_version": metadata["model_version"]
+            }
+            for probability in probabilities
         ]
 
-        feature_array = np.array([feature_vector])
+    @staticmethod
+    def _predict_proba(rows):
+
+        model = CardioModelLoader.load_model()
+        engine = CardioModelLoader.load_compiled_model()
+
+        feature_array = np.asarray(rows, dtype=np.float64)
 
         try:
-            probability = float(model.predict_proba(feature_array)[0][1])
+            probabilities = engine.predict_proba(feature_array)[:, 1]
         except Exception as e:
             # Fallback for calibrated model issues
             try:
-                if hasattr(model, 'base_estimator'):
-                    probability = float(model.base_estimator.predict_proba(feature_array)[0][1])
+                if engine is not model:
+                    # Compiled engine rejected the input; retry via sklearn
+                    probabilities = model.predict_proba(feature_array)[:, 1]
+                elif hasattr(model, 'base_estimator'):
+                    probabilities = model.base_estimator.predict_proba(feature_array)[:, 1]
                 elif hasattr(model, 'estimator'):
-                    probability = float(model.estimator.predict_proba(feature_array)[0][1])
+                    probabilities = model.estimator.predict_proba(feature_array)[:, 1]
                 else:
                     raise Exception(f"Model prediction failed: {str(e)}")
             except:
                 raise Exception(f"Cardio model error: {str(e)}. Model may need retraining.")
 
-        return {
-            "probability": round(probability, 4),
-            "threshold": round(threshold, 4),
-            "above_threshold": probability >= threshold,
-            "model_version": metadata["model_version"]
-        }
+        return probabilities
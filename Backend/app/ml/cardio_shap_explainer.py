@@ -1,42 +1,76 @@
-import shap
-import numpy as np
+import threading
+
+from app.ml.contribution_engine import build_explainer
 from app.ml.cardio_model_loader import CardioModelLoader
+from app.ml.explanation_batcher import ExplanationBatcher
+from app.ml.prediction_cache import PredictionCache
 
 
 class CardioSHAPExplainer:
 
     _explainer = None
+    _generation = None
+    _lock = threading.Lock()
+    _cache = PredictionCache("Cardiovascular.explanation")
 
     @classmethod
     def _initialize(cls):
-        if cls._explainer is None:
-            calibrated_model = CardioModelLoader.load_model()
+        # Rebuild when the loader has reloaded the calibrated model
+        if cls._explainer is None or cls._generation != CardioModelLoader.generation:
+            with cls._lock:
+                # Single-flight: one thread builds the TreeExplainer, the rest wait
+                if cls._explainer is None or cls._generation != CardioModelLoader.generation:
+                    # First calibrated member (native booster or pickled XGBClassifier)
+                    _, base_model = CardioModelLoader.load_explainer_model()
+
+                    cls._explainer = build_explainer("Cardiovascular", base_model)
+                    cls._generation = CardioModelLoader.generation
+
+    @classmethod
+    def explain(cls, patient_features, top_n: int = 5):
+
+        # A patient dict, or the features the predictor already encoded
+        features = CardioModelLoader.load_feature_encoder().ensure([patient_features])
 
-            # Get first fitted base estimator from calibration
-            if hasattr(calibrated_model, "calibrated_classifiers_"):
-                base_model = calibrated_model.calibrated_classifiers_[0].estimator
-            else:
-                raise RuntimeError("Calibrated model not properly fitted.")
+        cached = cls._cache.peek(CardioModelLoader.version_tag(), (top_n, features.keys[0]))
+        if cached is not None:
+            return cached
 
-            cls._explainer = shap.TreeExplainer(base_model)
+        # Concurrent requests are coalesced into one matrix SHAP call
+        return cls._batcher.explain(features, top_n)
 
     @classmethod
-    def explain(cls, patient_features: dict, top_n: int = 5):
+    def explain_batch(cls, records, top_n: int = 5):
 
         cls._initialize()
         metadata = CardioModelLoader.load_metadata()
 
         feature_order = metadata["features"]
 
-        # Safe feature extraction
-        feature_vector = np.array([
-            [patient_features.get(f, 0) for f in feature_order]
-        ])
+        # Safe feature extraction (shared with the predictor when pre-encoded)
+        features = CardioModelLoader.load_feature_encoder().ensure(records)
+
+        return cls._cache.fetch(
+            CardioModelLoader.version_tag(),
+            [(top_n, key) for key in features.keys],
+            lambda missing: cls._explain_rows(feature_order, features.values[missing], top_n)
+        )
 
-        shap_values = cls._explainer.shap_values(feature_vector)
+    @classmethod
+    def _explain_rows(cls, feature_order, rows, top_n):
+
+        shap_values = cls._explainer.shap_values(rows)
+
+        return [
+            cls._format(feature_order, row, top_n)
+            for row in shap_values
+        ]
+
+    @staticmethod
+    def _format(feature_order, row, top_n):
 
         contributions = {
-            feature_order[i]: float(shap_values[0][i])
+            feature_order[i]: float(row[i])
             for i in range(len(feature_order))
         }
 
@@ -56,3 +90,6 @@ class CardioSHAPExplainer:
                 for f, val in sorted_features
             ]
         }
+
+
+CardioSHAPExplainer._batcher = ExplanationBatcher("Cardiovascular", CardioSHAPExplainer.explain_batch)
@@ -0,0 +1,338 @@
+# ============================================
+# Compiled Tree Inference Engine (Pure NumPy)
+# Flattens XGBoost boosters into node arrays
+# and scores rows with a vectorized traversal
+# ============================================
+
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Set CDSS_COMPILED_TREES=0 to serve predictions through the pickled sklearn models
+USE_COMPILED_TREES = os.getenv("CDSS_COMPILED_TREES", "1") != "0"
+
+# The NumPy traversal wins on small requests, where the sklearn/DMatrix
+# overhead dominates. XGBoost's native predictor wins on large matrices.
+COMPILED_MAX_ROWS = int(os.getenv("CDSS_COMPILED_MAX_ROWS", "32"))
+
+
+class TreeCompilationError(Exception):
+    """Raised when a model cannot be expressed as flat node arrays."""
+    pass
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class CompiledForest:
+    """
+    All trees of one binary:logistic booster packed into flat arrays.
+    XGBoost allocates siblings next to each other (right == left + 1),
+    so only the left child is stored. Leaves point to themselves and read
+    a padding column of -inf against an +inf threshold, so every row can
+    be advanced for `max_depth` levels without branching on leaf status.
+    """
+
+    def __init__(self, feature, threshold, left, default_left, value, roots, max_depth, base_margin, n_features,
+                 native_model=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_margin = base_margin
+        self.n_features = n_features
+        self.native_model = native_model
+
+    @classmethod
+    def from_booster(cls, booster):
+
+        model = json.loads(booster.save_raw(raw_format="json"))
+        learner = model["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective != "binary:logistic":
+            raise TreeCompilationError(f"Unsupported objective: {objective}")
+
+        trees = learner["gradient_booster"]["model"]["trees"]
+        n_features = int(learner["learner_model_param"]["num_feature"])
+
+        feature, threshold, left, default_left, value, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise TreeCompilationError("Categorical splits are not supported")
+
+            tree_left = np.asarray(tree["left_children"], dtype=np.int64)
+            tree_right = np.asarray(tree["right_children"], dtype=np.int64)
+            is_leaf = tree_left == -1
+            node_ids = np.arange(len(tree_left))
+
+            if np.any(tree_right[~is_leaf] != tree_left[~is_leaf] + 1):
+                raise TreeCompilationError("Non-adjacent sibling nodes are not supported")
+
+            # Leaves always take the left branch back onto themselves
+            left.append(np.where(is_leaf, node_ids, tree_left) + offset)
+
+            feature.append(np.where(is_leaf, n_features, tree["split_indices"]))
+            threshold.append(np.where(is_leaf, np.inf, tree["split_conditions"]))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool) | is_leaf)
+            value.append(np.where(is_leaf, tree["split_conditions"], 0.0))
+            roots.append(offset)
+
+            max_depth = max(max_depth, cls._depth(tree_left, tree_right))
+            offset += len(tree_left)
+
+        base_score = float(learner["learner_model_param"]["base_score"])
+
+        return cls(
+            feature=np.concatenate(feature).astype(np.intp),
+            threshold=np.concatenate(threshold).astype(np.float32),
+            left=np.concatenate(left).astype(np.intp),
+            default_left=np.concatenate(default_left),
+            value=np.concatenate(value).astype(np.float32),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            base_margin=float(np.log(base_score / (1.0 - base_score))),
+            n_features=n_features
+        )
+
+    # Node arrays written by save() and memory-mapped back by load()
+    NODE_ARRAYS = ("feature", "threshold", "left", "default_left", "value", "roots")
+
+    def save(self, directory):
+        """
+        Writes each node array as a plain .npy file and returns the
+        scalar header. Arrays are stored as int64/float32/bool so the
+        files can be memory-mapped without a dtype conversion.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+
+        for name in self.NODE_ARRAYS:
+            array = getattr(self, name)
+            if array.dtype.kind == "i":
+                array = array.astype(np.int64)
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+
+        return {
+            "max_depth": self.max_depth,
+            "base_margin": self.base_margin,
+            "n_features": self.n_features
+        }
+
+    @classmethod
+    def load(cls, directory, header, mmap=True):
+        """
+        Reads node arrays written by save(). With `mmap` the pages are
+        shared with the OS page cache (and with forked workers) instead
+        of being copied onto the heap.
+        """
+
+        mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in cls.NODE_ARRAYS
+        }
+
+        if mmap:
+            # Plain ndarray views over the same pages: every slice of an
+            # np.memmap is another memmap, built through Python hooks
+            arrays = {name: array.view(np.ndarray) for name, array in arrays.items()}
+
+        if np.dtype(np.intp) != np.dtype(np.int64):
+            # 32-bit platform: take() needs native index arrays
+            for name in ("feature", "left", "roots"):
+                arrays[name] = arrays[name].astype(np.intp)
+
+        return cls(
+            max_depth=int(header["max_depth"]),
+            base_margin=float(header["base_margin"]),
+            n_features=int(header["n_features"]),
+            **arrays
+        )
+
+    @staticmethod
+    def _depth(left, right):
+        depth = 0
+        level = [0]
+        while level:
+            level = [child for node in level for child in (left[node], right[node]) if child != -1]
+            if level:
+                depth += 1
+        return depth
+
+    def predict_margin(self, X):
+        """
+        Level-by-level traversal: one gather per level for all
+        (row, tree) pairs instead of one Python walk per tree.
+        """
+
+        X = np.asarray(X)
+        n_rows = X.shape[0]
+
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        # XGBoost compares in float32; match it for exact split decisions.
+        # The trailing -inf column is what leaf nodes read.
+        padded = np.empty((n_rows, self.n_features + 1), dtype=np.float32)
+        padded[:, :-1] = X
+        padded[:, -1] = -np.inf
+
+        flat_X = padded.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * (self.n_features + 1))[:, None]
+        has_missing = bool(np.isnan(padded[:, :-1]).any())
+
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_offsets + self.feature.take(nodes))
+            go_right = x >= self.threshold.take(nodes)
+
+            if has_missing:
+                go_right |= np.isnan(x) & ~self.default_left.take(nodes)
+
+            nodes = self.left.take(nodes) + go_right
+
+        return self.value.take(nodes).sum(axis=1, dtype=np.float32) + np.float32(self.base_margin)
+
+    def predict_proba(self, X):
+
+        if self.native_model is not None and len(X) > COMPILED_MAX_ROWS:
+            return self.native_model.predict_proba(X)
+
+        positive = _sigmoid(self.predict_margin(X).astype(np.float32))
+        return np.column_stack([1.0 - positive, positive])
+
+
+class CompiledScaler:
+    """StandardScaler transform without the sklearn validation layers."""
+
+    def __init__(self, mean, scale):
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        return cls(
+            scaler.mean_ if scaler.with_mean else None,
+            scaler.scale_ if scaler.with_std else None
+        )
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.mean is not None:
+            X = X - self.mean
+        if self.scale is not None:
+            X = X / self.scale
+        return X
+
+
+class CompiledCalibratedModel:
+    """
+    Drop-in replacement for a sigmoid CalibratedClassifierCV over
+    XGBoost (optionally behind a StandardScaler pipeline).
+    Exposes predict_proba with the same (n, 2) output shape.
+    """
+
+    def __init__(self, members, native_model=None):
+        # members: list of (scaler or None, CompiledForest, a, b)
+        self.members = members
+        self.native_model = native_model
+
+    @classmethod
+    def from_sklearn(cls, calibrated_model):
+
+        if not hasattr(calibrated_model, "calibrated_classifiers_"):
+            raise TreeCompilationError("Calibrated model not properly fitted.")
+
+        if calibrated_model.method != "sigmoid":
+            raise TreeCompilationError(f"Unsupported calibration method: {calibrated_model.method}")
+
+        members = []
+
+        for calibrated in calibrated_model.calibrated_classifiers_:
+            scaler, classifier = _unwrap_estimator(calibrated.estimator)
+            calibrator = calibrated.calibrators[0]
+
+            members.append((
+                scaler,
+                CompiledForest.from_booster(classifier.get_booster()),
+                float(calibrator.a_),
+                float(calibrator.b_)
+            ))
+
+        return cls(members, native_model=calibrated_model)
+
+    def predict_proba(self, X):
+
+        X = np.asarray(X, dtype=np.float64)
+
+        if self.native_model is not None and X.shape[0] > COMPILED_MAX_ROWS:
+            return self.native_model.predict_proba(X)
+        positive = np.zeros(X.shape[0], dtype=np.float64)
+
+        for scaler, forest, a, b in self.members:
+            features = scaler.transform(X) if scaler is not None else X
+            score = forest.predict_proba(features)[:, 1]
+            positive += _sigmoid(-(a * score + b))
+
+        positive /= len(self.members)
+
+        return np.column_stack([1.0 - positive, positive])
+
+
+def _unwrap_estimator(estimator):
+    """Splits an (optional) StandardScaler pipeline into scaler + XGBClassifier."""
+
+    if hasattr(estimator, "named_steps"):
+        steps = list(estimator.named_steps.values())
+
+        if len(steps) == 1:
+            return None, steps[0]
+        if len(steps) == 2 and hasattr(steps[0], "mean_"):
+            return CompiledScaler.from_sklearn(steps[0]), steps[1]
+
+        raise TreeCompilationError("Unsupported pipeline layout")
+
+    return None, estimator
+
+
+def compile_model(model):
+    """
+    Returns a compiled equivalent of `model`, or `model` itself when
+    compilation is disabled or the artifact is not supported.
+    """
+
+    if not USE_COMPILED_TREES:
+        return model
+
+    try:
+        if hasattr(model, "to_compiled"):
+            # Native artifact bundles carry their own pre-compiled node arrays
+            return model.to_compiled()
+
+        if hasattr(model, "calibrated_classifiers_"):
+            return CompiledCalibratedModel.from_sklearn(model)
+
+        scaler, classifier = _unwrap_estimator(model)
+        if scaler is not None:
+            raise TreeCompilationError("Uncalibrated pipelines are not supported")
+
+        forest = CompiledForest.from_booster(classifier.get_booster())
+        forest.native_model = classifier
+        return forest
+
+    except Exception as e:
+        logger.warning(f"Tree compilation unavailable, using sklearn model: {str(e)}")
+        return model
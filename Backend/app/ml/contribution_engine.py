@@ -0,0 +1,68 @@
+# ============================================
+# Booster-Native SHAP Contributions
+# Exact TreeSHAP values from XGBoost's own
+# pred_contribs, so serving never imports `shap`
+# ============================================
+#
+# Backend per panel: CDSS_EXPLAINER_BACKEND_<PANEL> (e.g. _KIDNEY,
+# _CARDIOVASCULAR), else CDSS_EXPLAINER_BACKEND, else native.
+#   native: BoosterContributions below (no shap import)
+#   shap:   shap.TreeExplainer, when the shap package is installed
+
+import logging
+import os
+
+import numpy as np
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+EXPLAINER_BACKEND = os.getenv("CDSS_EXPLAINER_BACKEND", "native")
+
+EXPLAINER_BACKENDS = ("native", "shap")
+
+
+def explainer_backend(panel):
+    return os.getenv(f"CDSS_EXPLAINER_BACKEND_{panel.upper()}", EXPLAINER_BACKEND)
+
+
+def build_explainer(panel, model):
+    """
+    Explainer for a fitted XGBoost model (XGBClassifier or Booster)
+    exposing shap_values(X) -> (n_rows, n_features) log-odds contributions.
+    """
+
+    backend = explainer_backend(panel)
+
+    if backend not in EXPLAINER_BACKENDS:
+        raise ValueError(f"Unknown explainer backend for {panel}: {backend}")
+
+    if backend == "shap":
+        try:
+            import shap
+        except ImportError:
+            logger.warning(f"shap is not installed; {panel} uses the native contribution engine")
+        else:
+            return shap.TreeExplainer(model)
+
+    return BoosterContributions(model)
+
+
+class BoosterContributions:
+    """
+    Drop-in for shap.TreeExplainer over one XGBoost model. Same exact
+    TreeSHAP algorithm (shap itself hands XGBoost models to it), minus
+    the shap import and its per-call wrapping.
+    """
+
+    def __init__(self, model):
+        self.booster = model.get_booster() if hasattr(model, "get_booster") else model
+
+    def shap_values(self, X):
+
+        matrix = xgb.DMatrix(np.asarray(X, dtype=np.float64))
+
+        # Last column is the bias term (expected value), not a feature
+        contributions = self.booster.predict(matrix, pred_contribs=True, validate_features=False)
+
+        return contributions[:, :-1]
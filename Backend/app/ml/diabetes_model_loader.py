@@ -3,9 +3,18 @@
 # Responsible ONLY for loading model artifacts
 # ============================================
 
+import logging
 import os
+import threading
+
 import joblib
 
+from app.ml.artifact_watch import ArtifactWatch
+from app.ml.compiled_trees import compile_model
+from app.ml.feature_encoder import FeatureEncoder
+from app.ml.native_artifacts import MANIFEST_FILE, open_bundle
+
+logger = logging.getLogger(__name__)
 
 # Base directory (Backend root)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -14,6 +23,14 @@ MODEL_DIR = os.path.join(BASE_DIR, "models")
 
 MODEL_FILE = os.path.join(MODEL_DIR, "diabetes_model_v2_calibrated.pkl")
 METADATA_FILE = os.path.join(MODEL_DIR, "diabetes_model_metadata_v2.pkl")
+BASE_MODEL_FILE = os.path.join(MODEL_DIR, "diabetes_model_base_xgb_v2.pkl")
+
+# UBJ boosters + JSON sidecar written by ml_train/export_native_models.py
+NATIVE_BUNDLE_DIR = os.path.join(MODEL_DIR, "native", "diabetes_model_v2")
+
+# Single-booster conversion (ml_train/collapse_calibrated_ensemble.py),
+# served instead with CDSS_MODEL_VARIANT=collapsed
+COLLAPSED_BUNDLE_DIR = os.path.join(MODEL_DIR, "native", "diabetes_model_v2_collapsed")
 
 
 class ModelLoaderError(Exception):
@@ -29,23 +46,119 @@ class DiabetesModelLoader:
 
     _model = None
     _metadata = None
+    _compiled_model = None
+    _bundle = None
+    _encoder = None
+
+    # Single-flight: concurrent first requests wait for one load instead of racing
+    _lock = threading.RLock()
+
+    # Bumped on every reload so caches built on the old artifact are dropped
+    generation = 0
+
+    # Retrained or re-exported artifacts are reloaded without a restart
+    _watch = ArtifactWatch([
+        MODEL_FILE,
+        METADATA_FILE,
+        BASE_MODEL_FILE,
+        os.path.join(NATIVE_BUNDLE_DIR, MANIFEST_FILE),
+        os.path.join(COLLAPSED_BUNDLE_DIR, MANIFEST_FILE)
+    ])
+
+    @classmethod
+    def _reload_if_changed(cls):
+        if cls._watch.changed():
+            logger.info("Diabetes model artifacts changed on disk; reloading")
+            cls.reload()
+
+    @classmethod
+    def _native_bundle(cls):
+        if cls._bundle is None:
+            with cls._lock:
+                if cls._bundle is None:
+                    cls._bundle = open_bundle(NATIVE_BUNDLE_DIR, COLLAPSED_BUNDLE_DIR, MODEL_DIR)
+        return cls._bundle
 
     @classmethod
     def load_model(cls):
+        cls._reload_if_changed()
         if cls._model is None:
-            if not os.path.exists(MODEL_FILE):
-                raise ModelLoaderError(f"Model file not found: {MODEL_FILE}")
-
-            cls._model = joblib.load(MODEL_FILE)
+            with cls._lock:
+                if cls._model is None:
+                    bundle = cls._native_bundle()
+                    if bundle is not None and bundle.has_model:
+                        cls._model = bundle.load_model()
+                    elif not os.path.exists(MODEL_FILE):
+                        raise ModelLoaderError(f"Model file not found: {MODEL_FILE}")
+                    else:
+                        cls._model = joblib.load(MODEL_FILE)
 
         return cls._model
 
+    @classmethod
+    def load_compiled_model(cls):
+        """
+        Pure-NumPy compiled copy of the calibrated model.
+        Falls back to the sklearn model if it cannot be compiled.
+        """
+        if cls._compiled_model is None:
+            with cls._lock:
+                if cls._compiled_model is None:
+                    cls._compiled_model = compile_model(cls.load_model())
+
+        return cls._compiled_model
+
+    @classmethod
+    def load_explainer_model(cls):
+        """
+        (None, base XGBoost model) for the SHAP explainer.
+        Independent of the calibrated model, which may be missing.
+        """
+        bundle = cls._native_bundle()
+        if bundle is not None and bundle.has_explainer:
+            return bundle.load_explainer_model()
+
+        if not os.path.exists(BASE_MODEL_FILE):
+            raise ModelLoaderError(f"Base model file not found: {BASE_MODEL_FILE}")
+
+        return None, joblib.load(BASE_MODEL_FILE)
+
     @classmethod
     def load_metadata(cls):
+        cls._reload_if_changed()
         if cls._metadata is None:
-            if not os.path.exists(METADATA_FILE):
-                raise ModelLoaderError(f"Metadata file not found: {METADATA_FILE}")
-
-            cls._metadata = joblib.load(METADATA_FILE)
+            with cls._lock:
+                if cls._metadata is None:
+                    bundle = cls._native_bundle()
+                    if bundle is not None:
+                        cls._metadata = bundle.metadata
+                    elif not os.path.exists(METADATA_FILE):
+                        raise ModelLoaderError(f"Metadata file not found: {METADATA_FILE}")
+                    else:
+                        cls._metadata = joblib.load(METADATA_FILE)
 
         return cls._metadata
+
+    @classmethod
+    def load_feature_encoder(cls):
+        """Encodes patient dicts once per request for the predictor and explainer."""
+        if cls._encoder is None:
+            with cls._lock:
+                if cls._encoder is None:
+                    cls._encoder = FeatureEncoder(cls.load_metadata()["features"])
+        return cls._encoder
+
+    @classmethod
+    def reload(cls):
+        """Drops the loaded artifacts; the next call reads them from disk again."""
+        with cls._lock:
+            cls._model = None
+            cls._metadata = None
+            cls._compiled_model = None
+            cls._bundle = None
+            cls._encoder = None
+            cls.generation += 1
+
+    @classmethod
+    def version_tag(cls):
+        return (cls.load_metadata().get("model_version"), cls.generation)
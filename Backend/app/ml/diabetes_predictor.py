@@ -5,6 +5,8 @@
 
 import numpy as np
 from app.ml.diabetes_model_loader import DiabetesModelLoader
+from app.ml.inference_server import run_inference
+from app.ml.prediction_cache import PredictionCache
 
 
 class DiabetesPredictor:
@@ -12,6 +14,8 @@ class DiabetesPredictor:
     Handles ML inference using calibrated diabetes model.
     """
 
+    _cache = PredictionCache("Diabetes.prediction")
+
     @staticmethod
     def predict(patient_features: dict) -> dict:
         """
@@ -19,45 +23,82 @@ class DiabetesPredictor:
         returns calibrated probability + ML risk flag.
         """
 
-        # Load model + metadata
-        model = DiabetesModelLoader.load_model()
+        return DiabetesPredictor.predict_batch([patient_features])[0]
+
+    @staticmethod
+    def predict_batch(records: list) -> list:
+        """
+        Takes a list of patient feature dictionaries,
+        stacks them into one matrix and scores them in a single call.
+        Returns one result per record, in input order.
+        """
+
+        # Ensure correct feature order (records may already be encoded)
+        features = DiabetesModelLoader.load_feature_encoder().ensure(records)
+
+        # Repeat feature vectors under the same model version are served from cache
+        return DiabetesPredictor._cache.fetch(
+            DiabetesModelLoader.version_tag(),
+            features.keys,
+            lambda missing: DiabetesPredictor._score(features.values[missing])
+        )
+
+    @staticmethod
+    def _score(feature_matrix) -> list:
+
+        # Load metadata
         metadata = DiabetesModelLoader.load_metadata()
 
-        expected_features = metadata["features"]
         threshold = metadata["threshold"]
 
-        # Ensure correct feature order
-        feature_vector = []
+        # Out-of-process micro-batched scoring when the inference server is enabled
+        probabilities = run_inference("Diabetes", feature_matrix, DiabetesPredictor._predict_proba)
+
+        results = []
+
+        for probability in probabilities:
+            probability = float(probability)
+
+            # Threshold classification
+            if probability >= threshold:
+                risk_flag = "Elevated ML Risk"
+            else:
+                risk_flag = "Low/Moderate ML Risk"
+
+            results.append({
+                "ml_probability": round(probability, 4),
+                "ml_threshold": threshold,
+                "ml_risk_flag": risk_flag,
+                "model_version": metadata.get("model_version", "Unknown")
+            })
 
-        for feature in expected_features:
-            feature_vector.append(patient_features.get(feature, 0))
+        return results
+
+    @staticmethod
+    def _predict_proba(feature_matrix):
+        """Positive-class probabilities for already-ordered feature rows."""
+
+        model = DiabetesModelLoader.load_model()
+        engine = DiabetesModelLoader.load_compiled_model()
 
-        feature_array = np.array([feature_vector])
+        feature_array = np.asarray(feature_matrix, dtype=np.float64)
 
         # Predict probability with error handling
         try:
-            probability = float(model.predict_proba(feature_array)[0][1])
+            probabilities = engine.predict_proba(feature_array)[:, 1]
         except Exception as e:
             # Fallback: try to get base estimator if calibrated model fails
             try:
-                if hasattr(model, 'base_estimator'):
-                    probability = float(model.base_estimator.predict_proba(feature_array)[0][1])
+                if engine is not model:
+                    # Compiled engine rejected the input; retry via sklearn
+                    probabilities = model.predict_proba(feature_array)[:, 1]
+                elif hasattr(model, 'base_estimator'):
+                    probabilities = model.base_estimator.predict_proba(feature_array)[:, 1]
                 elif hasattr(model, 'estimator'):
-                    probability = float(model.estimator.predict_proba(feature_array)[0][1])
+                    probabilities = model.estimator.predict_proba(feature_array)[:, 1]
                 else:
                     raise Exception(f"Model prediction failed: {str(e)}")
             except:
                 raise Exception(f"XGBClassifier calibration error: {str(e)}. Model may need retraining with current sklearn version.")
 
-        # Threshold classification
-        if probability >= threshold:
-            risk_flag = "Elevated ML Risk"
-        else:
-            risk_flag = "Low/Moderate ML Risk"
-
-        return {
-            "ml_probability": round(probability, 4),
-            "ml_threshold": threshold,
-            "ml_risk_flag": risk_flag,
-            "model_version": metadata.get("model_version", "Unknown")
-        }
+        return probabilities
@@ -2,17 +2,12 @@
 # SHAP Explainability Layer
 # ============================================
 
-import shap
-import numpy as np
-import joblib
-import os
+import threading
 
-from app.ml.diabetes_model_loader import BASE_DIR
-
-
-MODEL_DIR = os.path.join(BASE_DIR, "models")
-BASE_MODEL_FILE = os.path.join(MODEL_DIR, "diabetes_model_base_xgb_v2.pkl")
-METADATA_FILE = os.path.join(MODEL_DIR, "diabetes_model_metadata_v2.pkl")
+from app.ml.contribution_engine import build_explainer
+from app.ml.diabetes_model_loader import DiabetesModelLoader
+from app.ml.explanation_batcher import ExplanationBatcher
+from app.ml.prediction_cache import PredictionCache
 
 
 class DiabetesSHAPExplainer:
@@ -20,29 +15,68 @@ class DiabetesSHAPExplainer:
     _explainer = None
     _model = None
     _metadata = None
+    _generation = None
+    _lock = threading.Lock()
+    _cache = PredictionCache("Diabetes.explanation")
 
     @classmethod
     def _initialize(cls):
-        if cls._explainer is None:
-            cls._model = joblib.load(BASE_MODEL_FILE)
-            cls._metadata = joblib.load(METADATA_FILE)
-            cls._explainer = shap.TreeExplainer(cls._model)
+        # Reload alongside the calibrated model so explanations never lag predictions
+        if cls._explainer is None or cls._generation != DiabetesModelLoader.generation:
+            with cls._lock:
+                # Single-flight: one thread builds the TreeExplainer, the rest wait
+                if cls._explainer is None or cls._generation != DiabetesModelLoader.generation:
+                    _, cls._model = DiabetesModelLoader.load_explainer_model()
+                    cls._metadata = DiabetesModelLoader.load_metadata()
+                    cls._explainer = build_explainer("Diabetes", cls._model)
+                    cls._generation = DiabetesModelLoader.generation
+
+    @classmethod
+    def explain(cls, patient_features, top_n: int = 5):
+        cls._initialize()
+
+        features = DiabetesModelLoader.load_feature_encoder().ensure([patient_features])
+
+        cached = cls._cache.peek(
+            (cls._metadata.get("model_version"), cls._generation),
+            (top_n, features.keys[0])
+        )
+        if cached is not None:
+            return cached
+
+        # Concurrent requests are coalesced into one matrix SHAP call
+        return cls._batcher.explain(features, top_n)
 
     @classmethod
-    def explain(cls, patient_features: dict, top_n: int = 5):
+    def explain_batch(cls, records, top_n: int = 5):
         cls._initialize()
 
         feature_order = cls._metadata["features"]
 
-        feature_vector = [patient_features.get(f, 0) for f in feature_order]
-        feature_array = np.array([feature_vector])
+        # Same encoded matrix the predictor scored, when the caller passes it
+        features = DiabetesModelLoader.load_feature_encoder().ensure(records)
 
+        return cls._cache.fetch(
+            (cls._metadata.get("model_version"), cls._generation),
+            [(top_n, key) for key in features.keys],
+            lambda missing: cls._explain_rows(feature_order, features.values[missing], top_n)
+        )
+
+    @classmethod
+    def _explain_rows(cls, feature_order, feature_array, top_n):
+
+        # One SHAP pass for the whole matrix
         shap_values = cls._explainer.shap_values(feature_array)
 
+        return [cls._format(feature_order, row, top_n) for row in shap_values]
+
+    @staticmethod
+    def _format(feature_order, row, top_n):
+
         contributions = {}
 
         for i, feature in enumerate(feature_order):
-            contributions[feature] = float(shap_values[0][i])
+            contributions[feature] = float(row[i])
 
         # Sort by absolute impact
         sorted_features = sorted(
@@ -62,3 +96,6 @@ class DiabetesSHAPExplainer:
                 for f, val in top_features
             ]
         }
+
+
+DiabetesSHAPExplainer._batcher = ExplanationBatcher("Diabetes", DiabetesSHAPExplainer.explain_batch)
@@ -0,0 +1,188 @@
+# ============================================
+# Cross-Request SHAP Batching
+# Coalesces concurrent single-row explain calls
+# for one panel into a single matrix call
+# ============================================
+
+import os
+import queue
+import threading
+import time
+
+SHAP_BATCHING_ENABLED = os.getenv("CDSS_SHAP_BATCHING", "1") != "0"
+SHAP_BATCH_MAX_SIZE = int(os.getenv("CDSS_SHAP_BATCH_MAX_SIZE", "32"))
+SHAP_BATCH_WAIT_MS = float(os.getenv("CDSS_SHAP_BATCH_WAIT_MS", "3"))
+
+# Longest a caller waits for the batcher thread (on top of the batch wait)
+# before explaining its own row and starting a new thread
+SHAP_BATCH_TIMEOUT_S = float(os.getenv("CDSS_SHAP_BATCH_TIMEOUT_S", "10"))
+
+# panel name -> ExplanationBatcher, used by the metrics endpoint
+BATCHERS = {}
+
+
+class _PendingExplanation:
+
+    def __init__(self, record, top_n):
+        self.record = record
+        self.top_n = top_n
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchMetrics:
+    """Batch size and queue wait statistics for one panel."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.timeouts = 0
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_batch(self, wait_times_ms):
+        with self._lock:
+            self.batches += 1
+            self.requests += len(wait_times_ms)
+            self.max_batch_size = max(self.max_batch_size, len(wait_times_ms))
+            self.total_wait_ms += sum(wait_times_ms)
+            self.max_wait_ms = max(self.max_wait_ms, max(wait_times_ms))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "avg_batch_size": round(self.requests / self.batches, 3) if self.batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "avg_wait_ms": round(self.total_wait_ms / self.requests, 3) if self.requests else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "timeouts": self.timeouts
+            }
+
+
+class ExplanationBatcher:
+    """
+    Queues explain calls for one panel. A worker thread flushes the queue
+    as one explain_batch call once `max_batch_size` requests are waiting or
+    the oldest request has waited `max_wait_ms`, then fans results back out.
+    """
+
+    def __init__(self, panel, explain_batch, max_batch_size=SHAP_BATCH_MAX_SIZE, max_wait_ms=SHAP_BATCH_WAIT_MS):
+        self.panel = panel
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.metrics = BatchMetrics()
+
+        self._explain_batch = explain_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+
+        BATCHERS[panel] = self
+
+    def explain(self, record, top_n):
+
+        if not SHAP_BATCHING_ENABLED:
+            return self._explain_batch([record], top_n)[0]
+
+        self._ensure_worker()
+
+        item = _PendingExplanation(record, top_n)
+        pending = self._queue
+        pending.put(item)
+
+        if not item.done.wait(SHAP_BATCH_TIMEOUT_S + self.max_wait):
+            # Batcher thread died or is stuck: replace it, answer this caller directly
+            self.metrics.record_timeout()
+            with self._lock:
+                if self._queue is pending:
+                    self._worker_pid = None
+            return self._explain_batch([record], top_n)[0]
+
+        if item.error is not None:
+            raise item.error
+
+        return item.result
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(); a forked worker process starts its own
+        if self._worker_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(
+                    target=self._run,
+                    args=(self._queue,),
+                    name=f"shap-batcher-{self.panel}",
+                    daemon=True
+                ).start()
+                self._worker_pid = os.getpid()
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = batch[0].enqueued_at + self.max_wait
+
+            # Past the deadline, still sweep up whatever is already queued
+            # (requests that arrived while the previous batch was running)
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        batch.append(pending.get(timeout=remaining))
+                    else:
+                        batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+
+        started = time.perf_counter()
+        self.metrics.record_batch([(started - item.enqueued_at) * 1000 for item in batch])
+
+        groups = {}
+        for item in batch:
+            groups.setdefault(item.top_n, []).append(item)
+
+        for top_n, items in groups.items():
+            try:
+                results = self._explain_batch([item.record for item in items], top_n)
+                for item, result in zip(items, results):
+                    item.result = result
+
+            except Exception:
+                # Never let one caller's bad record fail the other requests
+                for item in items:
+                    try:
+                        item.result = self._explain_batch([item.record], top_n)[0]
+                    except Exception as e:
+                        item.error = e
+
+            finally:
+                for item in items:
+                    item.done.set()
+
+
+def batching_metrics():
+    return {
+        panel: {
+            "enabled": SHAP_BATCHING_ENABLED,
+            "max_batch_size": batcher.max_batch_size,
+            "max_wait_ms": batcher.max_wait * 1000,
+            "observed": batcher.metrics.snapshot()
+        }
+        for panel, batcher in BATCHERS.items()
+    }
@@ -0,0 +1,119 @@
+# ============================================
+# Shared Feature Encoding
+# One ordered float matrix per request, built
+# once from the panel metadata and consumed by
+# both the predictor and the SHAP explainer
+# ============================================
+
+import numpy as np
+
+from app.ml.prediction_cache import feature_key
+
+
+class EncodedFeatures:
+    """
+    C-contiguous float64 rows in model feature order, plus the
+    cache keys and preprocessing results derived from them (each
+    computed at most once, whichever consumer asks first).
+    """
+
+    __slots__ = ("values", "_keys", "_transformed")
+
+    def __init__(self, values):
+        self.values = values
+        self._keys = None
+        self._transformed = {}
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def __iter__(self):
+        """Single-row encodings, for retrying a failed batch row by row."""
+        for i in range(len(self)):
+            row = EncodedFeatures(self.values[i:i + 1])
+            if self._keys is not None:
+                row._keys = [self._keys[i]]
+            yield row
+
+    @property
+    def keys(self):
+        """Prediction-cache keys, one per row."""
+        if self._keys is None:
+            self._keys = [feature_key(row) for row in self.values.tolist()]
+        return self._keys
+
+    def transformed(self, scaler):
+        """scaler.transform(values), reused by every consumer of these rows."""
+        entry = self._transformed.get(id(scaler))
+        if entry is None:
+            # Scaler kept alongside its output so its id cannot be reused
+            entry = (scaler, scaler.transform(self.values))
+            self._transformed[id(scaler)] = entry
+        return entry[1]
+
+    @staticmethod
+    def stack(parts):
+        """Joins single-request encodings, e.g. the rows coalesced by a batcher."""
+        if len(parts) == 1:
+            return parts[0]
+
+        stacked = EncodedFeatures(np.concatenate([part.values for part in parts]))
+
+        if all(part._keys is not None for part in parts):
+            stacked._keys = [key for part in parts for key in part._keys]
+
+        return stacked
+
+
+class FeatureEncoder:
+    """
+    Turns patient dicts into EncodedFeatures for one panel.
+    Missing features default to 0. A feature sent as None (an empty
+    form field) is encoded as NaN, which the models treat as missing.
+    With `lenient`, None and values that are not numbers become 0
+    instead; otherwise non-numbers raise ValueError/TypeError.
+    """
+
+    def __init__(self, features, lenient=False):
+        self.features = tuple(features)
+        self.lenient = lenient
+
+    def encode(self, records):
+
+        features = self.features
+        values = np.empty((len(records), len(features)), dtype=np.float64)
+
+        for i, record in enumerate(records):
+            get = record.get
+
+            if self.lenient:
+                values[i] = [self._to_float(get(feature, 0)) for feature in features]
+            else:
+                values[i] = [self._to_float_or_nan(get(feature, 0)) for feature in features]
+
+        return EncodedFeatures(values)
+
+    def ensure(self, records):
+        """
+        EncodedFeatures for `records`: already-encoded features are used
+        as they are, a list of them is stacked, patient dicts are encoded.
+        """
+
+        if isinstance(records, EncodedFeatures):
+            return records
+
+        if records and isinstance(records[0], EncodedFeatures):
+            return EncodedFeatures.stack(records)
+
+        return self.encode(records)
+
+    @staticmethod
+    def _to_float_or_nan(value):
+        return np.nan if value is None else float(value)
+
+    @staticmethod
+    def _to_float(value):
+        try:
+            return float(value) if value is not None else 0.0
+        except (ValueError, TypeError):
+            return 0.0
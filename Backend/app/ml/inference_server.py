@@ -0,0 +1,296 @@
+# ============================================
+# Micro-Batching Inference Server
+# Out-of-process model scoring: feature rows go
+# over a local queue, and each server process
+# coalesces them per panel into matrix calls
+# ============================================
+#
+# Off by default. With CDSS_INFERENCE_SERVER=1 every API process starts
+# CDSS_INFERENCE_WORKERS scoring processes on first use. The predictors
+# keep their interfaces and send their rows here via run_inference().
+
+import contextlib
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from app.ml.explanation_batcher import BatchMetrics
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_SERVER_ENABLED = os.getenv("CDSS_INFERENCE_SERVER", "0") == "1"
+INFERENCE_WORKERS = int(os.getenv("CDSS_INFERENCE_WORKERS", "1"))
+INFERENCE_BATCH_MAX_ROWS = int(os.getenv("CDSS_INFERENCE_BATCH_MAX_ROWS", "64"))
+INFERENCE_BATCH_WAIT_MS = float(os.getenv("CDSS_INFERENCE_BATCH_WAIT_MS", "2"))
+INFERENCE_TIMEOUT = float(os.getenv("CDSS_INFERENCE_TIMEOUT", "10"))
+
+# spawn: the server never inherits locks held by the API's threads
+INFERENCE_START_METHOD = os.getenv("CDSS_INFERENCE_START_METHOD", "spawn")
+
+# panel -> (module, predictor class); the server calls its _predict_proba(rows)
+PANEL_SCORERS = {
+    "Diabetes": ("app.ml.diabetes_predictor", "DiabetesPredictor"),
+    "Cardiovascular": ("app.ml.cardio_predictor", "CardioPredictor"),
+    "Kidney": ("app.ml.kidney_predictor", "KidneyPredictor"),
+}
+
+
+class InferenceServerError(Exception):
+    """The model raised inside the inference server; carries its message."""
+    pass
+
+
+class InferenceServerUnavailable(Exception):
+    """The server did not answer in time; callers score in-process instead."""
+    pass
+
+
+def run_inference(panel, rows, local_predict_proba):
+    """
+    Positive-class probabilities for `rows`, from the inference server when
+    enabled, else (or when it is unavailable) from `local_predict_proba`.
+    """
+
+    if not INFERENCE_SERVER_ENABLED:
+        return local_predict_proba(rows)
+
+    try:
+        return InferenceClient.predict_proba(panel, rows)
+    except InferenceServerUnavailable as e:
+        logger.warning(f"{panel} inference server unavailable, scoring in-process: {str(e)}")
+        return local_predict_proba(rows)
+    except InferenceServerError as e:
+        # Same message the in-process predictor would have raised
+        raise Exception(str(e))
+
+
+@contextlib.contextmanager
+def scoring_in_process():
+    """
+    Scores in this process for the duration of the block, e.g. while a
+    preloading master warms the models its forked workers will inherit.
+    """
+
+    global INFERENCE_SERVER_ENABLED
+    enabled = INFERENCE_SERVER_ENABLED
+    INFERENCE_SERVER_ENABLED = False
+
+    try:
+        yield
+    finally:
+        INFERENCE_SERVER_ENABLED = enabled
+
+
+# ===============================
+# Server process
+# ===============================
+
+def _load_predictor(panel):
+    module_name, class_name = PANEL_SCORERS[panel]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _serve(requests, responses, max_rows, max_wait):
+    """Main loop of one inference process."""
+
+    # Inside the server, predictors must score locally, never call back here
+    global INFERENCE_SERVER_ENABLED
+    INFERENCE_SERVER_ENABLED = False
+
+    # Load every panel up front; a panel that fails to load reports per request
+    for panel in PANEL_SCORERS:
+        try:
+            _load_predictor(panel).predict_batch([{}])
+        except Exception as e:
+            logger.warning(f"Inference server could not warm {panel}: {str(e)}")
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+
+        batch = [item]
+        n_rows = len(item[2])
+        deadline = item[3] + max_wait
+
+        # Same sweep as the SHAP batcher: wait out the budget, then take what is queued
+        while n_rows < max_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                item = requests.get(timeout=remaining) if remaining > 0 else requests.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is None:
+                # Shutdown sentinel: finish this batch, then stop
+                requests.put(None)
+                break
+
+            batch.append(item)
+            n_rows += len(item[2])
+
+        _flush(batch, responses)
+
+
+def _flush(batch, responses):
+
+    started = time.monotonic()
+    groups = {}
+
+    for request_id, panel, rows, enqueued_at in batch:
+        groups.setdefault(panel, []).append((request_id, rows, enqueued_at))
+
+    for panel, items in groups.items():
+        # Batch statistics travel as (None, panel, queue waits in ms)
+        responses.put((None, panel, [(started - enqueued_at) * 1000 for _, _, enqueued_at in items]))
+
+        try:
+            predict_proba = _load_predictor(panel)._predict_proba
+        except Exception as e:
+            for request_id, _, _ in items:
+                responses.put((request_id, None, f"Unsupported panel: {panel} ({str(e)})"))
+            continue
+
+        try:
+            probabilities = predict_proba(np.concatenate([np.asarray(rows, dtype=np.float64) for _, rows, _ in items]))
+
+            offset = 0
+            for request_id, rows, _ in items:
+                responses.put((request_id, np.asarray(probabilities[offset:offset + len(rows)]).tolist(), None))
+                offset += len(rows)
+
+        except Exception:
+            # Never let one caller's bad rows fail the other requests
+            for request_id, rows, _ in items:
+                try:
+                    responses.put((request_id, np.asarray(predict_proba(rows)).tolist(), None))
+                except Exception as e:
+                    responses.put((request_id, None, str(e)))
+
+
+# ===============================
+# Client (API process side)
+# ===============================
+
+class _PendingInference:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceClient:
+    """
+    Starts the inference processes on first use (again after a fork)
+    and matches their responses back to the waiting request threads.
+    """
+
+    _lock = threading.Lock()
+    _pid = None
+    _requests = None
+    _processes = []
+    _pending = {}
+    _ids = itertools.count()
+    metrics = {}
+
+    @classmethod
+    def predict_proba(cls, panel, rows):
+
+        cls.start()
+
+        request_id = next(cls._ids)
+        pending = _PendingInference()
+
+        with cls._lock:
+            cls._pending[request_id] = pending
+
+        cls._requests.put((request_id, panel, rows, time.monotonic()))
+
+        if not pending.done.wait(INFERENCE_TIMEOUT):
+            with cls._lock:
+                cls._pending.pop(request_id, None)
+            raise InferenceServerUnavailable(f"No response within {INFERENCE_TIMEOUT}s")
+
+        if pending.error is not None:
+            raise InferenceServerError(pending.error)
+
+        return np.asarray(pending.result, dtype=np.float64)
+
+    @classmethod
+    def start(cls):
+        """Idempotent; starts this process's inference servers if not yet running."""
+        if cls._pid == os.getpid():
+            return
+
+        with cls._lock:
+            if cls._pid == os.getpid():
+                return
+
+            context = multiprocessing.get_context(INFERENCE_START_METHOD)
+            requests = context.Queue()
+            responses = context.Queue()
+
+            cls._processes = [
+                context.Process(
+                    target=_serve,
+                    args=(requests, responses, INFERENCE_BATCH_MAX_ROWS, INFERENCE_BATCH_WAIT_MS / 1000.0),
+                    name=f"cdss-inference-{i}",
+                    daemon=True
+                )
+                for i in range(max(1, INFERENCE_WORKERS))
+            ]
+            for process in cls._processes:
+                process.start()
+
+            threading.Thread(
+                target=cls._receive,
+                args=(responses,),
+                name="inference-responses",
+                daemon=True
+            ).start()
+
+            # Requests from before a fork belong to the parent's server
+            cls._pending = {}
+            cls._requests = requests
+            cls._pid = os.getpid()
+
+            logger.info(f"Started {len(cls._processes)} inference server process(es)")
+
+    @classmethod
+    def _receive(cls, responses):
+        while True:
+            try:
+                request_id, result, error = responses.get()
+            except (EOFError, OSError):
+                return
+
+            if request_id is None:
+                # Batch statistics: result is the panel, error the queue waits
+                cls.metrics.setdefault(result, BatchMetrics()).record_batch(error)
+                continue
+
+            with cls._lock:
+                pending = cls._pending.pop(request_id, None)
+
+            if pending is not None:
+                pending.result = result
+                pending.error = error
+                pending.done.set()
+
+
+def inference_metrics():
+    return {
+        "enabled": INFERENCE_SERVER_ENABLED,
+        "processes": len(InferenceClient._processes),
+        "max_batch_rows": INFERENCE_BATCH_MAX_ROWS,
+        "max_wait_ms": INFERENCE_BATCH_WAIT_MS,
+        "panels": {panel: metrics.snapshot() for panel, metrics in InferenceClient.metrics.items()}
+    }
@@ -4,47 +4,73 @@
 
 import numpy as np
 from app.ml.kidney_model_loader import KidneyModelLoader
+from app.ml.inference_server import run_inference
+from app.ml.prediction_cache import PredictionCache
 
 
 class KidneyPredictor:
 
+    _cache = PredictionCache("Kidney.prediction")
+
     @staticmethod
     def predict(data: dict):
+        return KidneyPredictor.predict_batch([data])[0]
+
+    @staticmethod
+    def predict_batch(records: list):
+
+        # One feature row per record in model order (non-numeric values -> 0)
+        features = KidneyModelLoader.load_feature_encoder().ensure(records)
+
+        return KidneyPredictor._cache.fetch(
+            KidneyModelLoader.version_tag(),
+            features.keys,
+            lambda missing: KidneyPredictor._score(features.values[missing])
+        )
+
+    @staticmethod
+    def _score(rows):
 
-        model = KidneyModelLoader.load_model()
         metadata = KidneyModelLoader.load_metadata()
 
-        expected_features = metadata["features"]
         threshold = metadata.get("threshold", 0.5)
 
-        # Create feature vector in correct order
-        feature_vector = []
-        for feature in expected_features:
-            value = data.get(feature, 0)
-            try:
-                feature_vector.append(float(value) if value is not None else 0.0)
-            except (ValueError, TypeError):
-                feature_vector.append(0.0)
-        
+        # Out-of-process micro-batched scoring when the inference server is enabled
+        probabilities = run_inference("Kidney", rows, KidneyPredictor._predict_proba)
+
+        return [
+            {
+                "ml_probability": round(float(probability), 4),
+                "ml_threshold": threshold,
+                "ml_risk_flag": "High" if probability >= threshold else "Low",
+                "model_version": metadata.get("model_version")
+            }
+            for probability in probabilities
+        ]
+
+    @staticmethod
+    def _predict_proba(rows):
+
+        model = KidneyModelLoader.load_model()
+        engine = KidneyModelLoader.load_compiled_model()
+
         # Use numpy array directly
-        feature_array = np.array([feature_vector], dtype=np.float64)
+        feature_array = np.asarray(rows, dtype=np.float64)
 
         try:
             # Model is calibrated, use directly
-            probability = float(model.predict_proba(feature_array)[0][1])
+            probabilities = engine.predict_proba(feature_array)[:, 1]
         except Exception as e:
             # Fallback for calibrated model
             try:
-                if hasattr(model, 'estimator'):
-                    probability = float(model.estimator.predict_proba(feature_array)[0][1])
+                if engine is not model:
+                    # Compiled engine rejected the input; retry via sklearn
+                    probabilities = model.predict_proba(feature_array)[:, 1]
+                elif hasattr(model, 'estimator'):
+                    probabilities = model.estimator.predict_proba(feature_array)[:, 1]
                 else:
                     raise Exception(f"Model prediction failed: {str(e)}")
             except:
                 raise Exception(f"Kidney model error: {str(e)}")
 
-        return {
-            "ml_probability": round(probability, 4),
-            "ml_threshold": threshold,
-            "ml_risk_flag": "High" if probability >= threshold else "Low",
-            "model_version": metadata.get("model_version")
-        }
+        return probabilities
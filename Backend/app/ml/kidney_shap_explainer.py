@@ -2,62 +2,108 @@
 # Kidney SHAP Explainer (NumPy Compatible)
 # ============================================
 
-import shap
+import threading
+
 import numpy as np
+from app.ml.contribution_engine import build_explainer
+from app.ml.compiled_trees import CompiledScaler
 from app.ml.kidney_model_loader import KidneyModelLoader
+from app.ml.explanation_batcher import ExplanationBatcher
+from app.ml.prediction_cache import PredictionCache
 
 
 class KidneyShapExplainer:
 
     _explainer = None
-    _base_model = None
+    _scaler = None
     _metadata = None
+    _generation = None
+    _lock = threading.Lock()
+    _cache = PredictionCache("Kidney.explanation")
 
     @classmethod
     def _initialize(cls):
 
-        if cls._explainer is None:
+        # Rebuild when the loader has reloaded the calibrated model
+        if cls._explainer is None or cls._generation != KidneyModelLoader.generation:
+            with cls._lock:
+                # Single-flight: one thread builds the TreeExplainer, the rest wait
+                if cls._explainer is None or cls._generation != KidneyModelLoader.generation:
+
+                    cls._metadata = KidneyModelLoader.load_metadata()
+
+                    # Base pipeline's scaler + classifier (native bundle or pickle)
+                    scaler, classifier = KidneyModelLoader.load_explainer_model()
 
-            calibrated_model = KidneyModelLoader.load_model()
-            cls._metadata = KidneyModelLoader.load_metadata()
+                    # Pickled pipelines carry a sklearn StandardScaler; skip its validation layers
+                    if not isinstance(scaler, CompiledScaler):
+                        scaler = CompiledScaler.from_sklearn(scaler)
 
-            # Get base model from calibrated model
-            cls._base_model = calibrated_model.estimator
-            classifier = cls._base_model.named_steps["classifier"]
+                    cls._scaler = scaler
 
-            cls._explainer = shap.TreeExplainer(classifier)
+                    cls._explainer = build_explainer("Kidney", classifier)
+                    cls._generation = KidneyModelLoader.generation
 
     @classmethod
-    def explain(cls, data: dict, top_n: int = 5):
+    def explain(cls, data, top_n: int = 5):
 
-        cls._initialize()
+        features = KidneyModelLoader.load_feature_encoder().ensure([data])
 
-        feature_order = cls._metadata["features"]
+        cached = cls._cache.peek(KidneyModelLoader.version_tag(), (top_n, features.keys[0]))
+        if cached is not None:
+            return cached
 
-        # Create feature vector using numpy
-        feature_vector = [data.get(feature, 0) for feature in feature_order]
-        feature_array = np.array([feature_vector], dtype=np.float64)
+        # Concurrent requests are coalesced into one matrix SHAP call
+        return cls._batcher.explain(features, top_n)
+
+    @classmethod
+    def explain_batch(cls, records, top_n: int = 5):
+
+        cls._initialize()
 
         try:
-            # Apply preprocessing
-            processed = cls._base_model.named_steps["preprocessing"].transform(feature_array)
-
-            shap_values = cls._explainer.shap_values(processed)
-            contributions = shap_values[0]
-
-            top_indices = np.argsort(abs(contributions))[::-1][:top_n]
-
-            return {
-                "top_feature_contributions": [
-                    {
-                        "feature_index": int(idx),
-                        "impact": float(round(contributions[idx], 5))
-                    }
-                    for idx in top_indices
-                ]
-            }
+            # Same encoded matrix the predictor scored, when the caller passes it
+            features = KidneyModelLoader.load_feature_encoder().ensure(records)
+
+            # Failed explanations are returned but never cached
+            return cls._cache.fetch(
+                KidneyModelLoader.version_tag(),
+                [(top_n, key) for key in features.keys],
+                lambda missing: cls._explain_rows(features, missing, top_n)
+            )
         except Exception as e:
-            return {
-                "top_feature_contributions": [],
-                "error": f"SHAP explanation failed: {str(e)}"
-            }
+            return [
+                {
+                    "top_feature_contributions": [],
+                    "error": f"SHAP explanation failed: {str(e)}"
+                }
+                for _ in range(len(records))
+            ]
+
+    @classmethod
+    def _explain_rows(cls, features, missing, top_n):
+
+        # Apply preprocessing (computed once per encoded request)
+        processed = features.transformed(cls._scaler)[missing]
+
+        shap_values = cls._explainer.shap_values(processed)
+
+        return [cls._format(contributions, top_n) for contributions in shap_values]
+
+    @staticmethod
+    def _format(contributions, top_n):
+
+        top_indices = np.argsort(abs(contributions))[::-1][:top_n]
+
+        return {
+            "top_feature_contributions": [
+                {
+                    "feature_index": int(idx),
+                    "impact": float(round(contributions[idx], 5))
+                }
+                for idx in top_indices
+            ]
+        }
+
+
+KidneyShapExplainer._batcher = ExplanationBatcher("Kidney", KidneyShapExplainer.explain_batch)
@@ -0,0 +1,385 @@
+# ============================================
+# Native Model Artifacts
+# XGBoost UBJ boosters + a JSON sidecar with the
+# Platt parameters, scaler and panel metadata,
+# served without unpickling sklearn objects
+# ============================================
+#
+# Bundle layout (one directory per panel):
+#   manifest.json          metadata, calibration, scaler, file index
+#   member_<i>.ubj         booster of calibrated member i
+#   member_<i>_nodes/*.npy compiled node arrays (memory-mapped)
+#   explainer.ubj          booster used for SHAP, when not a member
+#
+# The manifest lists the pickles a bundle was exported from with their
+# sha256. In auto mode a bundle whose pickles have changed since (e.g.
+# after retraining without re-exporting) is skipped for the pickles.
+
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import xgboost as xgb
+
+from app.ml.compiled_trees import (
+    CompiledCalibratedModel,
+    CompiledForest,
+    CompiledScaler,
+    TreeCompilationError,
+    _sigmoid,
+    _unwrap_estimator
+)
+
+# auto: use a bundle when one exists, else the pickles
+# native: require bundles; pickle: ignore bundles
+MODEL_FORMAT = os.getenv("CDSS_MODEL_FORMAT", "auto")
+
+# ensemble: the calibrated CV ensemble; collapsed: its single-booster
+# conversion (ml_train/collapse_calibrated_ensemble.py), when exported
+MODEL_VARIANT = os.getenv("CDSS_MODEL_VARIANT", "ensemble")
+
+# Set CDSS_NATIVE_MMAP=0 to read node arrays onto the heap instead
+NATIVE_MMAP = os.getenv("CDSS_NATIVE_MMAP", "1") != "0"
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+
+class NativeArtifactError(Exception):
+    """Raised when a native bundle is missing, incomplete or unreadable."""
+    pass
+
+
+def open_bundle(directory, collapsed_directory=None, source_dir=None):
+    """
+    Returns the NativeBundle in `directory`, or None when the
+    pickles should be used (format forced to pickle, no bundle, or
+    in auto mode a bundle older than the pickles in `source_dir`).
+    With CDSS_MODEL_VARIANT=collapsed, `collapsed_directory` is served
+    instead when it exists and is current; otherwise the ensemble is kept.
+    """
+
+    if MODEL_VARIANT == "collapsed" and collapsed_directory is not None:
+        if MODEL_FORMAT != "pickle" and os.path.exists(os.path.join(collapsed_directory, MANIFEST_FILE)):
+            bundle = NativeBundle(collapsed_directory)
+            if _is_current(bundle, source_dir, "ml_train/collapse_calibrated_ensemble.py", "the calibrated ensemble"):
+                return bundle
+        else:
+            logger.warning(f"Collapsed model not available at {collapsed_directory}; serving the calibrated ensemble")
+
+    if MODEL_FORMAT == "pickle":
+        return None
+
+    if not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+        if MODEL_FORMAT == "native":
+            raise NativeArtifactError(f"Native model bundle not found: {directory}")
+        return None
+
+    bundle = NativeBundle(directory)
+
+    return bundle if _is_current(bundle, source_dir, "ml_train/export_native_models.py", "the pickles") else None
+
+
+def _is_current(bundle, source_dir, export_script, fallback):
+    """
+    False when, in auto mode, a source pickle in `source_dir` no longer
+    matches the sha256 recorded at export. Missing pickles cannot be
+    checked and are not held against the bundle.
+    """
+
+    if source_dir is None:
+        return True
+
+    stale = bundle.stale_sources(source_dir)
+
+    if not stale:
+        return True
+
+    message = f"Native bundle {bundle.directory} is older than {', '.join(stale)}; re-run {export_script}"
+
+    if MODEL_FORMAT == "native":
+        logger.warning(f"{message}. Serving it anyway (CDSS_MODEL_FORMAT=native)")
+        return True
+
+    logger.warning(f"{message}. Serving {fallback} instead")
+    return False
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class NativeBundle:
+
+    def __init__(self, directory):
+        self.directory = directory
+
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        version = self.manifest.get("format_version")
+        if version != FORMAT_VERSION:
+            raise NativeArtifactError(f"Unsupported bundle format version: {version}")
+
+        self.metadata = self.manifest["metadata"]
+
+    def stale_sources(self, source_dir):
+        """
+        Source pickles in `source_dir` whose sha256 differs from the one
+        recorded at export (or was not recorded), by file name.
+        """
+
+        stale = []
+
+        for source in self.manifest.get("sources", []):
+            if isinstance(source, str):
+                source = {"file": source}
+
+            path = os.path.join(source_dir, source["file"])
+
+            if os.path.exists(path) and source.get("sha256") != file_sha256(path):
+                stale.append(source["file"])
+
+        return stale
+
+    @property
+    def has_model(self):
+        return bool(self.manifest.get("members"))
+
+    @property
+    def has_explainer(self):
+        return self.manifest.get("explainer") is not None
+
+    def load_model(self):
+
+        if not self.has_model:
+            raise NativeArtifactError(f"Bundle has no calibrated model: {self.directory}")
+
+        return NativeCalibratedModel(self.directory, self.manifest["members"])
+
+    def load_explainer_model(self):
+        """(scaler or None, xgboost.Booster) for the SHAP explainer."""
+
+        if not self.has_explainer:
+            raise NativeArtifactError(f"Bundle has no explainer model: {self.directory}")
+
+        spec = self.manifest["explainer"]
+        return _scaler_from_spec(spec.get("scaler")), _load_booster(self.directory, spec["booster"])
+
+
+class NativeCalibratedModel:
+    """
+    Sigmoid-calibrated XGBoost ensemble rebuilt from native boosters.
+    Same predict_proba output as the pickled CalibratedClassifierCV.
+    """
+
+    def __init__(self, directory, specs):
+        self.directory = directory
+        self.specs = specs
+
+        # members: list of (scaler or None, xgboost.Booster, a, b)
+        self.members = [
+            (
+                _scaler_from_spec(spec.get("scaler")),
+                _load_booster(directory, spec["booster"]),
+                float(spec["a"]),
+                float(spec["b"])
+            )
+            for spec in specs
+        ]
+
+    def predict_proba(self, X):
+
+        X = np.asarray(X, dtype=np.float64)
+        positive = np.zeros(X.shape[0], dtype=np.float64)
+
+        for scaler, booster, a, b in self.members:
+            features = scaler.transform(X) if scaler is not None else X
+            score = booster.inplace_predict(features)
+            positive += _sigmoid(-(a * score + b))
+
+        positive /= len(self.members)
+
+        return np.column_stack([1.0 - positive, positive])
+
+    def to_compiled(self):
+        """
+        CompiledCalibratedModel over the exported node arrays.
+        Members exported without node arrays are compiled from the booster.
+        """
+
+        members = []
+
+        for spec, (scaler, booster, a, b) in zip(self.specs, self.members):
+            nodes = spec.get("nodes")
+
+            if nodes is not None:
+                forest = CompiledForest.load(os.path.join(self.directory, nodes["path"]), nodes, mmap=NATIVE_MMAP)
+            else:
+                forest = CompiledForest.from_booster(booster)
+
+            members.append((scaler, forest, a, b))
+
+        return CompiledCalibratedModel(members, native_model=self)
+
+
+def export_bundle(directory, metadata, calibrated_model=None, explainer_estimator=None, sources=()):
+    """
+    Writes a native bundle for one panel and returns its manifest.
+    `calibrated_model` is a sigmoid CalibratedClassifierCV over XGBoost
+    (optionally behind a StandardScaler pipeline); `explainer_estimator`
+    is the fitted model the SHAP explainer runs on. `sources` are the
+    paths of the pickles it was exported from.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    members = []
+    member_classifiers = []
+
+    if calibrated_model is not None:
+        if not hasattr(calibrated_model, "calibrated_classifiers_"):
+            raise NativeArtifactError("Calibrated model not properly fitted.")
+
+        if calibrated_model.method != "sigmoid":
+            raise NativeArtifactError(f"Unsupported calibration method: {calibrated_model.method}")
+
+        for i, calibrated in enumerate(calibrated_model.calibrated_classifiers_):
+            calibrator = calibrated.calibrators[0]
+            member, classifier = _export_member(directory, i, calibrated.estimator, calibrator.a_, calibrator.b_)
+
+            members.append(member)
+            member_classifiers.append(classifier)
+
+    explainer = None
+
+    if explainer_estimator is not None:
+        scaler, classifier = _unwrap_estimator(explainer_estimator)
+
+        # Reuse the member file when SHAP runs on one of the calibrated members
+        shared = [i for i, member in enumerate(member_classifiers) if member is classifier]
+
+        if shared:
+            booster_file = members[shared[0]]["booster"]
+        else:
+            booster_file = "explainer.ubj"
+            classifier.get_booster().save_model(os.path.join(directory, booster_file))
+
+        explainer = {"booster": booster_file, "scaler": _scaler_to_spec(scaler)}
+
+    return _write_manifest(directory, metadata, members, explainer, sources)
+
+
+def export_single_booster_bundle(directory, metadata, estimator, a, b, sources=(), report=None):
+    """
+    Writes a bundle with one booster and one sigmoid map
+    p = 1 / (1 + exp(a * T + b)) over its probability T, e.g. a
+    calibrated ensemble collapsed by ml_train/collapse_calibrated_ensemble.py.
+    SHAP explains the same booster that serves predictions.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    member, _ = _export_member(directory, 0, estimator, a, b)
+    explainer = {"booster": member["booster"], "scaler": member["scaler"]}
+
+    return _write_manifest(directory, metadata, [member], explainer, sources, report=report)
+
+
+def _export_member(directory, index, estimator, a, b):
+    """Saves one (optionally scaled) XGBoost member; returns its manifest entry and classifier."""
+
+    scaler, classifier = _unwrap_estimator(estimator)
+    booster = classifier.get_booster()
+
+    booster_file = f"member_{index}.ubj"
+    booster.save_model(os.path.join(directory, booster_file))
+
+    try:
+        nodes_dir = f"member_{index}_nodes"
+        header = CompiledForest.from_booster(booster).save(os.path.join(directory, nodes_dir))
+        nodes = {"path": nodes_dir, **header}
+    except TreeCompilationError:
+        # Still loadable; the compiled engine falls back to the booster
+        nodes = None
+
+    member = {
+        "booster": booster_file,
+        "a": float(a),
+        "b": float(b),
+        "scaler": _scaler_to_spec(scaler),
+        "nodes": nodes
+    }
+
+    return member, classifier
+
+
+def _write_manifest(directory, metadata, members, explainer, sources, report=None):
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "xgboost_version": xgb.__version__,
+        "sources": [{"file": os.path.basename(path), "sha256": file_sha256(path)} for path in sources],
+        "metadata": _json_safe(metadata),
+        "members": members,
+        "explainer": explainer
+    }
+
+    if report is not None:
+        manifest["report"] = _json_safe(report)
+
+    with open(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def _load_booster(directory, filename):
+    path = os.path.join(directory, filename)
+
+    if not os.path.exists(path):
+        raise NativeArtifactError(f"Booster file not found: {path}")
+
+    return xgb.Booster(model_file=path)
+
+
+def _scaler_to_spec(scaler):
+    if scaler is None:
+        return None
+
+    return {
+        "mean": None if scaler.mean is None else scaler.mean.tolist(),
+        "scale": None if scaler.scale is None else scaler.scale.tolist()
+    }
+
+
+def _scaler_from_spec(spec):
+    if spec is None:
+        return None
+
+    return CompiledScaler(spec["mean"], spec["scale"])
+
+
+def _json_safe(value):
+    """Metadata pickles hold NumPy scalars/arrays; JSON needs builtins."""
+
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
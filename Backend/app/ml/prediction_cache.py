@@ -0,0 +1,173 @@
+# ============================================
+# Prediction / Explanation Cache
+# Bounded LRU + TTL, keyed on the ordered model
+# feature vector and tied to the model version
+# ============================================
+
+import copy
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PREDICTION_CACHE_SIZE = int(os.getenv("CDSS_PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL = float(os.getenv("CDSS_PREDICTION_CACHE_TTL", "3600"))
+
+# cache name -> PredictionCache, used by the metrics endpoint
+CACHES = {}
+
+
+def feature_key(values):
+    """
+    Canonical, hashable form of an ordered feature vector.
+    120, 120.0 and "120" map to the same key; None and NaN both mean missing.
+    """
+
+    key = []
+
+    for value in values:
+        try:
+            number = float(value) if value is not None else math.nan
+            key.append(None if math.isnan(number) else number)
+        except (TypeError, ValueError):
+            key.append(repr(value))
+
+    return tuple(key)
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with per-entry expiry.
+    Entries belong to one model version; a version change clears the cache.
+    """
+
+    def __init__(self, name, max_entries=PREDICTION_CACHE_SIZE, ttl_seconds=PREDICTION_CACHE_TTL):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        CACHES[name] = self
+
+    def fetch(self, version, keys, compute):
+        """
+        Returns one value per key. `compute(missing_indices)` is called once
+        with the positions that missed and must return their values in order.
+        """
+
+        if self.max_entries <= 0:
+            return compute(list(range(len(keys))))
+
+        results = [None] * len(keys)
+        missing = []
+        duplicates = []
+        pending = {}
+
+        with self._lock:
+            if version != self._version:
+                # Artifact was reloaded or replaced - nothing cached is valid
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = version
+
+            now = time.monotonic()
+
+            for index, key in enumerate(keys):
+                entry = self._entries.get(key)
+
+                if entry is not None and entry[0] < now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+
+                if entry is None:
+                    self.misses += 1
+                    if key in pending:
+                        # Same vector twice in one batch - compute it once
+                        duplicates.append((index, pending[key]))
+                    else:
+                        pending[key] = index
+                        missing.append(index)
+                else:
+                    self._entries.move_to_end(key)
+                    results[index] = copy.deepcopy(entry[1])
+                    self.hits += 1
+
+        if not missing:
+            return results
+
+        computed = compute(missing)
+
+        with self._lock:
+            if version == self._version:
+                expires_at = time.monotonic() + self.ttl_seconds
+
+                for index, value in zip(missing, computed):
+                    self._entries[keys[index]] = (expires_at, copy.deepcopy(value))
+                    self._entries.move_to_end(keys[index])
+
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        for index, value in zip(missing, computed):
+            results[index] = value
+
+        for index, source in duplicates:
+            results[index] = copy.deepcopy(results[source])
+
+        return results
+
+    def peek(self, version, key):
+        """
+        Returns a cached value or None without computing anything.
+        Lets callers skip queueing work (e.g. SHAP batching) on a hit.
+        Misses are not counted here; the following fetch() counts them.
+        """
+
+        with self._lock:
+            if self.max_entries <= 0 or version != self._version:
+                return None
+
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+def cache_metrics():
+    return {name: cache.stats() for name, cache in CACHES.items()}
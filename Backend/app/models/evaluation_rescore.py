@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, UniqueConstraint
+from datetime import datetime
+from app.database.base import Base
+
+
+class EvaluationRescore(Base):
+    """One panel of a stored evaluation, re-scored by a newer model version."""
+
+    __tablename__ = "evaluation_rescores"
+    __table_args__ = (UniqueConstraint("evaluation_id", "panel", "model_version"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    evaluation_id = Column(Integer, ForeignKey("evaluations.id", ondelete="CASCADE"), nullable=False, index=True)
+    job_id = Column(Integer, ForeignKey("rescore_jobs.id"))
+
+    panel = Column(String, nullable=False)
+    model_version = Column(String, nullable=False)  # version that produced `result`
+    previous_model_version = Column(String)  # version stored with the evaluation
+
+    result = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from datetime import datetime
+from app.database.base import Base
+
+
+class RescoreJob(Base):
+    """Progress of one re-scoring pass over the evaluations table."""
+
+    __tablename__ = "rescore_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    target_versions = Column(JSON, nullable=False)  # { panel: model_version }
+    status = Column(String, default="running")  # running | finished | failed
+
+    # Keyset cursor: every evaluation with id <= last_evaluation_id is done
+    last_evaluation_id = Column(Integer, default=0)
+
+    scanned = Column(Integer, default=0)
+    rescored = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    error = Column(String)
+
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
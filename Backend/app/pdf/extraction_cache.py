@@ -0,0 +1,202 @@
+# ============================================
+# PDF Extraction Cache
+# Content-addressed, on disk (SQLite), shared by
+# every API worker process; size-bounded LRU
+# ============================================
+#
+# Key: sha256 of the uploaded bytes + the extraction settings + a version
+# of the biomarker patterns and panel requirements, so editing either one
+# makes every old entry unreachable (evicted as it ages out). Value: the
+# /pdf/upload response body (extracted_data + panel detection). Only
+# successful extractions are stored. The file is opened in WAL mode, so
+# readers in one worker do not block a writer in another.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app.detection.enhanced_panel_detector import EnhancedPanelDetector
+from app.pdf.pdf_extractor import PDFLabExtractor, PDF_EXTRACTION_MODE, PDF_PAGE_BUDGET
+from app.stage_timing import stage_timer
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_ENABLED = os.getenv("CDSS_PDF_CACHE", "1") == "1"
+PDF_CACHE_PATH = os.getenv("CDSS_PDF_CACHE_PATH", "./pdf_cache.db")
+PDF_CACHE_MAX_MB = float(os.getenv("CDSS_PDF_CACHE_MAX_MB", "64"))
+
+# A hit refreshes the entry's LRU time at most this often (seconds), so
+# repeated hits do not each take the database's write lock
+TOUCH_INTERVAL = 60
+
+
+def _pattern_version():
+    """Changes whenever the extractor's patterns or the panel requirements do."""
+    definition = json.dumps(
+        [PDFLabExtractor.BIOMARKER_PATTERNS, EnhancedPanelDetector.PANEL_REQUIREMENTS],
+        sort_keys=True
+    )
+    return hashlib.sha256(definition.encode()).hexdigest()[:16]
+
+
+PATTERN_VERSION = _pattern_version()
+
+
+class PdfExtractionCache:
+    """One SQLite connection per process, used under a lock."""
+
+    _lock = threading.Lock()
+    _pid = None
+    _conn = None
+
+    hits = 0
+    misses = 0
+    stores = 0
+    evictions = 0
+    errors = 0
+
+    @staticmethod
+    def key(digest):
+        """Cache key for a sha256 hex digest of the uploaded PDF."""
+        return f"{digest}:{PATTERN_VERSION}:{PDF_EXTRACTION_MODE}:{PDF_PAGE_BUDGET}"
+
+    @classmethod
+    def _connection(cls):
+        # Called with _lock held. A forked worker opens its own connection.
+        if cls._pid != os.getpid():
+            conn = sqlite3.connect(PDF_CACHE_PATH, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pdf_extractions ("
+                " key TEXT PRIMARY KEY,"
+                " body TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_pdf_extractions_used_at ON pdf_extractions (used_at)")
+            cls._conn, cls._pid = conn, os.getpid()
+        return cls._conn
+
+    @classmethod
+    def get(cls, digest):
+        """Stored response body for this PDF, or None."""
+
+        if not PDF_CACHE_ENABLED:
+            return None
+
+        key = cls.key(digest)
+        now = time.time()
+
+        with cls._lock, stage_timer("pdf_cache_lookup"):
+            try:
+                conn = cls._connection()
+                row = conn.execute("SELECT body, used_at FROM pdf_extractions WHERE key = ?", (key,)).fetchone()
+
+                if row is None:
+                    cls.misses += 1
+                    return None
+
+                if now - row[1] > TOUCH_INTERVAL:
+                    conn.execute("UPDATE pdf_extractions SET used_at = ? WHERE key = ?", (now, key))
+
+                cls.hits += 1
+
+            except sqlite3.Error as e:
+                # The cache never fails an upload; the PDF is parsed instead
+                cls.errors += 1
+                logger.warning(f"PDF cache lookup failed: {str(e)}")
+                return None
+
+        return json.loads(row[0])
+
+    @classmethod
+    def put(cls, digest, body):
+        """Stores a response body, then evicts least recently used entries over the size limit."""
+
+        if not PDF_CACHE_ENABLED:
+            return
+
+        value = json.dumps(body)
+        now = time.time()
+        max_bytes = int(PDF_CACHE_MAX_MB * 1024 * 1024)
+
+        with cls._lock:
+            try:
+                conn = cls._connection()
+                conn.execute("BEGIN IMMEDIATE")
+
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO pdf_extractions (key, body, size, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                        (cls.key(digest), value, len(value), now, now)
+                    )
+
+                    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pdf_extractions").fetchone()[0]
+                    evicted = 0
+
+                    if total > max_bytes:
+                        # Oldest first until the rest fits
+                        cutoff = None
+                        for used_at, size in conn.execute("SELECT used_at, size FROM pdf_extractions ORDER BY used_at"):
+                            if total <= max_bytes:
+                                break
+                            total -= size
+                            cutoff = used_at
+
+                        evicted = conn.execute("DELETE FROM pdf_extractions WHERE used_at <= ?", (cutoff,)).rowcount
+
+                    conn.execute("COMMIT")
+
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+
+                cls.stores += 1
+                cls.evictions += evicted
+
+            except sqlite3.Error as e:
+                cls.errors += 1
+                logger.warning(f"PDF cache store failed: {str(e)}")
+
+
+def digest_of(content):
+    """sha256 hex digest of an uploaded PDF's bytes."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def pdf_cache_metrics():
+    cache = PdfExtractionCache
+
+    with cache._lock:
+        lookups = cache.hits + cache.misses
+        stats = {
+            "enabled": PDF_CACHE_ENABLED,
+            "path": PDF_CACHE_PATH,
+            "pattern_version": PATTERN_VERSION,
+            "max_mb": PDF_CACHE_MAX_MB,
+            # This process's lookups; entries and size are shared by all workers
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "hit_rate": round(cache.hits / lookups, 4) if lookups else 0.0,
+            "stores": cache.stores,
+            "evictions": cache.evictions,
+            "errors": cache.errors
+        }
+
+        if PDF_CACHE_ENABLED:
+            try:
+                entries, size = cache._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pdf_extractions"
+                ).fetchone()
+                stats["entries"] = entries
+                stats["size_mb"] = round(size / (1024 * 1024), 3)
+            except sqlite3.Error as e:
+                stats["error"] = str(e)
+
+    return stats
@@ -0,0 +1,344 @@
+# ============================================
+# PDF Parsing Worker Pool
+# Uploaded PDFs are parsed in separate, started-
+# ahead processes with a wall-clock timeout and a
+# memory limit per job, off the API's event loop
+# ============================================
+#
+# One job per worker at a time, each worker on its own pipe: a job that
+# runs past CDSS_PDF_JOB_TIMEOUT gets its worker killed and replaced, and
+# a worker that hits its memory limit (RLIMIT_AS) or has served
+# CDSS_PDF_WORKER_MAX_JOBS jobs is replaced as well. Callers block (in a
+# threadpool thread) until a worker is free; /metrics/pdf-pool shows the
+# queue depth and job latency, /metrics the pdf_queue and pdf_job stages.
+# A worker that cannot be started (e.g. EAGAIN/ENOMEM) leaves its slot in
+# the idle queue, and the next job to draw that slot starts it again.
+# With CDSS_PDF_POOL=0 PDFs are parsed in the calling thread.
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from app.stage_timing import begin_request, end_request, record_timings, stage_timer
+
+logger = logging.getLogger(__name__)
+
+PDF_POOL_ENABLED = os.getenv("CDSS_PDF_POOL", "1") == "1"
+PDF_WORKERS = int(os.getenv("CDSS_PDF_WORKERS", "2"))
+PDF_JOB_TIMEOUT = float(os.getenv("CDSS_PDF_JOB_TIMEOUT", "30"))
+PDF_QUEUE_TIMEOUT = float(os.getenv("CDSS_PDF_QUEUE_TIMEOUT", "60"))
+PDF_WORKER_MEMORY_MB = int(os.getenv("CDSS_PDF_WORKER_MEMORY_MB", "1024"))
+PDF_WORKER_MAX_JOBS = int(os.getenv("CDSS_PDF_WORKER_MAX_JOBS", "200"))
+
+# spawn: workers never inherit locks held by the API's threads
+PDF_POOL_START_METHOD = os.getenv("CDSS_PDF_POOL_START_METHOD", "spawn")
+
+
+class PdfPoolBusy(Exception):
+    """No worker became free within CDSS_PDF_QUEUE_TIMEOUT."""
+    pass
+
+
+class PdfJobTimeout(Exception):
+    """The job ran past CDSS_PDF_JOB_TIMEOUT; its worker was replaced."""
+    pass
+
+
+class PdfJobFailed(Exception):
+    """The worker ran out of memory or exited during the job."""
+    pass
+
+
+# ===============================
+# Worker process
+# ===============================
+
+def _limit_memory(memory_mb):
+    if not memory_mb:
+        return
+    try:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"PDF worker memory limit not applied: {str(e)}")
+
+
+def _work(conn, memory_mb):
+    """Main loop of one PDF worker: (path or bytes, mode, page_budget) in, outcome out."""
+
+    from app.pdf.pdf_extractor import PDFLabExtractor
+
+    _limit_memory(memory_mb)
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        if job is None:
+            return
+
+        source, mode, page_budget = job
+        if source is None:
+            # PDF bytes follow the job as one raw message
+            source = conn.recv_bytes()
+        token = begin_request()
+
+        try:
+            extracted_data, report = PDFLabExtractor.extract_with_report(source, mode, page_budget)
+            conn.send(("ok", (extracted_data, report), end_request(token)))
+        except MemoryError:
+            end_request(token)
+            conn.send(("memory", f"PDF worker exceeded its {memory_mb} MB memory limit", []))
+            return
+        except Exception as e:
+            # extract_with_report wraps MemoryError from pdfminer in a ValueError
+            timings = end_request(token)
+            if isinstance(e.__context__, MemoryError):
+                conn.send(("memory", f"PDF worker exceeded its {memory_mb} MB memory limit", timings))
+                return
+            conn.send(("error", str(e), timings))
+
+
+# ===============================
+# Pool (API process side)
+# ===============================
+
+class _Worker:
+
+    def __init__(self, context, index):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_work,
+            args=(child_conn, PDF_WORKER_MEMORY_MB),
+            name=f"cdss-pdf-{index}",
+            daemon=True
+        )
+        try:
+            self.process.start()
+        except BaseException:
+            self.conn.close()
+            raise
+        finally:
+            child_conn.close()
+        self.index = index
+        self.jobs = 0
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class PdfParsePool:
+    """Starts the workers on first use (again after a fork) and hands jobs to idle ones."""
+
+    # Reentrant: start() counts failed worker starts while holding it
+    _lock = threading.RLock()
+    _pid = None
+    _context = None
+    _idle = None
+    _workers = 0
+    _waiting = 0
+    _busy = 0
+    stats = {}
+
+    @classmethod
+    def extract_with_report(cls, source, mode=None, page_budget=None):
+        """PDFLabExtractor.extract_with_report(source, ...) in a pool worker; source is a path or the PDF's bytes."""
+
+        if not PDF_POOL_ENABLED:
+            from app.pdf.pdf_extractor import PDFLabExtractor
+            return PDFLabExtractor.extract_with_report(source, mode, page_budget)
+
+        cls.start()
+
+        with cls._lock:
+            cls._waiting += 1
+
+        queued_at = time.perf_counter()
+
+        try:
+            with stage_timer("pdf_queue"):
+                worker = cls._idle.get(timeout=PDF_QUEUE_TIMEOUT)
+
+                if not isinstance(worker, _Worker):
+                    # An empty slot: its last start failed, try again now
+                    index, worker = worker, cls._start_worker(worker)
+                    if worker is None:
+                        cls._idle.put(index)
+                        raise PdfPoolBusy("No PDF worker could be started")
+        except queue.Empty:
+            cls._count("rejected")
+            raise PdfPoolBusy(f"No PDF worker free within {PDF_QUEUE_TIMEOUT}s")
+        finally:
+            with cls._lock:
+                cls._waiting -= 1
+
+        with cls._lock:
+            cls._busy += 1
+        cls._record_wait((time.perf_counter() - queued_at) * 1000)
+
+        started = time.perf_counter()
+
+        try:
+            with stage_timer("pdf_job"):
+                status, payload, timings = cls._run(worker, (source, mode, page_budget))
+        finally:
+            with cls._lock:
+                cls._busy -= 1
+            cls._record_job((time.perf_counter() - started) * 1000)
+
+        record_timings(timings)
+
+        if status == "ok":
+            return payload
+
+        cls._count("failed")
+        raise ValueError(payload)
+
+    @classmethod
+    def _run(cls, worker, job):
+        """Runs one job; always puts a usable worker back in the idle queue."""
+
+        replace = None
+
+        try:
+            source, mode, page_budget = job
+
+            try:
+                if isinstance(source, (bytes, bytearray)):
+                    # Raw bytes go straight from the buffer into the pipe, no pickled copy
+                    worker.conn.send((None, mode, page_budget))
+                    worker.conn.send_bytes(source)
+                else:
+                    worker.conn.send(job)
+            except (OSError, ValueError):
+                replace = "exited"
+                raise PdfJobFailed("PDF worker exited before taking the file")
+
+            if not worker.conn.poll(PDF_JOB_TIMEOUT):
+                cls._count("timeouts")
+                replace = "timeout"
+                raise PdfJobTimeout(f"PDF processing took longer than {PDF_JOB_TIMEOUT}s")
+
+            try:
+                status, payload, timings = worker.conn.recv()
+            except (EOFError, OSError):
+                replace = "exited"
+                raise PdfJobFailed("PDF worker exited while processing the file")
+
+            if status == "memory":
+                cls._count("memory_errors")
+                replace = "memory"
+                raise PdfJobFailed(payload)
+
+            worker.jobs += 1
+            if PDF_WORKER_MAX_JOBS and worker.jobs >= PDF_WORKER_MAX_JOBS:
+                replace = "max_jobs"
+
+            return status, payload, timings
+
+        finally:
+            if replace is None:
+                cls._idle.put(worker)
+            else:
+                cls._replace(worker, replace)
+
+    @classmethod
+    def _replace(cls, worker, reason):
+        # A stuck or exhausted worker is killed; a worker at its job limit exits cleanly
+        worker.stop(kill=reason != "max_jobs")
+        cls._count(f"recycled_{reason}")
+        if reason != "max_jobs":
+            logger.warning(f"PDF worker {worker.index} replaced ({reason})")
+        cls._idle.put(cls._start_worker(worker.index) or worker.index)
+
+    @classmethod
+    def _start_worker(cls, index):
+        """A new worker for slot `index`, or None when its process cannot be started."""
+        try:
+            return _Worker(cls._context, index)
+        except Exception as e:
+            # Never replaces the job's own error; the slot is retried on its next job
+            cls._count("start_failures")
+            logger.error(f"PDF worker {index} could not be started: {str(e)}")
+            return None
+
+    @classmethod
+    def start(cls):
+        """Idempotent; starts this process's PDF workers if not yet running."""
+        if cls._pid == os.getpid():
+            return
+
+        with cls._lock:
+            if cls._pid == os.getpid():
+                return
+
+            cls._context = multiprocessing.get_context(PDF_POOL_START_METHOD)
+            cls._idle = queue.Queue()
+            cls._workers = max(1, PDF_WORKERS)
+            cls._waiting = 0
+            cls._busy = 0
+
+            for i in range(cls._workers):
+                cls._idle.put(cls._start_worker(i) or i)
+
+            cls._pid = os.getpid()
+
+            logger.info(f"Started {cls._workers} PDF worker process(es)")
+
+    @classmethod
+    def _count(cls, name):
+        with cls._lock:
+            cls.stats[name] = cls.stats.get(name, 0) + 1
+
+    @classmethod
+    def _record_wait(cls, wait_ms):
+        with cls._lock:
+            cls.stats["total_wait_ms"] = cls.stats.get("total_wait_ms", 0.0) + wait_ms
+            cls.stats["max_wait_ms"] = max(cls.stats.get("max_wait_ms", 0.0), wait_ms)
+
+    @classmethod
+    def _record_job(cls, job_ms):
+        with cls._lock:
+            cls.stats["jobs"] = cls.stats.get("jobs", 0) + 1
+            cls.stats["total_job_ms"] = cls.stats.get("total_job_ms", 0.0) + job_ms
+            cls.stats["max_job_ms"] = max(cls.stats.get("max_job_ms", 0.0), job_ms)
+
+
+def pdf_pool_metrics():
+    with PdfParsePool._lock:
+        stats = dict(PdfParsePool.stats)
+        workers = PdfParsePool._workers if PdfParsePool._pid == os.getpid() else 0
+        waiting, busy = PdfParsePool._waiting, PdfParsePool._busy
+
+    jobs = stats.pop("jobs", 0)
+
+    return {
+        "enabled": PDF_POOL_ENABLED,
+        "workers": workers,
+        "busy": busy,
+        "queue_depth": waiting,
+        "job_timeout_s": PDF_JOB_TIMEOUT,
+        "memory_limit_mb": PDF_WORKER_MEMORY_MB,
+        "jobs": jobs,
+        "avg_job_ms": round(stats.pop("total_job_ms", 0.0) / jobs, 3) if jobs else 0.0,
+        "max_job_ms": round(stats.pop("max_job_ms", 0.0), 3),
+        "avg_wait_ms": round(stats.pop("total_wait_ms", 0.0) / jobs, 3) if jobs else 0.0,
+        "max_wait_ms": round(stats.pop("max_wait_ms", 0.0), 3),
+        **stats
+    }
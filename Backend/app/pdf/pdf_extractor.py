@@ -1,10 +1,26 @@
 import pdfplumber
+import io
+import os
 import re
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional, Tuple, Union
 import logging
 
+from app.detection.enhanced_panel_detector import EnhancedPanelDetector
+from app.stage_timing import stage_timer
+
 logger = logging.getLogger(__name__)
 
+# streaming: pages are read one at a time and reading stops once every
+# marker a panel uses is found (or after CDSS_PDF_PAGE_BUDGET pages).
+# full: every page is read.
+PDF_EXTRACTION_MODE = os.getenv("CDSS_PDF_EXTRACTION", "streaming")
+PDF_PAGE_BUDGET = int(os.getenv("CDSS_PDF_PAGE_BUDGET", "50"))
+
+# Characters of a page carried into the next one's scan, so a marker
+# split by a page break ("Glucose" | "102 mg/dL") is still matched
+PAGE_BREAK_CARRY = 256
+
 
 class PDFLabExtractor:
     """
@@ -87,71 +103,145 @@ class PDFLabExtractor:
         Extract lab values from PDF report.
         Returns dict with biomarker names as keys and numeric values.
         """
-        extracted_data = {}
-        
+        return PDFLabExtractor.extract_with_report(pdf_path)[0]
+
+    @staticmethod
+    def extract_with_report(
+        pdf_source: Union[str, bytes],
+        mode: Optional[str] = None,
+        page_budget: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Extract lab values page by page from a PDF file path or the PDF's
+        bytes (read from memory, no temp file). Returns (extracted_data, report),
+        the report giving pages parsed, why parsing stopped and per-page times.
+
+        streaming: stops once every marker a panel model uses is found, or
+        after page_budget pages (0 = no limit). A stronger pattern for an
+        already found marker, or an unsupported test, on a later page is
+        then not seen. full: every page is read.
+        """
+        mode = mode or PDF_EXTRACTION_MODE
+        page_budget = PDF_PAGE_BUDGET if page_budget is None else page_budget
+
+        if mode not in ("streaming", "full"):
+            raise ValueError(f"Unsupported PDF extraction mode: {mode}")
+
+        streaming = mode == "streaming"
+        needed = EnhancedPanelDetector.supported_markers()
+        found = {}
+        page_timings = []
+        stop_reason = "end_of_document"
+
+        if isinstance(pdf_source, (bytes, bytearray)):
+            pdf_source = io.BytesIO(pdf_source)
+
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                full_text = ""
-                
-                # Extract text from all pages
-                for page in pdf.pages:
-                    full_text += page.extract_text() + "\n"
-                
-                # Normalize text
-                full_text = full_text.lower()
-                
-                # Extract each biomarker
-                for biomarker, patterns in PDFLabExtractor.BIOMARKER_PATTERNS.items():
-                    for pattern in patterns:
-                        match = re.search(pattern, full_text, re.IGNORECASE)
-                        if match:
-                            value = match.group(1)
-                            
-                            # Handle sex conversion
-                            if biomarker == "sex":
-                                if value.lower() in ["male", "m"]:
-                                    extracted_data[biomarker] = 1
-                                elif value.lower() in ["female", "f"]:
-                                    extracted_data[biomarker] = 0
-                            else:
-                                try:
-                                    extracted_data[biomarker] = float(value)
-                                except ValueError:
-                                    logger.warning(f"Could not convert {value} to float for {biomarker}")
-                            
-                            break  # Found match, move to next biomarker
-                
-                logger.info(f"Extracted {len(extracted_data)} biomarkers from PDF")
-                return extracted_data
+            with pdfplumber.open(pdf_source) as pdf:
+                pages = pdf.pages
+                tail = ""
+
+                with stage_timer("pdf_parse"):
+                    for page in pages:
+
+                        if streaming and page_budget and len(page_timings) >= page_budget:
+                            stop_reason = "page_budget"
+                            break
+
+                        started = time.perf_counter()
+
+                        # Layout analysis: the expensive part
+                        with stage_timer("pdf_page"):
+                            text = (page.extract_text() or "").lower()
+                        page.close()
+
+                        # The previous page's tail keeps matches across a page break
+                        with stage_timer("biomarker_extraction"):
+                            PDFLabExtractor.scan_text(tail + "\n" + text if tail else text, found)
+
+                        page_timings.append(round((time.perf_counter() - started) * 1000, 3))
+                        tail = text[-PAGE_BREAK_CARRY:]
+
+                        if streaming and needed.issubset(found):
+                            stop_reason = "all_markers_found"
+                            break
+
+                extracted_data = PDFLabExtractor._convert(found)
+
+                report = {
+                    "mode": mode,
+                    "pages_total": len(pages),
+                    "pages_parsed": len(page_timings),
+                    "stop_reason": stop_reason,
+                    "page_timings_ms": page_timings
+                }
+
+                logger.info(f"Extracted {len(extracted_data)} biomarkers from {len(page_timings)}/{len(pages)} PDF pages ({stop_reason})")
+                return extracted_data, report
                 
         except Exception as e:
             logger.error(f"PDF extraction failed: {str(e)}")
             raise ValueError(f"Failed to extract data from PDF: {str(e)}")
 
     @staticmethod
+    @stage_timer("biomarker_extraction")
     def extract_from_text(text: str) -> Dict[str, Any]:
         """
         Extract lab values from plain text (for testing or manual input).
         """
-        extracted_data = {}
-        text = text.lower()
-        
-        for biomarker, patterns in PDFLabExtractor.BIOMARKER_PATTERNS.items():
-            for pattern in patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
+        return PDFLabExtractor.scan_biomarkers(text)
+
+    @staticmethod
+    def scan_biomarkers(text: str) -> Dict[str, Any]:
+        """
+        Finds every biomarker in the text. Per biomarker, the first pattern
+        (in BIOMARKER_PATTERNS order) that matches anywhere wins, at its
+        first occurrence.
+        """
+        found = {}
+        PDFLabExtractor.scan_text(text.lower(), found)
+        return PDFLabExtractor._convert(found)
+
+    @staticmethod
+    def scan_text(text: str, found: Dict[str, Tuple[int, str]]):
+        """
+        Scans one more piece of lowercased text (e.g. the next page) into
+        found = { biomarker: (pattern rank, matched value) }. Only patterns
+        ranked before the one already found are tried, so scanning pages in
+        order gives the same result as scanning the whole text once.
+        """
+        for biomarker, patterns in COMPILED_BIOMARKER_PATTERNS:
+            previous = found.get(biomarker)
+            for rank in range(previous[0] if previous else len(patterns)):
+                match = patterns[rank].search(text)
                 if match:
-                    value = match.group(1)
-                    
-                    if biomarker == "sex":
-                        if value.lower() in ["male", "m"]:
-                            extracted_data[biomarker] = 1
-                        elif value.lower() in ["female", "f"]:
-                            extracted_data[biomarker] = 0
-                    else:
-                        try:
-                            extracted_data[biomarker] = float(value)
-                        except ValueError:
-                            pass
-                    break
-        
+                    found[biomarker] = (rank, match.group(1))
+                    break  # Found match, move to next biomarker
+
+    @staticmethod
+    def _convert(found: Dict[str, Tuple[int, str]]) -> Dict[str, Any]:
+        extracted_data = {}
+
+        for biomarker, (_, value) in found.items():
+            # Handle sex conversion
+            if biomarker == "sex":
+                if value in ("male", "m"):
+                    extracted_data[biomarker] = 1
+                elif value in ("female", "f"):
+                    extracted_data[biomarker] = 0
+            else:
+                try:
+                    extracted_data[biomarker] = float(value)
+                except ValueError:
+                    logger.warning(f"Could not convert {value} to float for {biomarker}")
+
         return extracted_data
+
+
+# Compiled once. Text is lowercased before matching, so no re.IGNORECASE:
+# it would turn off the literal-prefix search that makes each scan fast
+# (one combined alternation is slower still; see benchmarks/biomarker_scan_benchmark.py)
+COMPILED_BIOMARKER_PATTERNS = [
+    (biomarker, [re.compile(pattern) for pattern in patterns])
+    for biomarker, patterns in PDFLabExtractor.BIOMARKER_PATTERNS.items()
+]
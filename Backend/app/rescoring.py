@@ -0,0 +1,287 @@
+# ============================================
+# Background Re-scoring of Stored Evaluations
+# Re-runs the panels whose stored model version
+# is not the one loaded now, in keyset-paginated
+# batches; resumable and throttled
+# ============================================
+#
+# Run with `python -m app.cli rescore` (a separate, niced process next
+# to the API). Each batch of evaluations, in id order, is re-scored per
+# panel with one route_batch call from input_payload. New results go to
+# evaluation_rescores tagged with the model version; output_result is
+# left as it was. A batch's results and the job's cursor are committed
+# together, so an interrupted job resumes after its last batch.
+
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import func
+
+from app.database.base import Base
+from app.database.engine import engine
+from app.database.session import SessionLocal
+from app.master_service import CDSSMasterRouter
+from app.models.evaluation import Evaluation
+from app.models.evaluation_rescore import EvaluationRescore
+from app.models.rescore_job import RescoreJob
+
+logger = logging.getLogger("cdss.rescore")
+
+RESCORE_BATCH_SIZE = int(os.getenv("CDSS_RESCORE_BATCH_SIZE", "200"))
+
+# Share of wall time spent scoring; the job sleeps for the rest
+RESCORE_DUTY_CYCLE = float(os.getenv("CDSS_RESCORE_DUTY_CYCLE", "0.5"))
+
+# Added to the job process's nice level (POSIX), so API workers get the CPU first
+RESCORE_NICE = int(os.getenv("CDSS_RESCORE_NICE", "10"))
+
+FAILED_STATUSES = ("execution_failed", "invalid_panel")
+
+
+class EvaluationRescorer:
+
+    @staticmethod
+    def target_versions(panels=None):
+        """{ panel: model version loaded now } for the panels to refresh."""
+
+        targets = {}
+
+        for panel in panels or list(CDSSMasterRouter.PANEL_MAP):
+            service = CDSSMasterRouter.PANEL_MAP.get(panel)
+
+            if service is None:
+                raise ValueError(f"Unsupported panel: {panel}")
+
+            version = service.current_model_version()
+
+            if not version:
+                logger.warning(f"{panel}: model metadata has no model_version, panel skipped")
+                continue
+
+            targets[panel] = version
+
+        return targets
+
+    @staticmethod
+    def stale_panels(panels_run, model_versions, targets, done=()):
+        """Panels of one evaluation not yet scored by their target version."""
+
+        model_versions = model_versions or {}
+
+        return [
+            panel for panel in panels_run or []
+            if panel in targets
+            and model_versions.get(panel) != targets[panel]
+            and (panel, targets[panel]) not in done
+        ]
+
+    @staticmethod
+    def open_job(db, targets, restart=False):
+        """
+        Latest job for these target versions, resumed from its cursor (a
+        finished one then only picks up evaluations stored since), or a new one.
+        """
+
+        if not restart:
+            for job in db.query(RescoreJob).order_by(RescoreJob.id.desc()):
+                if job.target_versions == targets:
+                    return job
+
+        # Jobs for older versions will never finish as such
+        db.query(RescoreJob)\
+            .filter(RescoreJob.status.in_(("running", "failed")))\
+            .update({"status": "superseded"}, synchronize_session=False)
+
+        job = RescoreJob(target_versions=targets, status="running", last_evaluation_id=0, scanned=0, rescored=0, failed=0)
+        db.add(job)
+        db.commit()
+        return job
+
+    @staticmethod
+    def rescore_batch(db, job, rows, targets, explain=True, defer_overrides=None):
+        """Scores the stale panels of one batch of evaluations and advances the job. Does not commit."""
+
+        ids = [row.id for row in rows]
+
+        # Already written by an earlier job (e.g. one that targeted this version of another panel)
+        done = {}
+        existing = db.query(EvaluationRescore.evaluation_id, EvaluationRescore.panel, EvaluationRescore.model_version)\
+            .filter(EvaluationRescore.evaluation_id.in_(ids))
+
+        for evaluation_id, panel, version in existing:
+            done.setdefault(evaluation_id, set()).add((panel, version))
+
+        work = {panel: [] for panel in targets}
+
+        for row in rows:
+            for panel in EvaluationRescorer.stale_panels(row.panels_run, row.model_versions, targets, done.get(row.id, ())):
+                work[panel].append(row)
+
+        rescored = failed = 0
+
+        for panel, panel_rows in work.items():
+
+            if not panel_rows:
+                continue
+
+            results = CDSSMasterRouter.route_batch(
+                [panel],
+                [row.input_payload or {} for row in panel_rows],
+                defer_overrides,
+                explain
+            )
+
+            for row, record_result in zip(panel_rows, results):
+                result = record_result[panel]
+                error = result.get("error") or (result.get("ml_result") or {}).get("error")
+
+                # Not stored: the evaluation stays stale and a later job retries it
+                if result.get("status") in FAILED_STATUSES or error:
+                    failed += 1
+                    logger.warning(f"Evaluation {row.id} / {panel}: re-scoring failed: {error}")
+                    continue
+
+                db.add(EvaluationRescore(
+                    evaluation_id=row.id,
+                    job_id=job.id,
+                    panel=panel,
+                    model_version=targets[panel],
+                    previous_model_version=(row.model_versions or {}).get(panel),
+                    result=result
+                ))
+                rescored += 1
+
+        job.last_evaluation_id = ids[-1]
+        job.scanned += len(rows)
+        job.rescored += rescored
+        job.failed += failed
+        job.updated_at = datetime.utcnow()
+
+    @staticmethod
+    def throttle(busy_seconds, duty_cycle=RESCORE_DUTY_CYCLE):
+        """Sleeps so that scoring takes at most `duty_cycle` of wall time."""
+        if 0 < duty_cycle < 1:
+            time.sleep(busy_seconds * (1 - duty_cycle) / duty_cycle)
+
+    @classmethod
+    def run(
+        cls,
+        panels=None,
+        batch_size=RESCORE_BATCH_SIZE,
+        duty_cycle=RESCORE_DUTY_CYCLE,
+        limit=None,
+        restart=False,
+        explain=True,
+        defer_overrides=None
+    ):
+        """
+        Runs (or resumes) the job for the currently loaded model versions.
+        `limit` stops after that many evaluations; the job stays resumable.
+        Returns the job's summary (see job_summary()).
+        """
+
+        Base.metadata.create_all(bind=engine, tables=[RescoreJob.__table__, EvaluationRescore.__table__])
+
+        targets = cls.target_versions(panels)
+
+        if not targets:
+            raise ValueError("No panel has a model version to re-score with")
+
+        db = SessionLocal()
+        job = None
+
+        try:
+            job = cls.open_job(db, targets, restart)
+
+            if job.status != "running":
+                job.status = "running"
+                job.error = None
+                job.finished_at = None
+                db.commit()
+
+            remaining = db.query(func.count(Evaluation.id))\
+                .filter(Evaluation.id > job.last_evaluation_id)\
+                .scalar()
+
+            logger.info(f"Job {job.id} for {targets}: {remaining} evaluations after id {job.last_evaluation_id}")
+
+            started = time.perf_counter()
+            processed = 0
+
+            while limit is None or processed < limit:
+
+                batch_started = time.perf_counter()
+
+                # Keyset page on the primary key; output_result is not loaded
+                rows = db.query(Evaluation.id, Evaluation.panels_run, Evaluation.input_payload, Evaluation.model_versions)\
+                    .filter(Evaluation.id > job.last_evaluation_id)\
+                    .order_by(Evaluation.id)\
+                    .limit(batch_size if limit is None else min(batch_size, limit - processed))\
+                    .all()
+
+                if not rows:
+                    job.status = "finished"
+                    job.finished_at = datetime.utcnow()
+                    db.commit()
+                    break
+
+                cls.rescore_batch(db, job, rows, targets, explain, defer_overrides)
+                db.commit()
+
+                processed += len(rows)
+                elapsed = time.perf_counter() - started
+
+                logger.info(
+                    f"Job {job.id}: {processed}/{remaining} evaluations "
+                    f"({processed / elapsed:.0f}/s), {job.rescored} results written, "
+                    f"{job.failed} failed, cursor {job.last_evaluation_id}"
+                )
+
+                cls.throttle(time.perf_counter() - batch_started, duty_cycle)
+
+            return cls.job_summary(job)
+
+        except Exception as e:
+            db.rollback()
+            if job is not None:
+                job.status = "failed"
+                job.error = str(e)
+                db.commit()
+            raise
+
+        finally:
+            db.close()
+
+    @staticmethod
+    def job_summary(job):
+        return {
+            "id": job.id,
+            "status": job.status,
+            "target_versions": job.target_versions,
+            "last_evaluation_id": job.last_evaluation_id,
+            "scanned": job.scanned,
+            "rescored": job.rescored,
+            "failed": job.failed,
+            "error": job.error,
+            "started_at": job.started_at,
+            "updated_at": job.updated_at,
+            "finished_at": job.finished_at,
+        }
+
+    @staticmethod
+    def jobs(limit=10):
+        """Latest jobs as dicts, newest first."""
+
+        Base.metadata.create_all(bind=engine, tables=[RescoreJob.__table__, EvaluationRescore.__table__])
+
+        db = SessionLocal()
+
+        try:
+            return [
+                EvaluationRescorer.job_summary(job)
+                for job in db.query(RescoreJob).order_by(RescoreJob.id.desc()).limit(limit)
+            ]
+        finally:
+            db.close()
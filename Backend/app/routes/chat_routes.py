@@ -10,6 +10,7 @@ from app.models.chat_session import ChatSession
 from app.models.chat_message import ChatMessage
 from app.models.evaluation import Evaluation
 from app.models.profile import Profile
+from app.stage_timing import stage_timer
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
@@ -147,7 +148,8 @@ def send_message(
     db.add(assistant_reply)
     
     try:
-        db.commit()
+        with stage_timer("db_commit"):
+            db.commit()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to store message: {str(e)}")
@@ -1,3 +1,5 @@
+import os
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
@@ -7,10 +9,18 @@ from app.database.session import SessionLocal
 from app.auth.security import verify_token
 from app.models.profile import Profile
 from app.models.evaluation import Evaluation
+from app.models.evaluation_rescore import EvaluationRescore
 from app.master_service import CDSSMasterRouter
+from app.Services.batch_runner import is_deferred
+from app.stage_timing import stage_timer
 
 router = APIRouter(prefix="/evaluate", tags=["Evaluations"])
 
+# inline: SHAP runs with every stored evaluation. deferred: it runs on the
+# first GET /evaluate/record/{id}/explain/{panel} and is stored then.
+# A request body can override this with "explain": "inline" | "deferred".
+EVALUATION_EXPLAIN = os.getenv("CDSS_EVALUATION_EXPLAIN", "inline")
+
 
 def get_db():
     db = SessionLocal()
@@ -35,6 +45,11 @@ def run_evaluation(
     
     panels = request_body.get("panels", [])
     data = request_body.get("data", {})
+    explain_mode = request_body.get("explain", EVALUATION_EXPLAIN)
+
+    if explain_mode not in ("inline", "deferred"):
+        raise HTTPException(status_code=400, detail=f"Unsupported explain mode: {explain_mode}")
+
     # Verify profile ownership
     profile = db.query(Profile).filter(Profile.id == profile_id).first()
 
@@ -45,7 +60,7 @@ def run_evaluation(
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Run panels
-    results = CDSSMasterRouter.route_multiple(panels, data)
+    results = CDSSMasterRouter.route_multiple(panels, data, explain=explain_mode == "inline")
 
     # Extract model versions safely
     model_versions = {
@@ -72,8 +87,9 @@ def run_evaluation(
         )
 
         db.add(evaluation)
-        db.commit()
-        db.refresh(evaluation)
+        with stage_timer("db_commit"):
+            db.commit()
+            db.refresh(evaluation)
         
         print(f"[DEBUG] Created evaluation ID: {evaluation.id} for profile_id: {profile_id}")
     except Exception as e:
@@ -146,6 +162,160 @@ def get_single_evaluation(
     return evaluation
 
 
+# =========================================
+# ON-DEMAND EXPLANATION (computed once, then stored)
+# =========================================
+
+@router.get("/record/{evaluation_id}/explain/{panel}")
+def explain_evaluation(
+    evaluation_id: int,
+    panel: str,
+    current_user=Depends(verify_token),
+    db: Session = Depends(get_db)
+):
+    evaluation = db.query(Evaluation)\
+        .filter(Evaluation.id == evaluation_id)\
+        .first()
+
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+
+    profile = db.query(Profile).filter(Profile.id == evaluation.profile_id).first()
+
+    if profile.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    results = evaluation.output_result or {}
+    panel_result = results.get(panel)
+
+    if not isinstance(panel_result, dict):
+        raise HTTPException(status_code=404, detail=f"Panel {panel} not in this evaluation")
+
+    explanation = panel_result.get("ml_explainability")
+
+    if explanation is not None and not is_deferred(explanation):
+        return {
+            "evaluation_id": evaluation.id,
+            "panel": panel,
+            "ml_explainability": explanation,
+            "cached": True
+        }
+
+    service = CDSSMasterRouter.PANEL_MAP.get(panel)
+
+    if service is None:
+        raise HTTPException(status_code=404, detail=f"Unsupported panel: {panel}")
+
+    # Only the model that scored this evaluation may explain it
+    stored_version = (evaluation.model_versions or {}).get(panel)
+    current_version = service.current_model_version()
+
+    if stored_version is not None and stored_version != current_version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{panel} was scored with model {stored_version}; the loaded model is {current_version}"
+        )
+
+    panel_result = dict(panel_result)
+    model_versions = evaluation.model_versions
+
+    try:
+        if is_deferred(panel_result.get("ml_result")):
+            # Rule override stored without ML: the model score is needed
+            # alongside the explanation, so the panel is run in full
+            rerun = CDSSMasterRouter.route_single(panel, evaluation.input_payload or {}, defer_overrides=False)[panel]
+
+            if rerun.get("status") == "execution_failed":
+                failure = rerun.get("error", "panel evaluation failed")
+            else:
+                failure = (rerun.get("ml_result") or {}).get("error")
+
+            panel_result["ml_result"] = rerun.get("ml_result", panel_result.get("ml_result"))
+            explanation = rerun.get("ml_explainability")
+
+            if stored_version is None:
+                # The panel's only model output now comes from the loaded model
+                model_versions = {**(model_versions or {}), panel: current_version}
+        else:
+            failure = None
+            explanation = CDSSMasterRouter.explain(panel, evaluation.input_payload or {})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Explanation failed: {str(e)}")
+
+    if failure is None:
+        if not isinstance(explanation, dict):
+            failure = "no explanation was produced"
+        else:
+            failure = explanation.get("error")
+
+    # Failures are reported, not stored, so a later request retries them
+    if failure is not None:
+        raise HTTPException(status_code=503, detail=f"Explanation failed: {failure}")
+
+    explanation = {**explanation, "model_version": current_version}
+    panel_result["ml_explainability"] = explanation
+
+    try:
+        # New dict: the JSON column only persists on reassignment
+        evaluation.output_result = {**results, panel: panel_result}
+        evaluation.model_versions = model_versions
+        with stage_timer("db_commit"):
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to store explanation: {str(e)}")
+
+    return {
+        "evaluation_id": evaluation.id,
+        "panel": panel,
+        "ml_explainability": explanation,
+        "cached": False
+    }
+
+
+# =========================================
+# RE-SCORED RESULTS (written by `python -m app.cli rescore`)
+# =========================================
+
+@router.get("/record/{evaluation_id}/rescores")
+def get_evaluation_rescores(
+    evaluation_id: int,
+    current_user=Depends(verify_token),
+    db: Session = Depends(get_db)
+):
+    evaluation = db.query(Evaluation)\
+        .filter(Evaluation.id == evaluation_id)\
+        .first()
+
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+
+    profile = db.query(Profile).filter(Profile.id == evaluation.profile_id).first()
+
+    if profile.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    rescores = db.query(EvaluationRescore)\
+        .filter(EvaluationRescore.evaluation_id == evaluation_id)\
+        .order_by(EvaluationRescore.id)\
+        .all()
+
+    return {
+        "evaluation_id": evaluation.id,
+        "model_versions": evaluation.model_versions,
+        "rescores": [
+            {
+                "panel": rescore.panel,
+                "model_version": rescore.model_version,
+                "previous_model_version": rescore.previous_model_version,
+                "created_at": rescore.created_at,
+                "result": rescore.result
+            }
+            for rescore in rescores
+        ]
+    }
+
+
 # =========================================
 # DELETE EVALUATION
 # =========================================
@@ -1,16 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import json
+import lzma
 import os
 import tempfile
-from typing import Dict, Any
+import zipfile
+import zlib
+from contextlib import nullcontext
+from typing import Dict, Any, List
 
 from app.database.session import SessionLocal
 from app.auth.security import verify_token
 from app.pdf.pdf_extractor import PDFLabExtractor
+from app.pdf.extraction_cache import PdfExtractionCache, digest_of
+from app.pdf.parse_pool import PdfParsePool, PdfPoolBusy, PdfJobTimeout, PdfJobFailed, PDF_WORKERS
 from app.detection.enhanced_panel_detector import EnhancedPanelDetector
+from app.stage_timing import stage_timer
 
 router = APIRouter(prefix="/pdf", tags=["PDF Processing"])
 
+MAX_PDF_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Room for the multipart boundaries and part headers around the PDF
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Reports per /upload-batch request, counting those inside zip archives
+PDF_BATCH_MAX_FILES = int(os.getenv("CDSS_PDF_BATCH_MAX_FILES", "100"))
+
+# Raised while reading one zip member: encrypted (RuntimeError), unsupported
+# compression, truncated or corrupt data (bzip2 reports the latter as OSError)
+ZIP_MEMBER_ERRORS = (RuntimeError, NotImplementedError, EOFError, OSError, zipfile.BadZipFile, zlib.error, lzma.LZMAError)
+
+# Reports of one batch extracted at the same time (default: one per PDF worker)
+PDF_BATCH_CONCURRENCY = int(os.getenv("CDSS_PDF_BATCH_CONCURRENCY", str(PDF_WORKERS)))
+
 
 def get_db():
     db = SessionLocal()
@@ -24,9 +53,128 @@ def get_db():
 # UPLOAD & EXTRACT PDF
 # =========================================
 
-@router.post("/upload")
+class _PdfUploadPart:
+    """
+    multipart callbacks keeping only the `file` part's bytes (in memory),
+    and noting as soon as it is not a PDF or grows past MAX_PDF_SIZE.
+    """
+
+    def __init__(self, field="file"):
+        self.field = field
+        self.filename = None
+        self.content = bytearray()
+        self.error = None
+        self._header = b""
+        self._value = b""
+        self._disposition = b""
+        self._reading = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end
+        }
+
+    def on_part_begin(self):
+        self._disposition = b""
+
+    def on_header_field(self, data, start, end):
+        self._header += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._value += data[start:end]
+
+    def on_header_end(self):
+        if self._header.lower() == b"content-disposition":
+            self._disposition = self._value
+        self._header, self._value = b"", b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+
+        self._reading = name == self.field and filename is not None and self.filename is None
+
+        if self._reading:
+            self.filename = filename.decode("utf-8", "replace")
+            # Validate file type
+            if not self.filename.endswith('.pdf'):
+                self.error = (400, "Only PDF files are supported")
+
+    def on_part_data(self, data, start, end):
+        if self._reading and self.error is None:
+            if len(self.content) + end - start > MAX_PDF_SIZE:
+                self.error = (413, "File size must be less than 10MB")
+                self.content = bytearray()
+            else:
+                self.content += memoryview(data)[start:end]
+
+    def on_part_end(self):
+        self._reading = False
+
+
+async def _read_pdf_upload(request: Request):
+    """
+    Reads the multipart body chunk by chunk as it arrives and returns
+    (filename, PDF bytes as a bytearray, one copy). An upload over 10MB (by its Content-Length, or
+    once that many bytes have arrived) or of another file type is rejected
+    at that point, without reading the rest.
+    """
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Upload the PDF as multipart/form-data in the \"file\" field")
+
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_PDF_SIZE + MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=413, detail="File size must be less than 10MB")
+
+    part = _PdfUploadPart()
+    parser = MultipartParser(params[b"boundary"], part.callbacks())
+
+    with stage_timer("pdf_upload_read"):
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if part.error:
+                    raise HTTPException(status_code=part.error[0], detail=part.error[1])
+            parser.finalize()
+        except MultipartParseError as e:
+            raise HTTPException(status_code=400, detail=f"Malformed multipart upload: {str(e)}")
+
+    if part.filename is None:
+        raise HTTPException(status_code=400, detail="No PDF file in the \"file\" field")
+
+    return part.filename, part.content
+
+
+# multipart/form-data with a "file" field, read by _read_pdf_upload
+PDF_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
+
+@router.post("/upload", openapi_extra=PDF_UPLOAD_BODY)
 async def upload_pdf(
-    file: UploadFile = File(...),
+    request: Request,
     current_user=Depends(verify_token)
 ):
     """
@@ -34,24 +182,35 @@ async def upload_pdf(
     Returns extracted data and available analyzers.
     """
     
-    # Validate file type
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are supported")
-    
-    # Check file size (max 10MB)
-    content = await file.read()
-    max_size = 10 * 1024 * 1024  # 10MB
-    if len(content) > max_size:
-        raise HTTPException(status_code=400, detail="File size must be less than 10MB")
+    # Validate file type and size (max 10MB) while the upload streams in
+    _, content = await _read_pdf_upload(request)
     
-    # Save temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-        tmp_file.write(content)
-        tmp_path = tmp_file.name
+    digest = await run_in_threadpool(digest_of, content)
+
+    # Seen before (by any worker): no parsing
+    cached = await run_in_threadpool(PdfExtractionCache.get, digest)
+    if cached is not None:
+        return _cache_hit(cached)
     
+    # Parsed from memory; no temp file
+    return await _analyze_pdf(content, digest)
+
+
+def _cache_hit(body):
+    body["extraction"]["cached"] = True
+    return body
+
+
+async def _analyze_pdf(pdf_source, digest):
+    """
+    Extraction + panel detection for one PDF (path or bytes), as returned
+    by /upload, stored in the extraction cache under the PDF's sha256
+    `digest`. Raises HTTPException on failure.
+    """
+
     try:
-        # Extract data from PDF
-        extracted_data = PDFLabExtractor.extract_from_pdf(tmp_path)
+        # Extract data from PDF in a worker process; this thread waits, the event loop does not
+        extracted_data, extraction_report = await run_in_threadpool(PdfParsePool.extract_with_report, pdf_source)
         
         if not extracted_data:
             raise HTTPException(
@@ -62,22 +221,171 @@ async def upload_pdf(
         # Detect available panels
         detection_result = EnhancedPanelDetector.detect_available_panels(extracted_data)
         
-        return {
+        body = {
             "success": True,
             "message": f"Extracted {detection_result['total_tests_found']} test results",
             "extracted_data": detection_result["extracted_data"],
             "available_panels": detection_result["available_panels"],
             "panel_details": detection_result["panel_details"],
-            "unsupported_tests": detection_result["unsupported_tests"]
+            "unsupported_tests": detection_result["unsupported_tests"],
+            "extraction": {**extraction_report, "cached": False}
         }
+
+        await run_in_threadpool(PdfExtractionCache.put, digest, body)
+
+        return body
         
+    except HTTPException:
+        raise
+
+    except PdfPoolBusy as e:
+        raise HTTPException(status_code=503, detail=f"PDF processing is busy, try again later: {str(e)}")
+
+    except (PdfJobTimeout, PdfJobFailed) as e:
+        raise HTTPException(status_code=422, detail=f"PDF could not be processed: {str(e)}")
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF processing failed: {str(e)}")
-    
-    finally:
-        # Clean up temp file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+
+
+# =========================================
+# BULK UPLOAD (NDJSON STREAM)
+# =========================================
+
+def _collect_batch(files):
+    """
+    Saves every PDF of the upload (zip archives expanded) to temp files.
+    Returns [(filename, path or None, sha256 digest, error or None)] in
+    upload order; a file that cannot be used gets an error instead of a path.
+    """
+
+    reports = []
+
+    def add(name, size, open_source, unreadable=(), error=None):
+        if len(reports) >= PDF_BATCH_MAX_FILES:
+            raise HTTPException(status_code=400, detail=f"At most {PDF_BATCH_MAX_FILES} reports per batch")
+        if error is None and size > MAX_PDF_SIZE:
+            error = "File size must be less than 10MB"
+        if error is not None:
+            reports.append((name, None, None, error))
+            return
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+            reports.append((name, tmp_file.name, digest, None))
+            try:
+                with open_source() as source:
+                    while True:
+                        chunk = source.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        tmp_file.write(chunk)
+            except unreadable as e:
+                error = e
+            else:
+                return
+        # Only this report fails; the rest of the batch goes ahead
+        os.unlink(tmp_file.name)
+        reports[-1] = (name, None, None, f"Could not read from the archive: {str(error)}")
+
+    try:
+        for upload in files:
+            name = upload.filename or ""
+
+            if name.lower().endswith(".pdf"):
+                upload.file.seek(0)
+                add(name, upload.size or 0, lambda: nullcontext(upload.file))
+
+            elif name.lower().endswith(".zip"):
+                try:
+                    archive = zipfile.ZipFile(upload.file)
+                except zipfile.BadZipFile:
+                    reports.append((name, None, None, "Not a valid zip archive"))
+                    continue
+
+                with archive:
+                    for member in archive.infolist():
+                        if member.is_dir() or not member.filename.lower().endswith(".pdf"):
+                            continue
+                        # Size from the archive directory; reads stop there, so it cannot be exceeded
+                        add(
+                            f"{name}/{member.filename}",
+                            member.file_size,
+                            lambda: archive.open(member),
+                            ZIP_MEMBER_ERRORS,
+                            error="Encrypted archive members are not supported" if member.flag_bits & 0x1 else None
+                        )
+
+            else:
+                reports.append((name, None, None, "Only PDF files and zip archives of PDFs are supported"))
+
+    except BaseException:
+        for _, path, _, _ in reports:
+            if path and os.path.exists(path):
+                os.unlink(path)
+        raise
+
+    return [(name, path, digest and digest.hexdigest(), error) for name, path, digest, error in reports]
+
+
+@router.post("/upload-batch")
+async def upload_pdf_batch(
+    files: List[UploadFile] = File(...),
+    current_user=Depends(verify_token)
+):
+    """
+    Upload several PDF lab reports, or zip archives of them, in one request.
+    Reports are extracted in parallel and streamed back as NDJSON, one line
+    per report in the order they finish: "index" (position in the upload,
+    archive members in archive order), "filename", and either the /upload
+    response or "success": false with "status_code" and "detail".
+    """
+
+    reports = await run_in_threadpool(_collect_batch, files)
+
+    if not reports:
+        raise HTTPException(status_code=400, detail="No PDF files in the upload")
+
+    semaphore = asyncio.Semaphore(max(1, PDF_BATCH_CONCURRENCY))
+
+    async def analyze(index, filename, path, digest, error):
+        line = {"index": index, "filename": filename}
+
+        if error:
+            return {**line, "success": False, "status_code": 400, "detail": error}
+
+        try:
+            cached = await run_in_threadpool(PdfExtractionCache.get, digest)
+            if cached is not None:
+                return {**line, **_cache_hit(cached)}
+
+            async with semaphore:
+                return {**line, **(await _analyze_pdf(path, digest))}
+        except HTTPException as e:
+            return {**line, "success": False, "status_code": e.status_code, "detail": e.detail}
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    async def stream():
+        tasks = [
+            asyncio.ensure_future(analyze(index, filename, path, digest, error))
+            for index, (filename, path, digest, error) in enumerate(reports)
+        ]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+
+        finally:
+            # Client gone or stream finished: stop what is left, drop its files
+            for task in tasks:
+                task.cancel()
+            for _, path, _, _ in reports:
+                if path and os.path.exists(path):
+                    os.unlink(path)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 # =========================================
@@ -0,0 +1,177 @@
+# ============================================
+# Preload-then-Fork Server Launcher
+# Loads every panel once in a master process,
+# then forks uvicorn workers that share the
+# model and explainer memory copy-on-write
+# ============================================
+#
+# Usage (from the Backend folder, Linux/macOS):
+#   python -m app.serve --host 0.0.0.0 --port 8000 --workers 4
+#
+# --workers defaults to $WEB_CONCURRENCY (or 1). Pass --no-preload to
+# fork first and let every worker load its own copy (the old behaviour,
+# useful for comparing memory). `uvicorn --workers` cannot share models:
+# it starts workers with spawn, so each one imports and loads everything.
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+logger = logging.getLogger("cdss.serve")
+
+# A worker that dies sooner than this after start is respawned with a delay
+RESPAWN_BACKOFF_SECONDS = 1.0
+
+
+def preload():
+    """
+    Imports the app and warms every panel (models, compiled engines,
+    SHAP explainers) in this process so forked workers inherit them.
+    """
+
+    from app.main import app
+    from app.ml.inference_server import scoring_in_process
+    from app.warmup import PanelWarmup
+
+    started = time.perf_counter()
+
+    # Inference server processes (if enabled) are started per worker, not here
+    with scoring_in_process():
+        PanelWarmup.warm_all()
+
+    logger.info(f"Preloaded all panels in {time.perf_counter() - started:.2f}s")
+
+    # Keep the collector from touching (and so copying) every inherited object
+    gc.collect()
+    gc.freeze()
+
+    return app
+
+
+def bind_socket(host, port, backlog=2048):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, log_level):
+    """Entry point of a forked worker; never returns."""
+
+    exit_code = 0
+
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        from app.database.engine import engine
+
+        # Pooled DB connections opened by the master must not be shared
+        engine.dispose(close=False)
+
+        if app is None:
+            from app.main import app
+
+        config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+        uvicorn.Server(config).run(sockets=[sock])
+
+    except Exception:
+        logger.exception(f"Worker {os.getpid()} crashed")
+        exit_code = 1
+
+    finally:
+        os._exit(exit_code)
+
+
+class WorkerSupervisor:
+    """Forks the workers, respawns any that exit, and stops them all on SIGTERM/SIGINT."""
+
+    def __init__(self, app, sock, workers, log_level):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+
+        if pid == 0:
+            run_worker(self.app, self.sock, self.log_level)
+
+        self.children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+
+            started_at = self.children.pop(pid, None)
+            if started_at is None or self.stopping:
+                continue
+
+            logger.warning(f"Worker {pid} exited with status {status}; respawning")
+
+            if time.monotonic() - started_at < RESPAWN_BACKOFF_SECONDS:
+                time.sleep(RESPAWN_BACKOFF_SECONDS)
+
+            if not self.stopping:
+                self.spawn()
+
+        self.sock.close()
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Run the CDSS API with preloaded, fork-shared models.")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-preload", action="store_true", help="Fork first; every worker loads its own models")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        sys.exit("app.serve needs os.fork(); on Windows run `uvicorn app.main:app` instead.")
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s:     %(message)s")
+
+    app = None if args.no_preload else preload()
+    sock = bind_socket(args.host, args.port)
+
+    logger.info(f"Serving on {args.host}:{args.port} with {args.workers} worker(s), preload={'off' if args.no_preload else 'on'}")
+
+    WorkerSupervisor(app, sock, max(1, args.workers), args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# ============================================
+# Per-Stage Latency Instrumentation
+# Timers around each pipeline stage (PDF parse,
+# extraction, detection, rules, ML, SHAP, DB, LLM),
+# aggregated into histograms for /metrics and
+# listed per request in a Server-Timing header
+# ============================================
+#
+# Metrics live in the process that served the request; with
+# WEB_CONCURRENCY > 1 every worker exposes its own counters.
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+STAGE_TIMING_ENABLED = os.getenv("CDSS_STAGE_TIMING", "1") != "0"
+
+# Histogram upper bounds, seconds (sub-millisecond stages up to the LLM call)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# (name, seconds) of every stage timed while serving the current request
+_request_timings = ContextVar("cdss_request_timings", default=None)
+
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics). Not locked."""
+
+    __slots__ = ("buckets", "total", "count", "errors")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds, failed=False):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if failed:
+            self.errors += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.buckets):
+            running += count
+            yield bound, running
+
+
+class StageMetrics:
+    """Process-wide stage and HTTP request histograms."""
+
+    _lock = threading.Lock()
+    _stages = {}
+    _requests = {}
+
+    @classmethod
+    def record_stage(cls, stage, panel, seconds, failed=False):
+        key = (stage, panel)
+        with cls._lock:
+            histogram = cls._stages.get(key)
+            if histogram is None:
+                histogram = cls._stages[key] = LatencyHistogram()
+            histogram.observe(seconds, failed)
+
+    @classmethod
+    def record_request(cls, method, route, status, seconds):
+        key = (method, route, str(status))
+        with cls._lock:
+            histogram = cls._requests.get(key)
+            if histogram is None:
+                histogram = cls._requests[key] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._stages.clear()
+            cls._requests.clear()
+
+    @classmethod
+    def snapshot(cls):
+        """{ "stage|panel": {count, errors, total_seconds} }, for scripts and benchmarks."""
+        with cls._lock:
+            return {
+                f"{stage}|{panel}": {"count": h.count, "errors": h.errors, "total_seconds": h.total}
+                for (stage, panel), h in cls._stages.items()
+            }
+
+    @classmethod
+    def prometheus(cls):
+        """Prometheus text exposition format (version 0.0.4)."""
+
+        lines = []
+
+        with cls._lock:
+            stages = sorted(cls._stages.items())
+            requests = sorted(cls._requests.items())
+
+            lines.append("# HELP cdss_stage_duration_seconds Time spent in one pipeline stage.")
+            lines.append("# TYPE cdss_stage_duration_seconds histogram")
+            for (stage, panel), histogram in stages:
+                _histogram_lines(lines, "cdss_stage_duration_seconds", {"stage": stage, "panel": panel}, histogram)
+
+            lines.append("# HELP cdss_stage_errors_total Pipeline stages that raised.")
+            lines.append("# TYPE cdss_stage_errors_total counter")
+            for (stage, panel), histogram in stages:
+                lines.append(f"cdss_stage_errors_total{_labels({'stage': stage, 'panel': panel})} {histogram.errors}")
+
+            lines.append("# HELP cdss_http_request_duration_seconds HTTP request latency by route template.")
+            lines.append("# TYPE cdss_http_request_duration_seconds histogram")
+            for (method, route, status), histogram in requests:
+                _histogram_lines(
+                    lines,
+                    "cdss_http_request_duration_seconds",
+                    {"method": method, "route": route, "status": status},
+                    histogram
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(lines, name, labels, histogram):
+    for bound, count in histogram.cumulative():
+        lines.append(f"{name}_bucket{_labels(dict(labels, le=bound))} {count}")
+    lines.append(f"{name}_sum{_labels(labels)} {histogram.total:.9f}")
+    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+
+class stage_timer:
+    """
+    Times one stage: `with stage_timer("ml", "cardio"): ...`
+    Also usable as a decorator. Costs about a microsecond per stage.
+    """
+
+    __slots__ = ("stage", "panel", "_started")
+
+    def __init__(self, stage, panel=""):
+        self.stage = stage
+        self.panel = panel
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not STAGE_TIMING_ENABLED:
+            return False
+
+        elapsed = time.perf_counter() - self._started
+        StageMetrics.record_stage(self.stage, self.panel, elapsed, exc_type is not None)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            # list.append is atomic, so panel threads can share the list
+            timings.append((f"{self.panel}.{self.stage}" if self.panel else self.stage, elapsed))
+
+        return False
+
+    def __call__(self, function):
+        stage, panel = self.stage, self.panel
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            with stage_timer(stage, panel):
+                return function(*args, **kwargs)
+
+        return timed
+
+
+def begin_request():
+    """Starts collecting this request's stages. Returns the token for end_request()."""
+    return _request_timings.set([])
+
+
+def end_request(token):
+    """Stops collecting; returns the request's [(name, seconds), ...]."""
+    timings = _request_timings.get()
+    _request_timings.reset(token)
+    return timings or []
+
+
+def record_timings(timings):
+    """
+    Records [(name, seconds), ...] timed in another process (e.g. a PDF
+    worker) as if they ran here: in the histograms and this request's list.
+    """
+
+    if not STAGE_TIMING_ENABLED:
+        return
+
+    current = _request_timings.get()
+
+    for name, seconds in timings:
+        panel, _, stage = name.rpartition(".")
+        StageMetrics.record_stage(stage, panel, seconds)
+        if current is not None:
+            current.append((name, seconds))
+
+
+def server_timing(timings, total_seconds=None):
+    """
+    Server-Timing header value. Repeated stages (e.g. one per panel
+    in a batch) are summed; names keep the order they first ran in.
+    """
+
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+
+    entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items()]
+
+    if total_seconds is not None:
+        entries.append(f"total;dur={total_seconds * 1000:.3f}")
+
+    return ", ".join(entries)
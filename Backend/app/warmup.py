@@ -0,0 +1,88 @@
+# ============================================
+# Startup Warm-Up
+# Loads every panel's artifacts in parallel and
+# tracks per-panel readiness for /ready
+# ============================================
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.master_service import CDSSMasterRouter
+
+logger = logging.getLogger(__name__)
+
+EAGER_WARMUP = os.getenv("CDSS_EAGER_WARMUP", "1") != "0"
+
+STATE_PENDING = "pending"
+STATE_WARMING = "warming"
+STATE_WARM = "warm"
+STATE_FAILED = "failed"
+
+
+class PanelWarmup:
+    """Runs and records the warm-up of every panel in CDSSMasterRouter.PANEL_MAP."""
+
+    _lock = threading.Lock()
+    _state = {
+        panel: {"state": STATE_PENDING, "load_seconds": None, "error": None}
+        for panel in CDSSMasterRouter.PANEL_MAP
+    }
+
+    @classmethod
+    def _set(cls, panel, **fields):
+        with cls._lock:
+            cls._state[panel].update(fields)
+
+    @classmethod
+    def warm_panel(cls, panel_name: str):
+
+        service = CDSSMasterRouter.PANEL_MAP[panel_name]
+        cls._set(panel_name, state=STATE_WARMING)
+        start = time.perf_counter()
+
+        try:
+            service.warm_up()
+            cls._set(panel_name, state=STATE_WARM, load_seconds=round(time.perf_counter() - start, 3), error=None)
+            logger.info(f"{panel_name} panel warm in {time.perf_counter() - start:.2f}s")
+
+        except Exception as e:
+            cls._set(panel_name, state=STATE_FAILED, load_seconds=round(time.perf_counter() - start, 3), error=str(e))
+            logger.error(f"{panel_name} panel warm-up failed: {str(e)}")
+
+    @classmethod
+    def warm_all(cls):
+        """Warms all panels concurrently and blocks until every one has finished."""
+
+        with ThreadPoolExecutor(max_workers=len(CDSSMasterRouter.PANEL_MAP), thread_name_prefix="warmup") as pool:
+            list(pool.map(cls.warm_panel, CDSSMasterRouter.PANEL_MAP))
+
+    @classmethod
+    def start_background(cls):
+        """Kicks off warm_all without delaying server start-up."""
+
+        thread = threading.Thread(target=cls.warm_all, name="panel-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    @classmethod
+    def finished(cls):
+        """True once every panel is warm or has failed (e.g. preloaded before fork)."""
+        with cls._lock:
+            return all(p["state"] in (STATE_WARM, STATE_FAILED) for p in cls._state.values())
+
+    @classmethod
+    def status(cls):
+        with cls._lock:
+            panels = {panel: dict(state) for panel, state in cls._state.items()}
+
+        finished = all(p["state"] in (STATE_WARM, STATE_FAILED) for p in panels.values())
+
+        return {
+            # With eager warm-up off, panels load lazily and never block readiness
+            "ready": finished or not EAGER_WARMUP,
+            "degraded": any(p["state"] == STATE_FAILED for p in panels.values()),
+            "panels": panels
+        }
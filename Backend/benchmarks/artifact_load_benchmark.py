@@ -0,0 +1,118 @@
+# ============================================
+# Model Artifact Load Benchmark
+# joblib pickles vs native bundles (UBJ boosters,
+# JSON sidecar, memory-mapped node arrays)
+#
+# Each format is measured in a fresh interpreter:
+#   python benchmarks/artifact_load_benchmark.py
+# ============================================
+
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORMATS = ["pickle", "native"]
+RUNS = 5
+
+
+def read_rss():
+    """Resident set in MB: total, anonymous (private heap), file-backed."""
+
+    fields = {}
+
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0]) / 1024
+
+    return fields.get("VmRSS", 0.0), fields.get("RssAnon", 0.0), fields.get("RssFile", 0.0)
+
+
+def child():
+    # Library imports are the same for both formats (xgboost itself
+    # imports sklearn); keep them out of the measured window
+    import numpy as np
+
+    sys.path.insert(0, BASE_DIR)
+
+    from app.ml.cardio_model_loader import CardioModelLoader
+    from app.ml.kidney_model_loader import KidneyModelLoader
+    from app.ml.diabetes_model_loader import DiabetesModelLoader
+
+    rss_before, anon_before, file_before = read_rss()
+
+    started = time.perf_counter()
+
+    for loader in (CardioModelLoader, KidneyModelLoader):
+        loader.load_metadata()
+        loader.load_model()
+        loader.load_compiled_model()
+        loader.load_explainer_model()
+
+    DiabetesModelLoader.load_metadata()
+    DiabetesModelLoader.load_explainer_model()
+
+    load_ms = (time.perf_counter() - started) * 1000
+
+    # First request touches the (lazily paged-in) node arrays
+    started = time.perf_counter()
+    row = np.zeros((1, len(CardioModelLoader.load_metadata()["features"])))
+    CardioModelLoader.load_compiled_model().predict_proba(row)
+    first_predict_ms = (time.perf_counter() - started) * 1000
+
+    rss, anon, file_backed = read_rss()
+
+    print(
+        f"{load_ms:.2f} {first_predict_ms:.3f} {rss - rss_before:.2f} "
+        f"{anon - anon_before:.2f} {file_backed - file_before:.2f}"
+    )
+
+
+def measure(model_format):
+
+    env = dict(os.environ, CDSS_MODEL_FORMAT=model_format, PYTHONWARNINGS="ignore")
+    runs = []
+
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            env=env,
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip().splitlines()[-1].split()
+
+        runs.append(output)
+
+    # Median over runs for timings; memory is stable between runs
+    runs.sort(key=lambda r: float(r[0]))
+    return runs[len(runs) // 2]
+
+
+def main():
+
+    print("=" * 74)
+    print(f"{'Format':<8} {'Load (ms)':>10} {'1st predict (ms)':>17} {'RSS +MB':>9} "
+          f"{'Private +MB':>12} {'File +MB':>10}")
+    print("-" * 74)
+
+    for model_format in FORMATS:
+        load_ms, first_ms, rss, anon, file_backed = measure(model_format)
+        print(f"{model_format:<8} {load_ms:>10} {first_ms:>17} {rss:>9} {anon:>12} {file_backed:>10}")
+
+    print("=" * 74)
+    print("Load = metadata, model, compiled engine and SHAP model for every panel")
+    print("(library imports excluded). Memory columns are growth during the load;")
+    print("file-backed pages come from the page cache and are shared between processes.")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
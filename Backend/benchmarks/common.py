@@ -0,0 +1,118 @@
+# ============================================
+# Shared helpers for benchmark scripts
+# Run scripts from the Backend folder:
+#   python benchmarks/<script>.py
+# ============================================
+
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "Data_set")
+
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+
+def load_cardio_dataset():
+    """
+    Cardiovascular_Dataset.csv with the same median fill and
+    clinical feature engineering as train_cardio_model_calibrated.py.
+    """
+
+    df = pd.read_csv(os.path.join(DATA_DIR, "Cardiovascular_Dataset.csv"))
+
+    for col in df.columns:
+        if df[col].isnull().sum() > 0:
+            df[col] = df[col].fillna(df[col].median())
+
+    df["pulse_pressure"] = df["sysBP"] - df["diaBP"]
+    df["mean_arterial_pressure"] = (2 * df["diaBP"] + df["sysBP"]) / 3
+    df["chol_age_interaction"] = df["totChol"] * df["age"]
+    df["smoking_intensity"] = df["cigsPerDay"] * df["currentSmoker"]
+    df["bmi_age_interaction"] = df["BMI"] * df["age"]
+    df["is_elderly"] = (df["age"] >= 60).astype(int)
+    df["is_stage2_htn"] = (df["sysBP"] >= 140).astype(int)
+
+    return df
+
+
+def load_kidney_dataset():
+    """
+    kidney_Dataset.csv renamed to the API feature names used by the model.
+    """
+
+    df = pd.read_csv(os.path.join(DATA_DIR, "kidney_Dataset.csv"))
+
+    df = df.rename(columns={
+        "sc": "serum_creatinine",
+        "bu": "blood_urea"
+    })
+    df[["serum_creatinine", "blood_urea", "age"]] = df[["serum_creatinine", "blood_urea", "age"]].fillna(0)
+
+    return df
+
+
+def time_call(fn, repeat=50):
+    """Returns the median wall-clock latency of fn() in milliseconds."""
+
+    fn()  # warm-up
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return float(np.median(timings))
+
+
+def start_api_server(tmp, **settings):
+    """
+    uvicorn app.main:app on a free local port, with its own database in
+    `tmp` and extra environment `settings`. Returns (process, base URL).
+    """
+
+    import httpx
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    env = dict(
+        os.environ,
+        PYTHONWARNINGS="ignore",
+        DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        **settings
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        cwd=BASE_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    for _ in range(600):
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return server, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+    server.kill()
+    raise SystemExit("Server did not start")
+
+
+def login(client):
+    """Registers (if needed) and logs in a benchmark user on an httpx client."""
+    client.post("/auth/register", json={"email": "bench@cdss.local", "password": "benchmark"})
+    token = client.post("/auth/login", json={"email": "bench@cdss.local", "password": "benchmark"}).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
@@ -0,0 +1,98 @@
+# ============================================
+# Compiled Tree Engine - Parity + Latency
+# Compares app.ml.compiled_trees against the
+# pickled sklearn predict_proba on Data_set/*.csv
+# (always the pickles, whatever CDSS_MODEL_FORMAT)
+# ============================================
+
+import warnings
+
+import joblib
+import numpy as np
+
+from common import load_cardio_dataset, load_kidney_dataset, time_call
+
+from app.ml import cardio_model_loader, kidney_model_loader
+from app.ml.cardio_model_loader import CardioModelLoader
+from app.ml.kidney_model_loader import KidneyModelLoader
+from app.ml.compiled_trees import CompiledCalibratedModel
+from app.ml.feature_encoder import FeatureEncoder
+
+warnings.filterwarnings("ignore")
+
+PARITY_TOLERANCE = 1e-5
+
+
+def sample_rows(X, n):
+    rng = np.random.default_rng(42)
+    return X[rng.integers(0, len(X), size=n)]
+
+
+def with_missing(df, features, every=5):
+    """
+    FeatureEncoder rows for dataset records with one feature sent as
+    None every `every` rows, as the frontend sends an empty field.
+    """
+
+    records = df[features].to_dict("records")[:500]
+
+    for i, record in enumerate(records[::every]):
+        record[features[i % len(features)]] = None
+
+    return FeatureEncoder(features).encode(records).values
+
+
+def report(panel, model, X, X_missing):
+
+    served = CompiledCalibratedModel.from_sklearn(model)
+
+    # Pure NumPy traversal, without the large-batch hand-off to XGBoost
+    compiled = CompiledCalibratedModel(served.members)
+
+    # ===============================
+    # Parity
+    # ===============================
+
+    deviation = float(np.abs(
+        compiled.predict_proba(X)[:, 1] - model.predict_proba(X)[:, 1]
+    ).max())
+
+    missing_deviation = float(np.abs(
+        compiled.predict_proba(X_missing)[:, 1] - model.predict_proba(X_missing)[:, 1]
+    ).max())
+
+    print(f"\n{panel} ({len(X)} dataset rows)")
+    print(f"  Max |p_compiled - p_sklearn|: {deviation:.2e}")
+    print(f"  Same, {len(X_missing)} rows with None values: {missing_deviation:.2e}")
+
+    assert np.isnan(X_missing).any(), f"{panel}: None was not encoded as NaN"
+    assert deviation < PARITY_TOLERANCE, f"{panel} parity check failed"
+    assert missing_deviation < PARITY_TOLERANCE, f"{panel} parity check failed on missing values"
+
+    # ===============================
+    # Latency
+    # ===============================
+
+    single = X[:1]
+    batch = sample_rows(X, 1000)
+
+    print(f"  {'':<12}{'sklearn (ms)':>14}{'compiled (ms)':>15}{'served (ms)':>13}")
+
+    for label, rows, repeat in [("1 row", single, 50), ("1000 rows", batch, 10)]:
+        print(f"  {label:<12}"
+              f"{time_call(lambda: model.predict_proba(rows), repeat):>14.3f}"
+              f"{time_call(lambda: compiled.predict_proba(rows), repeat):>15.3f}"
+              f"{time_call(lambda: served.predict_proba(rows), repeat):>13.3f}")
+
+
+cardio_df = load_cardio_dataset()
+cardio_features = CardioModelLoader.load_metadata()["features"]
+report("Cardiovascular", joblib.load(cardio_model_loader.MODEL_FILE), cardio_df[cardio_features].to_numpy(dtype=np.float64),
+       with_missing(cardio_df, cardio_features))
+
+kidney_df = load_kidney_dataset()
+kidney_features = KidneyModelLoader.load_metadata()["features"]
+report("Kidney", joblib.load(kidney_model_loader.MODEL_FILE), kidney_df[kidney_features].to_numpy(dtype=np.float64),
+       with_missing(kidney_df, kidney_features))
+
+print("\nParity OK")
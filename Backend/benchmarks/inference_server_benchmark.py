@@ -0,0 +1,108 @@
+# ============================================
+# Inference Server Benchmark
+# Concurrent single-patient predictions scored
+# in-process vs through the micro-batching
+# inference server (CDSS_INFERENCE_SERVER=1)
+#
+#   python benchmarks/inference_server_benchmark.py
+# ============================================
+
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from common import BASE_DIR, load_cardio_dataset
+
+THREADS = 32
+REQUESTS = 2000
+
+# Concurrent API threads also spend GIL time on this between predictions
+RESPONSE_PAYLOAD = {"findings": ["Borderline High Cholesterol"] * 20, "values": list(range(200))}
+
+
+def child():
+    from app.ml.cardio_predictor import CardioPredictor
+    from app.ml.inference_server import InferenceClient, INFERENCE_SERVER_ENABLED, inference_metrics
+
+    records = load_cardio_dataset().sample(REQUESTS, replace=True, random_state=42).to_dict("records")
+
+    # Start-up (process spawn, model load) is not part of the measurement
+    if INFERENCE_SERVER_ENABLED:
+        InferenceClient.start()
+    CardioPredictor.predict(records[0])
+
+    def handle(record):
+        started = time.perf_counter()
+        result = CardioPredictor.predict(record)
+        json.dumps(dict(RESPONSE_PAYLOAD, result=result))
+        return (time.perf_counter() - started) * 1000, result["probability"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        outcomes = list(pool.map(handle, records))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _ in outcomes])
+    batches = inference_metrics()["panels"].get("Cardiovascular", {}).get("avg_batch_size", 1.0)
+
+    print(json.dumps({
+        "throughput": REQUESTS / elapsed,
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "avg_batch": batches,
+        "probabilities": [probability for _, probability in outcomes]
+    }))
+
+
+def measure(server):
+
+    env = dict(
+        os.environ,
+        PYTHONWARNINGS="ignore",
+        CDSS_INFERENCE_SERVER="1" if server else "0",
+        # Every request must reach the model
+        CDSS_PREDICTION_CACHE_SIZE="0"
+    )
+
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        env=env,
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.strip().splitlines()[-1]
+
+    return json.loads(output)
+
+
+def main():
+
+    inline = measure(server=False)
+    served = measure(server=True)
+
+    assert inline["probabilities"] == served["probabilities"], "Inference server changed predictions"
+
+    print("=" * 66)
+    print(f"Cardiovascular, {THREADS} threads, {REQUESTS} single-patient requests")
+    print(f"{'Mode':<18} {'req/s':>9} {'p50 (ms)':>10} {'p99 (ms)':>10} {'avg batch':>11}")
+    print("-" * 66)
+
+    for label, result in [("in-process", inline), ("inference server", served)]:
+        print(f"{label:<18} {result['throughput']:>9.0f} {result['p50']:>10.2f} "
+              f"{result['p99']:>10.2f} {result['avg_batch']:>11.2f}")
+
+    print("=" * 66)
+    print("Predictions identical in both modes.")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+    else:
+        main()
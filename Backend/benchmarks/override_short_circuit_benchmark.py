@@ -0,0 +1,105 @@
+# ============================================
+# Override Short-Circuit Benchmark
+# How many evaluations end in an authoritative
+# rule override, and the ML + SHAP time saved by
+# deferring them (CDSS_OVERRIDE_POLICY=defer)
+#
+#   python benchmarks/override_short_circuit_benchmark.py
+# ============================================
+
+import os
+import time
+import warnings
+
+# Every evaluation must reach the models, one request at a time
+os.environ["CDSS_PREDICTION_CACHE_SIZE"] = "0"
+os.environ["CDSS_SHAP_BATCHING"] = "0"
+
+from common import BASE_DIR, load_cardio_dataset, load_kidney_dataset
+
+from app.master_service import CDSSMasterRouter
+from app.pdf.pdf_extractor import PDFLabExtractor
+from app.Services.batch_runner import DEFERRED_STATUS
+
+warnings.filterwarnings("ignore")
+
+SAMPLE_DIR = os.path.join(BASE_DIR, "sample_pdfs")
+
+
+def sample_records():
+    return [
+        PDFLabExtractor.extract_from_pdf(os.path.join(SAMPLE_DIR, name))
+        for name in sorted(os.listdir(SAMPLE_DIR))
+        if name.endswith(".pdf")
+    ]
+
+
+CASES = [
+    ("sample_pdfs", list(CDSSMasterRouter.PANEL_MAP), sample_records()),
+    ("Cardiovascular_Dataset", ["Cardiovascular"], load_cardio_dataset().to_dict("records")),
+    ("kidney_Dataset", ["Kidney"], load_kidney_dataset().to_dict("records")),
+]
+
+
+def run_single(service, records, defer):
+    results = []
+    started = time.perf_counter()
+
+    for record in records:
+        try:
+            results.append(service.evaluate(record, defer))
+        except Exception as e:
+            # Same isolation as the router (e.g. a panel whose model is missing)
+            results.append({"status": "execution_failed", "error": str(e)})
+
+    return results, (time.perf_counter() - started) * 1000
+
+
+def best_ms(fn, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+for panel, service in CDSSMasterRouter.PANEL_MAP.items():
+    try:
+        service.warm_up()
+    except Exception as e:
+        print(f"{panel} unavailable: {str(e)}")
+
+print("=" * 100)
+print(f"{'Cases':<24}{'Panel':<16}{'records':>8}{'deferred':>10}{'failed':>8}"
+      f"{'all, full (ms)':>16}{'saved (ms)':>12}{'saved':>8}")
+print("-" * 100)
+
+for label, panels, records in CASES:
+    for panel in panels:
+        service = CDSSMasterRouter.PANEL_MAP[panel]
+
+        results, _ = run_single(service, records, True)
+
+        overridden = [
+            record for record, result in zip(records, results)
+            if result.get("ml_result", {}).get("status") == DEFERRED_STATUS
+        ]
+        failed = sum(result.get("status") == "execution_failed" for result in results)
+
+        # ML + SHAP the deferred records no longer pay for
+        total_ms = best_ms(lambda: run_single(service, records, False))
+        saved_ms = best_ms(lambda: run_single(service, overridden, False)) - best_ms(lambda: run_single(service, overridden, True))
+
+        if failed:
+            # Full evaluations fail fast, so there is no ML time to compare
+            print(f"{label:<24}{panel:<16}{len(records):>8}{len(overridden):>10}{failed:>8}{'n/a':>16}{'n/a':>12}{'n/a':>8}")
+            continue
+
+        print(f"{label:<24}{panel:<16}{len(records):>8}{len(overridden):>10}{failed:>8}"
+              f"{total_ms:>16.1f}{saved_ms:>12.1f}{saved_ms / total_ms:>8.1%}")
+
+print("=" * 100)
+print("deferred: authoritative rule overrides, which skip ML + SHAP (CDSS_OVERRIDE_POLICY=defer).")
+print("saved: evaluate() time of those records with ML + SHAP minus without, one request at a time.")
+print("failed: errors with deferral on (Diabetes has no calibrated model in this tree).")
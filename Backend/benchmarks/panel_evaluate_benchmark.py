@@ -0,0 +1,47 @@
+# ============================================
+# Panel Evaluate Benchmark
+# HybridService.evaluate (1 patient) and
+# evaluate_batch (BATCH patients) latency, rules
+# + ML + SHAP, with every result cache and the
+# SHAP batcher disabled
+#
+#   python benchmarks/panel_evaluate_benchmark.py
+# ============================================
+
+import os
+import warnings
+
+# Every evaluation must reach the models, one request at a time
+os.environ["CDSS_PREDICTION_CACHE_SIZE"] = "0"
+os.environ["CDSS_SHAP_BATCHING"] = "0"
+
+from common import load_cardio_dataset, load_kidney_dataset, time_call
+
+from app.Services.cardio_hybrid_service import CardioHybridService
+from app.Services.kidney_hybrid_service import KidneyHybridService
+
+warnings.filterwarnings("ignore")
+
+REPEAT = 500
+BATCH = 256
+
+PANELS = [
+    ("Cardiovascular", CardioHybridService, load_cardio_dataset().head(REPEAT).to_dict("records")),
+    ("Kidney", KidneyHybridService, load_kidney_dataset().head(REPEAT).to_dict("records")),
+]
+
+print("=" * 56)
+print(f"HybridService latency in ms (median of {REPEAT} / 20 runs)")
+print(f"{'Panel':<20}{'evaluate':>12}{f'batch of {BATCH}':>16}")
+print("-" * 56)
+
+for panel, service, records in PANELS:
+    service.warm_up()
+    position = iter(range(10 ** 9))
+
+    single = time_call(lambda: service.evaluate(records[next(position) % len(records)]), REPEAT)
+    batch = time_call(lambda: service.evaluate_batch(records[:BATCH]), 20)
+
+    print(f"{panel:<20}{single:>12.3f}{batch:>16.2f}")
+
+print("=" * 56)
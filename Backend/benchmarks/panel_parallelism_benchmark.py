@@ -0,0 +1,75 @@
+# ============================================
+# Panel Parallelism Benchmark
+# route_multiple latency with the panels run
+# one after another vs side by side, on the
+# comprehensive sample_pdfs reports
+#
+#   python benchmarks/panel_parallelism_benchmark.py
+# ============================================
+
+import os
+import warnings
+
+# Every evaluation must reach the models, not the result cache
+os.environ["CDSS_PREDICTION_CACHE_SIZE"] = "0"
+
+from common import BASE_DIR, time_call
+
+from app import master_service
+from app.master_service import CDSSMasterRouter
+from app.pdf.pdf_extractor import PDFLabExtractor
+from app.detection.enhanced_panel_detector import EnhancedPanelDetector
+
+warnings.filterwarnings("ignore")
+
+SAMPLE_REPORTS = [
+    "sample_08_comprehensive_normal.pdf",
+    "sample_09_comprehensive_multiple_issues.pdf",
+]
+
+PANELS = list(CDSSMasterRouter.PANEL_MAP)
+REPEAT = 100
+PARALLEL_WORKERS = master_service.PANEL_WORKERS or 8
+
+
+def evaluate(data, workers):
+    master_service.PANEL_WORKERS = workers
+    return CDSSMasterRouter.route_multiple(PANELS, data)
+
+
+def without_timestamps(results):
+    return {
+        panel: {key: value for key, value in result.items() if key != "timestamp"}
+        for panel, result in results.items()
+    }
+
+
+for panel in PANELS:
+    try:
+        CDSSMasterRouter.PANEL_MAP[panel].warm_up()
+    except Exception as e:
+        print(f"{panel} unavailable: {str(e)}")
+
+print("=" * 72)
+print(f"route_multiple over {', '.join(PANELS)} (median of {REPEAT} runs)")
+print(f"{'Report':<46}{'serial (ms)':>12}{'parallel (ms)':>14}")
+print("-" * 72)
+
+for report in SAMPLE_REPORTS:
+    data = PDFLabExtractor.extract_from_pdf(os.path.join(BASE_DIR, "sample_pdfs", report))
+    detected = EnhancedPanelDetector.detect_available_panels(data)["available_panels"]
+
+    serial_result = evaluate(data, 0)
+    parallel_result = evaluate(data, PARALLEL_WORKERS)
+
+    assert list(serial_result) == list(parallel_result) == PANELS, "Panel order changed"
+    assert without_timestamps(serial_result) == without_timestamps(parallel_result), f"{report}: parallel results differ"
+
+    serial_ms = time_call(lambda: evaluate(data, 0), REPEAT)
+    parallel_ms = time_call(lambda: evaluate(data, PARALLEL_WORKERS), REPEAT)
+
+    print(f"{report:<46}{serial_ms:>12.2f}{parallel_ms:>14.2f}")
+    print(f"  detected panels: {', '.join(detected) or 'none'}")
+
+print("=" * 72)
+print("Results identical and in request order in both modes.")
@@ -0,0 +1,104 @@
+# ============================================
+# Bulk PDF Upload Benchmark
+# N lab reports sent one /pdf/upload at a time
+# vs in one /pdf/upload-batch request (NDJSON),
+# against a real uvicorn server: time to the
+# first result, total time, identical results
+#
+#   python benchmarks/pdf_batch_benchmark.py
+# ============================================
+
+import glob
+import json
+import os
+import tempfile
+import time
+
+import httpx
+from PyPDF2 import PdfReader, PdfWriter
+
+from common import BASE_DIR, login, start_api_server
+
+COPIES = 4
+SLOW_REPORT_PAGES = 120
+
+
+def slow_report():
+    """Results on the last of many pages: the slowest file of the batch."""
+    sample = PdfReader(os.path.join(BASE_DIR, "sample_pdfs", "sample_09_comprehensive_multiple_issues.pdf"))
+    writer = PdfWriter()
+    for _ in range(SLOW_REPORT_PAGES):
+        writer.add_page(sample.pages[1])
+    writer.add_page(sample.pages[0])
+    buffer = tempfile.SpooledTemporaryFile()
+    writer.write(buffer)
+    buffer.seek(0)
+    return buffer.read()
+
+
+def reports():
+    files = [("slow_report.pdf", slow_report())]
+    for _ in range(COPIES):
+        for path in sorted(glob.glob(os.path.join(BASE_DIR, "sample_pdfs", "*.pdf"))):
+            with open(path, "rb") as handle:
+                files.append((f"{len(files)}_{os.path.basename(path)}", handle.read()))
+    return files
+
+
+def main():
+    files = reports()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Every upload is parsed, every page read
+        server, base_url = start_api_server(tmp, CDSS_PDF_EXTRACTION="full", CDSS_PDF_CACHE="0")
+
+        try:
+            with httpx.Client(base_url=base_url, timeout=300) as client:
+                login(client)
+
+                # Worker start-up is not part of the measurement
+                client.post("/pdf/upload", files={"file": files[1]})
+
+                started = time.perf_counter()
+                sequential = {}
+                first_sequential = None
+                for name, content in files:
+                    sequential[name] = client.post("/pdf/upload", files={"file": (name, content)}).json()
+                    first_sequential = first_sequential or time.perf_counter() - started
+                sequential_s = time.perf_counter() - started
+
+                started = time.perf_counter()
+                batch, arrivals = {}, []
+                with client.stream("POST", "/pdf/upload-batch", files=[("files", (name, content)) for name, content in files]) as response:
+                    for line in response.iter_lines():
+                        result = json.loads(line)
+                        arrivals.append((time.perf_counter() - started, result["filename"]))
+                        batch[result.pop("filename")] = result
+                batch_s = time.perf_counter() - started
+
+        finally:
+            server.terminate()
+            server.wait()
+
+    for name, result in batch.items():
+        result.pop("index")
+        for stored in (result, sequential[name]):
+            stored.get("extraction", {}).pop("page_timings_ms", None)
+
+    assert batch == sequential, "Batch results differ from /pdf/upload"
+
+    slow_at = next(seconds for seconds, name in arrivals if name == "slow_report.pdf")
+
+    print("=" * 72)
+    print(f"{len(files)} reports ({SLOW_REPORT_PAGES + 1}-page report first, then {COPIES}x the sample PDFs)")
+    print(f"{'Mode':<26}{'first result (s)':>18}{'all results (s)':>17}{'reports/s':>11}")
+    print("-" * 72)
+    print(f"{'/pdf/upload, one by one':<26}{first_sequential:>18.2f}{sequential_s:>17.2f}{len(files) / sequential_s:>11.1f}")
+    print(f"{'/pdf/upload-batch':<26}{arrivals[0][0]:>18.2f}{batch_s:>17.2f}{len(files) / batch_s:>11.1f}")
+    print("=" * 72)
+    print(f"Batch: the slow report arrived as line {[name for _, name in arrivals].index('slow_report.pdf') + 1} "
+          f"at {slow_at:.2f} s; results identical to /pdf/upload.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# ============================================
+# PDF Extraction Cache Benchmark
+# /pdf/upload latency for a first upload (parsed)
+# vs a repeat (cache hit), within one API process
+# and from a second process sharing the cache
+# file; plus eviction under a small size limit
+#
+#   python benchmarks/pdf_cache_benchmark.py
+# ============================================
+
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from common import BASE_DIR
+
+LONG_REPORT_PAGES = 150
+
+
+def long_report(path):
+    sample = PdfReader(os.path.join(BASE_DIR, "sample_pdfs", "sample_09_comprehensive_multiple_issues.pdf"))
+    writer = PdfWriter()
+    for _ in range(LONG_REPORT_PAGES):
+        writer.add_page(sample.pages[1])
+    writer.add_page(sample.pages[0])
+    with open(path, "wb") as handle:
+        writer.write(handle)
+
+
+def child(pdf_paths):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"email": "bench@cdss.local", "password": "benchmark"})
+        token = client.post("/auth/login", json={"email": "bench@cdss.local", "password": "benchmark"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def upload(path):
+            with open(path, "rb") as handle:
+                content = handle.read()
+            started = time.perf_counter()
+            response = client.post("/pdf/upload", files={"file": (os.path.basename(path), content)}, headers=headers)
+            body = response.json()
+            cached = body.pop("extraction", {}).get("cached", False) if response.status_code == 200 else None
+            return (time.perf_counter() - started) * 1000, cached, body
+
+        rounds = [[upload(path) for path in pdf_paths] for _ in range(2)]
+        metrics = client.get("/metrics/pdf-cache").json()
+
+    print(json.dumps({"rounds": rounds, "metrics": metrics}))
+
+
+def run_child(pdf_paths, tmp, **settings):
+    env = dict(
+        os.environ,
+        PYTHONWARNINGS="ignore",
+        DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        CDSS_PDF_CACHE_PATH=os.path.join(tmp, "pdf_cache.db"),
+        CDSS_PDF_EXTRACTION="full",
+        **settings
+    )
+
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", *pdf_paths],
+        env=env,
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.strip().splitlines()[-1]
+
+    return json.loads(output)
+
+
+def main():
+
+    with tempfile.TemporaryDirectory() as tmp:
+        long_path = os.path.join(tmp, "long_report.pdf")
+        long_report(long_path)
+        pdf_paths = sorted(glob.glob(os.path.join(BASE_DIR, "sample_pdfs", "*.pdf"))) + [long_path]
+
+        first = run_child(pdf_paths, tmp)
+        second = run_child(pdf_paths, tmp)
+
+        # A fresh cache of 4 KB, about half the bodies: the oldest are evicted
+        small_tmp = os.path.join(tmp, "small")
+        os.makedirs(small_tmp)
+        small = run_child(pdf_paths, small_tmp, CDSS_PDF_CACHE_MAX_MB="0.004")
+
+    parsed, repeat = first["rounds"]
+    other_process = second["rounds"][0]
+
+    # Same response bodies from the parser and from the cache
+    assert [body for _, _, body in parsed] == [body for _, _, body in repeat] == [body for _, _, body in other_process], \
+        "Cached responses differ from parsed ones"
+
+    print("=" * 78)
+    print(f"{len(pdf_paths)} PDFs ({len(pdf_paths) - 1} samples + one {LONG_REPORT_PAGES + 1}-page report), "
+          f"full extraction")
+    print(f"{'Upload':<36}{'total (ms)':>12}{'long report (ms)':>18}{'cache hits':>12}")
+    print("-" * 78)
+
+    for uploads, label in [
+        (parsed, "first upload (parsed)"),
+        (repeat, "repeat, same process"),
+        (other_process, "repeat, another process"),
+    ]:
+        print(f"{label:<36}{sum(u[0] for u in uploads):>12.0f}{uploads[-1][0]:>18.1f}"
+              f"{sum(1 for u in uploads if u[1]):>8}/{len(uploads)}")
+
+    print("=" * 78)
+
+    for label, metrics in [("first process", first["metrics"]), ("second process", second["metrics"]),
+                           ("4 KB limit", small["metrics"])]:
+        print(f"{label:<16} hit rate {metrics['hit_rate']:.2f} ({metrics['hits']} hits, {metrics['misses']} misses), "
+              f"{metrics['entries']} entries, {metrics['size_mb']:.3f} MB, {metrics['evictions']} evicted")
+
+    print("Response bodies identical whether parsed or served from the cache.")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child(sys.argv[sys.argv.index("--child") + 1:])
+    else:
+        main()
@@ -0,0 +1,158 @@
+# ============================================
+# PDF Worker Pool Benchmark
+# /health latency while long PDFs are uploaded
+# concurrently: parsed in the API process
+# (CDSS_PDF_POOL=0) vs in the PDF worker pool
+#
+#   python benchmarks/pdf_pool_benchmark.py
+# ============================================
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PyPDF2 import PdfReader, PdfWriter
+
+from common import BASE_DIR
+
+UPLOADERS = 2
+UPLOADS_PER_THREAD = 3
+DISCLAIMER_PAGES = 300
+PING_INTERVAL = 0.01
+
+
+def write_long_pdf(path):
+    """Disclaimer pages first, results last: the whole file is parsed."""
+    sample = PdfReader(os.path.join(BASE_DIR, "sample_pdfs", "sample_09_comprehensive_multiple_issues.pdf"))
+    writer = PdfWriter()
+    for _ in range(DISCLAIMER_PAGES):
+        writer.add_page(sample.pages[1])
+    writer.add_page(sample.pages[0])
+    with open(path, "wb") as handle:
+        writer.write(handle)
+
+
+def child(pdf_path):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"email": "bench@cdss.local", "password": "benchmark"})
+        token = client.post("/auth/login", json={"email": "bench@cdss.local", "password": "benchmark"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with open(pdf_path, "rb") as handle:
+            content = handle.read()
+
+        def upload():
+            started = time.perf_counter()
+            response = client.post("/pdf/upload", files={"file": ("report.pdf", content, "application/pdf")}, headers=headers)
+            assert response.status_code == 200, response.text
+            return (time.perf_counter() - started) * 1000, response.json()["extracted_data"]
+
+        # Worker start-up and first imports are not part of the measurement
+        upload()
+
+        uploads, results = [], []
+        done = threading.Event()
+
+        def uploader():
+            for _ in range(UPLOADS_PER_THREAD):
+                latency, extracted = upload()
+                uploads.append(latency)
+                results.append(extracted)
+
+        threads = [threading.Thread(target=uploader) for _ in range(UPLOADERS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        def wait():
+            for thread in threads:
+                thread.join()
+            done.set()
+
+        threading.Thread(target=wait).start()
+
+        pings = []
+        while not done.is_set():
+            ping_started = time.perf_counter()
+            client.get("/health")
+            pings.append((time.perf_counter() - ping_started) * 1000)
+            time.sleep(PING_INTERVAL)
+
+        elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        "elapsed_s": elapsed,
+        "upload_avg_ms": float(np.mean(uploads)),
+        "pings": len(pings),
+        "health_p50": float(np.percentile(pings, 50)),
+        "health_p99": float(np.percentile(pings, 99)),
+        "health_max": float(np.max(pings)),
+        "results": results
+    }))
+
+
+def measure(pool, pdf_path, db_path):
+
+    env = dict(
+        os.environ,
+        PYTHONWARNINGS="ignore",
+        DATABASE_URL=f"sqlite:///{db_path}",
+        CDSS_PDF_POOL="1" if pool else "0",
+        CDSS_PDF_WORKERS=str(UPLOADERS),
+        # Every page is read, so each upload costs the same
+        CDSS_PDF_EXTRACTION="full",
+        # Every upload must be parsed
+        CDSS_PDF_CACHE="0"
+    )
+
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", pdf_path],
+        env=env,
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.strip().splitlines()[-1]
+
+    return json.loads(output)
+
+
+def main():
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "long_report.pdf")
+        write_long_pdf(pdf_path)
+
+        in_process = measure(False, pdf_path, os.path.join(tmp, "in_process.db"))
+        pooled = measure(True, pdf_path, os.path.join(tmp, "pooled.db"))
+
+    assert in_process["results"] == pooled["results"], "PDF pool changed extraction results"
+
+    print("=" * 86)
+    print(f"{UPLOADERS} threads x {UPLOADS_PER_THREAD} uploads of a {DISCLAIMER_PAGES + 1}-page PDF, "
+          f"/health every {PING_INTERVAL * 1000:.0f} ms meanwhile")
+    print(f"{'Parsing':<14}{'wall (s)':>10}{'upload avg (ms)':>17}{'pings':>7}"
+          f"{'health p50':>12}{'health p99':>12}{'health max':>12}")
+    print("-" * 86)
+
+    for label, result in [("in-process", in_process), ("worker pool", pooled)]:
+        print(f"{label:<14}{result['elapsed_s']:>10.1f}{result['upload_avg_ms']:>17.0f}{result['pings']:>7}"
+              f"{result['health_p50']:>12.1f}{result['health_p99']:>12.1f}{result['health_max']:>12.1f}")
+
+    print("=" * 86)
+    print("Extraction results identical in both modes. Health latencies in ms.")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child(sys.argv[-1])
+    else:
+        main()
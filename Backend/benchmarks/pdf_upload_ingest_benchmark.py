@@ -0,0 +1,186 @@
+# ============================================
+# PDF Upload Ingestion Benchmark
+# Against a real uvicorn server: concurrent
+# uploads of a ~9 MB PDF (latency, API process
+# peak memory, bytes spooled to temp files) and
+# how soon an oversized upload is rejected
+#
+#   python benchmarks/pdf_upload_ingest_benchmark.py
+# ============================================
+
+import io
+import os
+import select
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+from PyPDF2 import PdfReader, PdfWriter
+
+from common import BASE_DIR, login, start_api_server
+
+THREADS = 8
+UPLOADS_PER_THREAD = 4
+ATTACHMENT_MB = 9
+OVERSIZED_MB = 40
+SEND_CHUNK = 256 * 1024
+SEND_DELAY = 0.005  # between chunks: ~50 MB/s, a fast client on a LAN
+
+
+def large_pdf():
+    """The lab results page plus a 9 MB attachment: near the 10 MB limit, quick to parse."""
+    sample = PdfReader(os.path.join(BASE_DIR, "sample_pdfs", "sample_09_comprehensive_multiple_issues.pdf"))
+    writer = PdfWriter()
+    writer.add_page(sample.pages[0])
+    writer.add_attachment("raw_data.bin", os.urandom(ATTACHMENT_MB * 1024 * 1024))
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def memory_kb(pid, field):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return 0
+
+
+class SpoolWatcher(threading.Thread):
+    """Samples the server's temp directory; keeps the largest total size seen."""
+
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            total = 0
+            for entry in os.scandir(self.path):
+                try:
+                    total += entry.stat().st_size
+                except FileNotFoundError:
+                    pass
+            self.peak = max(self.peak, total)
+            time.sleep(0.002)
+
+
+def oversized_upload(base_url, token, declare_length):
+    """
+    Sends a 40 MB multipart upload over a raw socket in paced chunks,
+    stopping as soon as the server answers. Returns (status, seconds to
+    the answer, MB sent by then).
+    """
+
+    boundary = "cdssbenchboundary"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"huge.pdf\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    size = len(head) + OVERSIZED_MB * 1024 * 1024 + len(tail)
+
+    host, port = base_url.rsplit("/", 1)[1].split(":")
+    headers = [
+        "POST /pdf/upload HTTP/1.1",
+        f"Host: {host}",
+        f"Authorization: Bearer {token}",
+        f"Content-Type: multipart/form-data; boundary={boundary}",
+        f"Content-Length: {size}" if declare_length else "Transfer-Encoding: chunked",
+    ]
+
+    def frame(data):
+        return data if declare_length else b"%x\r\n%s\r\n" % (len(data), data)
+
+    chunk = b"%PDF-1.4\n" + b"0" * (SEND_CHUNK - 9)
+    body = [head] + [chunk] * (OVERSIZED_MB * 1024 * 1024 // SEND_CHUNK) + [tail]
+
+    sent = 0
+    started = time.perf_counter()
+
+    with socket.create_connection((host, int(port))) as sock:
+        sock.sendall(("\r\n".join(headers) + "\r\n\r\n").encode())
+
+        for data in body:
+            if select.select([sock], [], [], 0)[0]:
+                break
+            try:
+                sock.sendall(frame(data))
+            except OSError:
+                break
+            sent += len(data)
+            time.sleep(SEND_DELAY)
+        else:
+            if not declare_length:
+                sock.sendall(b"0\r\n\r\n")
+
+        status = sock.recv(64).split(b" ")[1].decode()
+        elapsed = time.perf_counter() - started
+
+    return status, elapsed, sent / (1024 * 1024)
+
+
+def main():
+    pdf = large_pdf()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = os.path.join(tmp, "spool")
+        os.makedirs(spool)
+
+        # Every upload reaches the parser; temp files go where they can be watched
+        server, base_url = start_api_server(tmp, CDSS_PDF_CACHE="0", TMPDIR=spool)
+
+        try:
+            with httpx.Client(base_url=base_url, timeout=300) as client:
+                login(client)
+
+                def upload(_):
+                    started = time.perf_counter()
+                    response = client.post("/pdf/upload", files={"file": ("large.pdf", pdf, "application/pdf")})
+                    assert response.status_code == 200, response.text
+                    return (time.perf_counter() - started) * 1000
+
+                upload(None)
+                rss_before = memory_kb(server.pid, "VmRSS")
+
+                watcher = SpoolWatcher(spool)
+                watcher.start()
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=THREADS) as pool:
+                    latencies = list(pool.map(upload, range(THREADS * UPLOADS_PER_THREAD)))
+                elapsed = time.perf_counter() - started
+
+                watcher.stopped.set()
+                watcher.join()
+                peak_rss = memory_kb(server.pid, "VmHWM")
+
+                token = client.headers["Authorization"].split()[1]
+                oversized = [
+                    ("Content-Length declared", oversized_upload(base_url, token, True)),
+                    ("chunked, no length", oversized_upload(base_url, token, False)),
+                ]
+
+        finally:
+            server.terminate()
+            server.wait()
+
+    print("=" * 74)
+    print(f"{THREADS} threads x {UPLOADS_PER_THREAD} uploads of a {len(pdf) / (1024 * 1024):.1f} MB PDF")
+    print(f"  latency p50 {np.percentile(latencies, 50):.0f} ms, p95 {np.percentile(latencies, 95):.0f} ms, "
+          f"{len(latencies) / elapsed:.1f} uploads/s")
+    print(f"  API process RSS {rss_before / 1024:.0f} MB before, peak {peak_rss / 1024:.0f} MB; "
+          f"temp files peak {watcher.peak / (1024 * 1024):.1f} MB")
+    print("-" * 74)
+    print(f"{OVERSIZED_MB} MB upload, sent in {SEND_CHUNK // 1024} KB chunks every {SEND_DELAY * 1000:.0f} ms")
+    for label, (status, seconds, sent_mb) in oversized:
+        print(f"  {label:<26} status {status}, after {seconds:.2f} s, {sent_mb:.1f} MB sent")
+    print("=" * 74)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# ============================================
+# Array Rule Engine Parity + Speed
+# analyze_cardio_arrays / analyze_diabetes_arrays /
+# KidneyRuleEngine.evaluate_arrays against the
+# scalar rule functions, row by row, on Data_set
+# rows and randomized inputs (missing values and
+# exact thresholds included)
+#
+#   python benchmarks/rule_engine_parity.py
+# Exits non-zero on a mismatch.
+# ============================================
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import DATA_DIR
+
+from app.Rules.cardio_rules import CARDIO_FINDING_FLAGS, analyze_cardio, analyze_cardio_arrays
+from app.Rules.diabetes import analyze_diabetes, analyze_diabetes_arrays
+from app.Rules.kidney_rules import KidneyRuleEngine
+
+RANDOM_ROWS = 20000
+
+rng = np.random.default_rng(7)
+
+
+def with_missing(values, rate=0.15, thresholds=()):
+    """Random column as objects: some rows None, some exactly on a threshold."""
+    values = values.astype(object)
+    if thresholds:
+        on_threshold = rng.random(len(values)) < 0.1
+        values[on_threshold] = rng.choice(thresholds, on_threshold.sum())
+    values[rng.random(len(values)) < rate] = None
+    return values
+
+
+def scalar(value):
+    """Value as the scalar engine receives it from a JSON payload."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+def best_ms(fn, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+# --------------------------------------------------------
+# Inputs
+# --------------------------------------------------------
+
+# Raw CSV, NaN kept: missing values must behave like absent keywords
+cardio_df = pd.read_csv(os.path.join(DATA_DIR, "Cardiovascular_Dataset.csv"))
+n_data = len(cardio_df)
+
+CARDIO_CASES = {
+    "Cardiovascular_Dataset": {
+        "totChol": cardio_df["totChol"],
+        "hdl": with_missing(rng.uniform(20, 90, n_data).round(), thresholds=(40, 50)),
+        "triglycerides": with_missing(rng.uniform(50, 400, n_data).round(), thresholds=(200,)),
+        "sysBP": cardio_df["sysBP"],
+        "diaBP": cardio_df["diaBP"],
+        "age": cardio_df["age"],
+        "sex": cardio_df["male"],
+    },
+    "randomized": {
+        "totChol": with_missing(rng.uniform(100, 350, RANDOM_ROWS).round(), thresholds=(200, 240)),
+        "hdl": with_missing(rng.uniform(20, 90, RANDOM_ROWS).round(), thresholds=(40, 50)),
+        "triglycerides": with_missing(rng.uniform(50, 400, RANDOM_ROWS).round(), thresholds=(200,)),
+        "sysBP": with_missing(rng.uniform(90, 200, RANDOM_ROWS).round(), thresholds=(140, 160)),
+        "diaBP": with_missing(rng.uniform(50, 120, RANDOM_ROWS).round(), thresholds=(90, 100)),
+        "age": with_missing(rng.uniform(20, 90, RANDOM_ROWS).round(), thresholds=(55, 65)),
+        "sex": rng.choice(np.array([1, 0, 1.0, 0.0, 2, "male", "Female", "MALE", "m", "1", "0.0", None], dtype=object), RANDOM_ROWS),
+    },
+}
+
+DIABETES_CASES = {
+    # Dataset glucose stands in for FBS; HbA1c and PPBS are drawn
+    "Cardiovascular_Dataset glucose": {
+        "hba1c": with_missing(rng.uniform(4, 11, n_data).round(1), thresholds=(5.7, 6.5)),
+        "fbs": cardio_df["glucose"],
+        "ppbs": with_missing(rng.uniform(80, 350, n_data).round(), thresholds=(140, 200, 300)),
+    },
+    "randomized": {
+        "hba1c": with_missing(rng.uniform(-0.5, 11, RANDOM_ROWS).round(1), thresholds=(5.7, 6.5)),
+        "fbs": with_missing(rng.uniform(-5, 400, RANDOM_ROWS).round(), thresholds=(100, 126, 300)),
+        "ppbs": with_missing(rng.uniform(60, 450, RANDOM_ROWS).round(), thresholds=(140, 200, 300)),
+    },
+}
+
+# kidney_Dataset.csv has no eGFR or ACR column, so kidney inputs are drawn
+KIDNEY_CASES = {
+    "randomized": {
+        "egfr": with_missing(rng.uniform(-5, 130, RANDOM_ROWS).round(), thresholds=(15, 30, 60, 90)),
+        "albumin_creatinine_ratio": with_missing(rng.uniform(0, 600, RANDOM_ROWS).round(), rate=0.3, thresholds=(300,)),
+    },
+}
+
+
+def rows(columns):
+    n = len(next(iter(columns.values())))
+    lists = {name: list(values) for name, values in columns.items()}
+    return [{name: scalar(lists[name][i]) for name in columns} for i in range(n)]
+
+
+# --------------------------------------------------------
+# Row comparisons
+# --------------------------------------------------------
+
+def cardio_row(arrays, i):
+    return {
+        "risk_level": arrays["risk_level"][i],
+        "severity_score": int(arrays["severity_score"][i]),
+        "findings": [text for flag, text in CARDIO_FINDING_FLAGS.items() if arrays[flag][i]],
+    }
+
+
+def cardio_expected(row):
+    result = analyze_cardio(**row)
+    return {key: result[key] for key in ("risk_level", "severity_score", "findings")}
+
+
+def diabetes_row(arrays, i):
+    if not arrays["valid"][i]:
+        return "ValueError"
+    classes = {
+        marker: arrays[f"{key}_class"][i]
+        for marker, key in (("HbA1c", "hba1c"), ("FBS", "fbs"), ("PPBS", "ppbs"))
+        if arrays[f"{key}_class"][i] is not None
+    }
+    return {"risk_level": arrays["risk_level"][i], "abnormal_flag": bool(arrays["abnormal_flag"][i]), "markers": classes}
+
+
+def diabetes_expected(row):
+    try:
+        result = analyze_diabetes(**row)
+    except ValueError:
+        return "ValueError"
+    return {
+        "risk_level": result["risk_level"],
+        "abnormal_flag": result["abnormal_flag"],
+        "markers": {marker: value["classification"] for marker, value in result["markers"].items()},
+    }
+
+
+def kidney_row(arrays, i):
+    return {key: (bool(values[i]) if values.dtype == bool else values[i]) for key, values in arrays.items()}
+
+
+ENGINES = [
+    ("Cardiovascular", CARDIO_CASES, cardio_expected, lambda c: analyze_cardio_arrays(**c), cardio_row),
+    ("Diabetes", DIABETES_CASES, diabetes_expected, lambda c: analyze_diabetes_arrays(**c), diabetes_row),
+    ("Kidney", KIDNEY_CASES, KidneyRuleEngine.evaluate,
+     lambda c: KidneyRuleEngine.evaluate_arrays(c["egfr"], c["albumin_creatinine_ratio"]), kidney_row),
+]
+
+failed = []
+
+print("=" * 96)
+print(f"{'Engine':<16}{'Inputs':<32}{'rows':>8}{'mismatches':>12}{'scalar (ms)':>14}{'arrays (ms)':>14}")
+print("-" * 96)
+
+for engine, cases, expected, vectorized, actual in ENGINES:
+    for label, columns in cases.items():
+
+        records = rows(columns)
+        arrays = vectorized(columns)
+
+        mismatches = sum(expected(row) != actual(arrays, i) for i, row in enumerate(records))
+        if mismatches:
+            failed.append(f"{engine} / {label}")
+
+        def run_scalar():
+            for row in records:
+                try:
+                    expected(row)
+                except ValueError:
+                    pass
+
+        scalar_ms = best_ms(run_scalar)
+        arrays_ms = best_ms(lambda: vectorized(columns))
+
+        print(f"{engine:<16}{label:<32}{len(records):>8}{mismatches:>12}{scalar_ms:>14.1f}{arrays_ms:>14.2f}")
+
+print("=" * 96)
+print("scalar: one rule call per row (the engines as the services call them); arrays: one call per column set.")
+
+if failed:
+    raise SystemExit(f"Array engines disagree for: {', '.join(failed)}")
+
+print("Array rule engines match the scalar engines on every row.")
@@ -0,0 +1,148 @@
+# ============================================
+# Multi-Worker Memory Benchmark
+# Per-worker RSS / PSS / private memory of
+# app.serve with and without preload-then-fork
+#
+#   python benchmarks/worker_memory_benchmark.py [workers]
+# ============================================
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from common import BASE_DIR
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+STARTUP_TIMEOUT = 120
+REQUESTS = 60
+
+SAMPLE_RECORD = {
+    "age": 58, "male": 1, "sysBP": 150, "diaBP": 95, "totChol": 240, "BMI": 29,
+    "glucose": 110, "heartRate": 80, "serum_creatinine": 1.8, "blood_urea": 45
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def child_pids(parent):
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Field 4 is the parent pid; the name field may contain spaces
+                if int(f.read().rsplit(")", 1)[1].split()[1]) == parent:
+                    pids.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return sorted(pids)
+
+
+def memory(pid):
+    """RSS, PSS and private (USS) memory in MB from smaps_rollup."""
+
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0]) / 1024
+
+    private = fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0)
+    return fields.get("Rss", 0.0), fields.get("Pss", 0.0), private
+
+
+def get(url, data=None):
+    headers = {"Content-Type": "application/json", "Authorization": "Bearer test-token"}
+    request = urllib.request.Request(url, data=data, headers=headers)
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.status
+
+
+def wait_ready(base_url):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    consecutive = 0
+
+    # Several consecutive 200s so (very likely) every worker has answered
+    while consecutive < WORKERS * 3:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Server did not become ready")
+        try:
+            status = get(f"{base_url}/ready")
+        except Exception:
+            status = None
+        consecutive = consecutive + 1 if status == 200 else 0
+        time.sleep(0.05)
+
+
+def measure(preload):
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    command = [sys.executable, "-m", "app.serve", "--port", str(port), "--workers", str(WORKERS), "--log-level", "warning"]
+    if not preload:
+        command.append("--no-preload")
+
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/cdss_worker_benchmark.db")
+
+    master = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        wait_ready(base_url)
+
+        # Real traffic dirties some inherited pages; measure after it
+        for i in range(REQUESTS):
+            body = json.dumps({
+                "panels": ["Cardiovascular", "Kidney"],
+                "records": [dict(SAMPLE_RECORD, age=30 + i)]
+            }).encode()
+            get(f"{base_url}/evaluate-batch", body)
+
+        # Lazy (no-preload) workers warm up in the background after startup
+        time.sleep(3)
+
+        workers = [memory(pid) for pid in child_pids(master.pid)]
+        return memory(master.pid), workers
+
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+
+    print("=" * 78)
+    print(f"{WORKERS} workers          {'RSS/worker':>12} {'PSS/worker':>12} {'Private/worker':>15} {'Total PSS':>11}")
+    print("-" * 78)
+
+    for label, preload in [("Load per worker", False), ("Preload + fork", True)]:
+        master, workers = measure(preload)
+        n = len(workers)
+
+        rss = sum(w[0] for w in workers) / n
+        pss = sum(w[1] for w in workers) / n
+        private = sum(w[2] for w in workers) / n
+        total = master[1] + sum(w[1] for w in workers)
+
+        print(f"{label:<20} {rss:>10.1f}MB {pss:>10.1f}MB {private:>13.1f}MB {total:>9.1f}MB")
+
+    print("=" * 78)
+    print("PSS splits shared pages between the processes mapping them; Total PSS")
+    print("(master + workers) is the real memory cost of the deployment.")
+
+
+if __name__ == "__main__":
+    main()
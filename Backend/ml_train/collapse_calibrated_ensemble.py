@@ -0,0 +1,293 @@
+# ============================================
+# Collapse Calibrated Ensembles
+# Replaces each CalibratedClassifierCV (3 XGBoost
+# members + 3 Platt maps) with one booster and
+# one fused Platt map, after a guardrail report
+# ============================================
+#
+# The single booster is the calibrated model's `.estimator` (the same
+# XGBoost fitted on all training rows). Its sigmoid map is fitted to the
+# ensemble's own probabilities, so the converted model reproduces the
+# served calibration rather than re-calibrating on the labels.
+#
+# The guardrails compare the two on held-out rows: both are refitted
+# per fold of a stratified 5-fold split, and the out-of-fold predictions
+# are scored (in-sample AUC flatters trees fitted on the same rows).
+#
+# Writes models/native/<bundle>_collapsed/, served only with
+# CDSS_MODEL_VARIANT=collapsed. A panel that fails a guardrail gets no
+# bundle, and one left by an earlier run is removed (exit code 1).
+
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+
+from sklearn.base import clone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import brier_score_loss, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+NATIVE_DIR = os.path.join(MODEL_DIR, "native")
+DATA_DIR = os.path.join(BASE_DIR, "Data_set")
+
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.ml.native_artifacts import NativeBundle, export_single_booster_bundle
+
+
+# --------------------------------------------------------
+# 1️⃣ Guardrails
+# --------------------------------------------------------
+
+# Held-out (out-of-fold) comparison, collapsed vs ensemble
+CV_FOLDS = 5
+MAX_AUC_DROP = 0.005
+MAX_BRIER_INCREASE = 0.005
+MAX_PROBABILITY_DEVIATION = 0.10
+# Share of patients whose risk flag (probability >= threshold) changes
+MAX_DECISION_FLIP_RATE = 0.01
+
+# Exported bundle must reproduce the in-memory collapsed model this closely
+PARITY_TOLERANCE = 1e-6
+
+
+# --------------------------------------------------------
+# 2️⃣ Datasets (same preparation as the training scripts)
+# --------------------------------------------------------
+
+def load_cardio(features):
+    df = pd.read_csv(os.path.join(DATA_DIR, "Cardiovascular_Dataset.csv"))
+
+    for col in df.columns:
+        if df[col].isnull().sum() > 0:
+            df[col] = df[col].fillna(df[col].median())
+
+    df["pulse_pressure"] = df["sysBP"] - df["diaBP"]
+    df["mean_arterial_pressure"] = (2 * df["diaBP"] + df["sysBP"]) / 3
+    df["chol_age_interaction"] = df["totChol"] * df["age"]
+    df["smoking_intensity"] = df["cigsPerDay"] * df["currentSmoker"]
+    df["bmi_age_interaction"] = df["BMI"] * df["age"]
+    df["is_elderly"] = (df["age"] >= 60).astype(int)
+    df["is_stage2_htn"] = (df["sysBP"] >= 140).astype(int)
+
+    return df[features].values, df["TenYearCHD"].values
+
+
+def load_kidney(features):
+    df = pd.read_csv(os.path.join(DATA_DIR, "kidney_Dataset.csv"))
+    df = df.rename(columns={"sc": "serum_creatinine", "bu": "blood_urea"})
+
+    X = df[features].fillna(0).values
+    y = (df["classification"].str.strip() == "ckd").astype(int).values
+
+    return X, y
+
+
+# bundle name, calibrated model, metadata, dataset loader
+PANELS = [
+    ("cardio_model_v3", "cardio_model_v3_calibrated.pkl", "cardio_model_metadata_v3.pkl", load_cardio),
+    ("kidney_model_v2", "kidney_model_v2_calibrated.pkl", "kidney_model_metadata_v2.pkl", load_kidney),
+    # Diabetics_Dataset.csv is not shipped; the panel is skipped without it
+    ("diabetes_model_v2", "diabetes_model_v2_calibrated.pkl", "diabetes_model_metadata_v2.pkl", None),
+]
+
+
+# --------------------------------------------------------
+# 3️⃣ Fused calibration map
+# --------------------------------------------------------
+
+def fit_fused_sigmoid(raw_probability, target_probability):
+    """
+    (a, b) such that 1 / (1 + exp(a * T + b)) best matches the ensemble
+    probability, in sklearn's _SigmoidCalibration convention.
+    Soft-target logistic fit: every row appears as a positive weighted
+    by p and as a negative weighted by 1 - p.
+    """
+
+    T = np.concatenate([raw_probability, raw_probability]).reshape(-1, 1)
+    y = np.concatenate([np.ones(len(raw_probability)), np.zeros(len(raw_probability))])
+    weights = np.concatenate([target_probability, 1.0 - target_probability])
+
+    fit = LogisticRegression(penalty=None, solver="lbfgs", max_iter=1000)
+    fit.fit(T, y, sample_weight=weights)
+
+    return -float(fit.coef_[0, 0]), -float(fit.intercept_[0])
+
+
+def collapse(calibrated_model, estimator, X):
+    """Collapsed probabilities for X, and the fused (a, b) they use."""
+
+    ensemble = calibrated_model.predict_proba(X)[:, 1]
+    raw = estimator.predict_proba(X)[:, 1]
+
+    a, b = fit_fused_sigmoid(raw, ensemble)
+
+    return 1.0 / (1.0 + np.exp(a * raw + b)), a, b
+
+
+def out_of_fold(calibrated_model, X, y):
+    """
+    (ensemble, collapsed) probabilities for every row, each predicted by
+    models refitted without that row's fold, as the originals were fitted.
+    """
+
+    ensemble = np.empty(len(y))
+    collapsed = np.empty(len(y))
+
+    folds = StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=42)
+
+    for train, held_out in folds.split(X, y):
+        # Same construction as the training scripts (clone() would need the
+        # pickling scikit-learn version's parameter names)
+        fold_ensemble = CalibratedClassifierCV(
+            clone(calibrated_model.estimator),
+            method=calibrated_model.method,
+            cv=len(calibrated_model.calibrated_classifiers_)
+        ).fit(X[train], y[train])
+        fold_estimator = clone(calibrated_model.estimator).fit(X[train], y[train])
+
+        # Fused map fitted on the training folds only
+        _, a, b = collapse(fold_ensemble, fold_estimator, X[train])
+
+        ensemble[held_out] = fold_ensemble.predict_proba(X[held_out])[:, 1]
+        raw = fold_estimator.predict_proba(X[held_out])[:, 1]
+        collapsed[held_out] = 1.0 / (1.0 + np.exp(a * raw + b))
+
+    return ensemble, collapsed
+
+
+def median_latency_ms(fn, repeat=200):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+print("=" * 60)
+print("Collapse Calibrated Ensembles")
+print("=" * 60)
+
+failed = []
+
+for bundle_name, model_file, metadata_file, load_dataset in PANELS:
+
+    model_path = os.path.join(MODEL_DIR, model_file)
+
+    if load_dataset is None or not os.path.exists(model_path):
+        print(f"\n[{bundle_name}] model or dataset not available - skipped")
+        continue
+
+    calibrated_model = joblib.load(model_path)
+    metadata = joblib.load(os.path.join(MODEL_DIR, metadata_file))
+    features = metadata["features"]
+    threshold = float(metadata.get("threshold", 0.5))
+
+    X, y = load_dataset(features)
+
+    # --------------------------------------------------------
+    # 4️⃣ Collapse (served model, fitted on every row)
+    # --------------------------------------------------------
+
+    estimator = calibrated_model.estimator
+    collapsed, a, b = collapse(calibrated_model, estimator, X)
+
+    # --------------------------------------------------------
+    # 5️⃣ Guardrail report (held-out rows)
+    # --------------------------------------------------------
+
+    ensemble_cv, collapsed_cv = out_of_fold(calibrated_model, X, y)
+    deviation = np.abs(collapsed_cv - ensemble_cv)
+
+    report = {
+        "rows": int(len(y)),
+        "evaluation": f"{CV_FOLDS}-fold out-of-fold",
+        "max_probability_deviation": float(deviation.max()),
+        "mean_probability_deviation": float(deviation.mean()),
+        "auc_ensemble": float(roc_auc_score(y, ensemble_cv)),
+        "auc_collapsed": float(roc_auc_score(y, collapsed_cv)),
+        "brier_ensemble": float(brier_score_loss(y, ensemble_cv)),
+        "brier_collapsed": float(brier_score_loss(y, collapsed_cv)),
+        "threshold": threshold,
+        "decision_flip_rate": float(np.mean((collapsed_cv >= threshold) != (ensemble_cv >= threshold))),
+        "fused_sigmoid": {"a": a, "b": b}
+    }
+    report["auc_delta"] = report["auc_collapsed"] - report["auc_ensemble"]
+    report["brier_delta"] = report["brier_collapsed"] - report["brier_ensemble"]
+
+    print(f"\n[{bundle_name}] {report['rows']} rows, {len(calibrated_model.calibrated_classifiers_)} members -> 1, "
+          f"{report['evaluation']}")
+    print(f"  Max |p diff|:   {report['max_probability_deviation']:.4f} (mean {report['mean_probability_deviation']:.4f})")
+    print(f"  AUC:            {report['auc_ensemble']:.4f} -> {report['auc_collapsed']:.4f} ({report['auc_delta']:+.4f})")
+    print(f"  Brier:          {report['brier_ensemble']:.4f} -> {report['brier_collapsed']:.4f} ({report['brier_delta']:+.4f})")
+    print(f"  Decision flips: {report['decision_flip_rate']:.2%} at threshold {threshold:.4f}")
+
+    problems = []
+    if report["auc_delta"] < -MAX_AUC_DROP:
+        problems.append(f"AUC drop {-report['auc_delta']:.4f} > {MAX_AUC_DROP}")
+    if report["brier_delta"] > MAX_BRIER_INCREASE:
+        problems.append(f"Brier increase {report['brier_delta']:.4f} > {MAX_BRIER_INCREASE}")
+    if report["max_probability_deviation"] > MAX_PROBABILITY_DEVIATION:
+        problems.append(f"max deviation {report['max_probability_deviation']:.4f} > {MAX_PROBABILITY_DEVIATION}")
+    if report["decision_flip_rate"] > MAX_DECISION_FLIP_RATE:
+        problems.append(f"decision flips {report['decision_flip_rate']:.2%} > {MAX_DECISION_FLIP_RATE:.0%}")
+
+    bundle_dir = os.path.join(NATIVE_DIR, f"{bundle_name}_collapsed")
+
+    if problems:
+        print(f"  ❌ Not exported: {'; '.join(problems)}")
+        if os.path.exists(bundle_dir):
+            # An earlier export must not stay servable
+            shutil.rmtree(bundle_dir)
+            print(f"  Removed {os.path.relpath(bundle_dir, BASE_DIR)}")
+        failed.append(bundle_name)
+        continue
+
+    # --------------------------------------------------------
+    # 6️⃣ Export + parity check
+    # --------------------------------------------------------
+
+    collapsed_metadata = dict(metadata)
+    collapsed_metadata["model_version"] = f"{metadata.get('model_version', bundle_name)}-collapsed"
+    collapsed_metadata["collapsed_from"] = model_file
+
+    export_single_booster_bundle(
+        bundle_dir,
+        collapsed_metadata,
+        estimator,
+        a,
+        b,
+        sources=[model_path, os.path.join(MODEL_DIR, metadata_file)],
+        report=report
+    )
+
+    native = NativeBundle(bundle_dir).load_model()
+    compiled = native.to_compiled()
+
+    parity = np.max(np.abs(native.predict_proba(X)[:, 1] - collapsed))
+    if parity > PARITY_TOLERANCE:
+        raise SystemExit(f"[{bundle_name}] exported bundle differs from the collapsed model ({parity:.2e})")
+
+    # Single-row scoring cost, ensemble vs collapsed (compiled engine)
+    row = X[:1]
+    ensemble_compiled = NativeBundle(os.path.join(NATIVE_DIR, bundle_name)).load_model().to_compiled()
+
+    print(f"  1-row latency:  {median_latency_ms(lambda: ensemble_compiled.predict_proba(row)):.3f} ms -> "
+          f"{median_latency_ms(lambda: compiled.predict_proba(row)):.3f} ms")
+    print(f"  ✅ Exported to {os.path.relpath(bundle_dir, BASE_DIR)}")
+
+if failed:
+    raise SystemExit(f"\nGuardrails failed for: {', '.join(failed)}")
+
+print("\nDone.")
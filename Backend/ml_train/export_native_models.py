@@ -0,0 +1,109 @@
+# ============================================
+# Export Native Model Bundles
+# Converts the joblib pickles in models/ into
+# XGBoost UBJ boosters + JSON sidecar bundles
+# (models/native/<bundle>/) read by the loaders
+# ============================================
+
+import os
+import sys
+
+import numpy as np
+import joblib
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+NATIVE_DIR = os.path.join(MODEL_DIR, "native")
+
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.ml.native_artifacts import NativeBundle, export_bundle
+
+
+# --------------------------------------------------------
+# 1️⃣ Panels to export
+# --------------------------------------------------------
+
+# bundle name, calibrated model, metadata, SHAP model (None = calibrated member 0)
+PANELS = [
+    ("cardio_model_v3", "cardio_model_v3_calibrated.pkl", "cardio_model_metadata_v3.pkl", None),
+    ("kidney_model_v2", "kidney_model_v2_calibrated.pkl", "kidney_model_metadata_v2.pkl", "calibrated.estimator"),
+    ("diabetes_model_v2", "diabetes_model_v2_calibrated.pkl", "diabetes_model_metadata_v2.pkl", "diabetes_model_base_xgb_v2.pkl"),
+]
+
+# Exported probabilities must match the pickles this closely
+PARITY_TOLERANCE = 1e-6
+
+print("=" * 60)
+print("Native Model Export")
+print("=" * 60)
+
+
+# --------------------------------------------------------
+# 2️⃣ Export + parity check
+# --------------------------------------------------------
+
+rng = np.random.default_rng(42)
+
+for bundle_name, model_file, metadata_file, explainer_source in PANELS:
+
+    model_path = os.path.join(MODEL_DIR, model_file)
+    metadata_path = os.path.join(MODEL_DIR, metadata_file)
+    metadata = joblib.load(metadata_path)
+    sources = [metadata_path]
+
+    calibrated_model = None
+    if os.path.exists(model_path):
+        calibrated_model = joblib.load(model_path)
+        sources.append(model_path)
+    else:
+        print(f"\n[{bundle_name}] {model_file} not found - exporting explainer + metadata only")
+
+    # Same estimator the SHAP explainer used with the pickles
+    if explainer_source is None:
+        explainer_estimator = calibrated_model.calibrated_classifiers_[0].estimator
+    elif explainer_source == "calibrated.estimator":
+        explainer_estimator = calibrated_model.estimator
+    else:
+        explainer_path = os.path.join(MODEL_DIR, explainer_source)
+        explainer_estimator = joblib.load(explainer_path)
+        sources.append(explainer_path)
+
+    bundle_dir = os.path.join(NATIVE_DIR, bundle_name)
+
+    manifest = export_bundle(
+        bundle_dir,
+        metadata,
+        calibrated_model=calibrated_model,
+        explainer_estimator=explainer_estimator,
+        sources=sources
+    )
+
+    print(f"\n[{bundle_name}] exported to {os.path.relpath(bundle_dir, BASE_DIR)}")
+    print(f"  Members:   {len(manifest['members'])}")
+    print(f"  Explainer: {manifest['explainer']['booster']}")
+
+    if calibrated_model is None:
+        continue
+
+    # Random rows spanning each feature's plausible range (incl. zeros)
+    n_features = len(metadata["features"])
+    X = rng.uniform(0, 300, size=(2000, n_features))
+    X[::7] = 0
+
+    expected = calibrated_model.predict_proba(X)[:, 1]
+
+    bundle = NativeBundle(bundle_dir)
+    native = bundle.load_model()
+
+    native_diff = np.max(np.abs(native.predict_proba(X)[:, 1] - expected))
+    compiled_diff = np.max(np.abs(native.to_compiled().predict_proba(X[:32])[:, 1] - expected[:32]))
+
+    print(f"  Max |diff| native booster:  {native_diff:.2e}")
+    print(f"  Max |diff| compiled arrays: {compiled_diff:.2e}")
+
+    if max(native_diff, compiled_diff) > PARITY_TOLERANCE:
+        raise SystemExit(f"[{bundle_name}] parity check failed")
+
+print("\nDone.")